@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""End-to-end front-compaction benchmark: builder and hooks on a synthetic transcript.
+
+Each scenario runs as a child process. It records wall time, peak RSS
+(wait4 ru_maxrss, which includes the child's own children) and bytes read.
+Bytes read come from /proc/<pid>/io of the exited child, before it is reaped,
+so the counts include every process the hook started. `rchar` counts read()
+calls only; pages the builder maps with mmap for its tail scan are not in it.
+`read_bytes` is what actually came from disk. Results are written as JSON.
+With --baseline, any scenario whose median wall time or peak RSS grew by more
+than --tolerance is reported, and the exit status is 1.
+
+Usage:
+  python3 bench_front_compaction.py --turns 5000 --out results.json
+  python3 bench_front_compaction.py --target-size 1G --repeat 1 --out big.json
+  python3 bench_front_compaction.py --turns 5000 --baseline results.json --out new.json
+  python3 bench_front_compaction.py --transcript ~/.claude/projects/x/session.jsonl --out real.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import datetime as dt
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+
+import generate_transcript
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+HOOKS_DIR = BENCH_DIR.parent
+BUILDER = HOOKS_DIR / "lib" / "build_context_pack.py"
+PREPARE_SCRIPT = HOOKS_DIR / "prepare-front-compaction.sh"
+REINJECT_SCRIPT = HOOKS_DIR / "reinject-after-compact.sh"
+RESULTS_SCHEMA_VERSION = "1"
+SESSION_ID = "bench-session"
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    argv: list[str]
+    env: dict[str, str] = dataclasses.field(default_factory=dict)
+    stdin: bytes = b""
+    # Untimed preparation before every run (reset an index, restore a pending marker).
+    setup: Callable[[], None] | None = None
+
+
+@dataclasses.dataclass
+class RunSample:
+    wall_seconds: float
+    max_rss_kb: int
+    rchar: int | None
+    read_bytes: int | None
+
+
+def _read_proc_io(pid: int) -> dict[str, int]:
+    try:
+        text = pathlib.Path(f"/proc/{pid}/io").read_text(encoding="ascii")
+    except OSError:
+        return {}
+    fields = (line.partition(": ") for line in text.splitlines())
+    return {key: int(value) for key, _, value in fields if value.isdigit()}
+
+
+def run_measured(scenario: Scenario) -> RunSample:
+    env = {**os.environ, **scenario.env}
+    with tempfile.TemporaryFile() as stdin, tempfile.TemporaryFile() as stderr:
+        stdin.write(scenario.stdin)
+        stdin.seek(0)
+        started = time.perf_counter()
+        proc = subprocess.Popen(scenario.argv, stdin=stdin, stdout=subprocess.DEVNULL, stderr=stderr, env=env)
+        # Wait without reaping so /proc/<pid>/io is still readable, then reap with wait4 for rusage.
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        wall = time.perf_counter() - started
+        io_counts = _read_proc_io(proc.pid)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            stderr.seek(0)
+            detail = stderr.read().decode("utf-8", "replace").strip().splitlines()[-3:]
+            raise RuntimeError(f"{scenario.name} exited {proc.returncode}: {' | '.join(detail)}")
+    return RunSample(wall, usage.ru_maxrss, io_counts.get("rchar"), io_counts.get("read_bytes"))
+
+
+def summarize(scenario: Scenario, samples: list[RunSample]) -> dict:
+    walls = [sample.wall_seconds for sample in samples]
+
+    def median_of(values: list[int | None]) -> int | None:
+        present = [value for value in values if value is not None]
+        return int(statistics.median(present)) if present else None
+
+    return {
+        "name": scenario.name,
+        "runs": len(samples),
+        "wallSeconds": {
+            "min": round(min(walls), 4),
+            "median": round(statistics.median(walls), 4),
+            "max": round(max(walls), 4),
+        },
+        "maxRssKb": max(sample.max_rss_kb for sample in samples),
+        "rcharBytes": median_of([sample.rchar for sample in samples]),
+        "readBytes": median_of([sample.read_bytes for sample in samples]),
+    }
+
+
+def _builder_argv(transcript: pathlib.Path, percent: int, *extra: str) -> list[str]:
+    return [
+        sys.executable,
+        str(BUILDER),
+        "--transcript-path",
+        str(transcript),
+        "--session-id",
+        SESSION_ID,
+        "--percent",
+        str(percent),
+        *extra,
+    ]
+
+
+def _warm_up(argv: list[str], env: dict[str, str] | None = None) -> None:
+    subprocess.run(argv, check=True, stdout=subprocess.DEVNULL, env={**os.environ, **(env or {})})
+
+
+def build_scenarios(
+    work_dir: pathlib.Path,
+    transcript: pathlib.Path,
+    percent: int,
+    pack_formats: list[str],
+    index_snapshot: pathlib.Path | None,
+) -> list[Scenario]:
+    cold_index = work_dir / "cold.turn-index.json"
+    append_index = work_dir / "append.turn-index.json"
+    hierarchical_index = work_dir / "hierarchical.turn-index.json"
+    warm_index = work_dir / "warm.turn-index.json"
+    warm_argv = _builder_argv(transcript, percent, "--index-path", str(warm_index))
+
+    def ensure_warm_index() -> None:
+        if not warm_index.exists():
+            _warm_up(warm_argv)
+
+    scenarios = [
+        Scenario("build.scan", _builder_argv(transcript, percent)),
+        Scenario(
+            "build.index-cold",
+            _builder_argv(transcript, percent, "--index-path", str(cold_index)),
+            setup=lambda: cold_index.unlink(missing_ok=True),
+        ),
+    ]
+    if index_snapshot is not None:
+        scenarios.append(
+            Scenario(
+                "build.index-append",
+                _builder_argv(transcript, percent, "--index-path", str(append_index)),
+                setup=lambda: shutil.copyfile(index_snapshot, append_index),
+            )
+        )
+
+        def restore_hierarchical_snapshot() -> None:
+            shutil.copyfile(index_snapshot, hierarchical_index)
+            shutil.copyfile(
+                index_snapshot.with_name("snapshot.segments.json"), work_dir / "hierarchical.segments.json"
+            )
+
+        scenarios.append(
+            Scenario(
+                "build.hierarchical-append",
+                _builder_argv(
+                    transcript, percent, "--summarizer", "hierarchical", "--index-path", str(hierarchical_index)
+                ),
+                setup=restore_hierarchical_snapshot,
+            )
+        )
+    scenarios += [
+        Scenario("build.index-warm", warm_argv, setup=ensure_warm_index),
+        Scenario(
+            "build.extractive",
+            _builder_argv(transcript, percent, "--summarizer", "extractive", "--focus", "cache invalidation retry"),
+        ),
+    ]
+
+    for pack_format in pack_formats:
+        root = work_dir / f"root-v{pack_format}"
+        env = {
+            "FRONT_COMPACTION_ROOT": str(root),
+            "FRONT_COMPACTION_PACK_FORMAT": pack_format,
+            "FRONT_COMPACTION_DAEMON": "0",
+        }
+        prepare_argv = [str(PREPARE_SCRIPT), "--session-id", SESSION_ID, "--transcript-path", str(transcript), str(percent)]
+        pending = root / "state" / f"{SESSION_ID}.pending"
+        index = root / "state" / f"{SESSION_ID}.turn-index.json"
+        latest_pack: list[str] = []
+
+        def restore_pending(
+            pending: pathlib.Path = pending,
+            latest_pack: list[str] = latest_pack,
+            prepare_argv: list[str] = prepare_argv,
+            env: dict[str, str] = env,
+        ) -> None:
+            # Reinject consumes the marker on every run; put the last prepared pack back.
+            if not latest_pack:
+                if not pending.exists():
+                    _warm_up(prepare_argv, env)
+                latest_pack.append(pending.read_text(encoding="utf-8").strip())
+            pending.write_text(latest_pack[0] + "\n", encoding="utf-8")
+
+        scenarios += [
+            Scenario(
+                f"hook.prepare-cold.v{pack_format}",
+                prepare_argv,
+                env,
+                setup=lambda index=index: index.unlink(missing_ok=True),
+            ),
+            Scenario(f"hook.prepare-warm.v{pack_format}", prepare_argv, env),
+            Scenario(
+                f"hook.reinject.v{pack_format}",
+                [str(REINJECT_SCRIPT)],
+                env,
+                stdin=json.dumps(
+                    {"hook_event_name": "SessionStart", "source": "compact", "session_id": SESSION_ID}
+                ).encode("utf-8"),
+                setup=restore_pending,
+            ),
+        ]
+    return scenarios
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    previous = {row["name"]: row for row in baseline.get("scenarios", [])}
+    regressions = []
+    for row in results:
+        old = previous.get(row["name"])
+        if old is None:
+            continue
+        for label, new_value, old_value in (
+            ("median wall", row["wallSeconds"]["median"], old["wallSeconds"]["median"]),
+            ("peak RSS", row["maxRssKb"], old["maxRssKb"]),
+        ):
+            if old_value and new_value > old_value * (1 + tolerance):
+                regressions.append(f"{row['name']}: {label} {old_value} -> {new_value} (+{new_value / old_value - 1:.0%})")
+    return regressions
+
+
+def prepare_transcript(args: argparse.Namespace, work_dir: pathlib.Path) -> tuple[pathlib.Path, dict, pathlib.Path | None]:
+    """Return (transcript path, its description, turn-index snapshot taken before the appended turns)."""
+    if args.transcript:
+        transcript = pathlib.Path(args.transcript).expanduser()
+        return transcript, {"path": str(transcript), "bytes": transcript.stat().st_size, "generated": False}, None
+
+    transcript = work_dir / "transcript.jsonl"
+    shape = generate_transcript.TranscriptShape(
+        tool_calls_per_turn=args.tool_calls_per_turn,
+        result_bytes=args.result_bytes,
+        session_id=SESSION_ID,
+    )
+    with transcript.open("wb", buffering=1024 * 1024) as handle:
+        stats = generate_transcript.write_transcript(
+            handle, args.turns, args.seed, target_bytes=args.target_size, shape=shape
+        )
+
+    # Snapshot the index and segment summaries, then append a few turns:
+    # build.index-append and build.hierarchical-append replay exactly the
+    # incremental work of a repeated compaction.
+    snapshot = work_dir / "snapshot.turn-index.json"
+    _warm_up(_builder_argv(transcript, args.percent, "--summarizer", "hierarchical", "--index-path", str(snapshot)))
+    with transcript.open("ab", buffering=1024 * 1024) as handle:
+        appended = generate_transcript.write_transcript(
+            handle, args.append_turns, args.seed, start_turn=stats.turns, shape=shape
+        )
+
+    description = {
+        "path": str(transcript),
+        "generated": True,
+        "seed": args.seed,
+        "turns": stats.turns + appended.turns,
+        "appendedTurns": appended.turns,
+        "lines": stats.lines + appended.lines,
+        "bytes": stats.bytes + appended.bytes,
+        "toolCalls": stats.tool_calls + appended.tool_calls,
+        "toolResultBytes": stats.tool_result_bytes + appended.tool_result_bytes,
+    }
+    return transcript, description, snapshot
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--turns", type=int, default=None, help="synthetic transcript turns (default 5000)")
+    source.add_argument("--target-size", type=generate_transcript.parse_size, help="synthetic transcript size, e.g. 1G")
+    source.add_argument("--transcript", default="", help="benchmark an existing transcript instead")
+    parser.add_argument("--append-turns", type=int, default=20, help="turns appended after the index snapshot")
+    parser.add_argument("--tool-calls-per-turn", type=float, default=generate_transcript.TranscriptShape.tool_calls_per_turn)
+    parser.add_argument("--result-bytes", type=int, default=generate_transcript.TranscriptShape.result_bytes)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--percent", type=int, default=30)
+    parser.add_argument("--pack-formats", default="1,2,3", help="comma-separated pack formats for the hook scenarios")
+    parser.add_argument("--only", default="", help="run scenarios whose name starts with this prefix")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="", help="write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", default="", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth before a regression is reported")
+    parser.add_argument("--work-dir", default="", help="keep transcripts and packs here instead of a temp dir")
+    args = parser.parse_args()
+    if args.turns is None and args.target_size is None and not args.transcript:
+        args.turns = 5000
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="fc-bench-") as tmp:
+        work_dir = pathlib.Path(args.work_dir or tmp)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        transcript, description, snapshot = prepare_transcript(args, work_dir)
+        scenarios = build_scenarios(
+            work_dir,
+            transcript,
+            args.percent,
+            [value for value in args.pack_formats.split(",") if value],
+            snapshot,
+        )
+
+        print(f"transcript: {description['bytes'] / 1e6:.1f} MB, median of {args.repeat} runs", file=sys.stderr)
+        results = []
+        failures = 0
+        for scenario in scenarios:
+            if not scenario.name.startswith(args.only):
+                continue
+            samples = []
+            try:
+                for _ in range(args.repeat):
+                    if scenario.setup is not None:
+                        scenario.setup()
+                    samples.append(run_measured(scenario))
+            except (RuntimeError, OSError) as exc:
+                failures += 1
+                results.append({"name": scenario.name, "error": str(exc)})
+                print(f"- {scenario.name:28} FAILED {exc}", file=sys.stderr)
+                continue
+            row = summarize(scenario, samples)
+            results.append(row)
+            rchar = row["rcharBytes"]
+            print(
+                f"- {scenario.name:28} {row['wallSeconds']['median'] * 1000:10.1f}ms  "
+                f"rss {row['maxRssKb'] / 1024:8.1f}MB  "
+                f"read {'n/a' if rchar is None else f'{rchar / 1e6:.1f}MB':>10}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "benchmark": "front-compaction",
+        "schemaVersion": RESULTS_SCHEMA_VERSION,
+        "createdAt": dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+        },
+        "config": {"percent": args.percent, "repeat": args.repeat, "packFormats": args.pack_formats},
+        "transcript": description,
+        "scenarios": results,
+    }
+    payload = json.dumps(report, indent=2) + "\n"
+    if args.out:
+        pathlib.Path(args.out).write_text(payload, encoding="utf-8")
+    else:
+        sys.stdout.write(payload)
+
+    status = 1 if failures else 0
+    if args.baseline:
+        regressions = compare(
+            [row for row in results if "error" not in row],
+            json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8")),
+            args.tolerance,
+        )
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: prefix-sum replay truncation vs the previous pop(0)/join loop.
+
+Usage:
+  python3 bench_replay_truncation.py                 # 10k synthetic turns
+  python3 bench_replay_truncation.py --turns 2000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "lib"))
+
+import build_context_pack as bcp  # noqa: E402
+
+WORDS = (
+    "config loader retry timeout cache invalidate schema migration decided "
+    "src/app/main.py tests/test_api.py handler parse_args rollout checklist"
+).split()
+
+
+def synthetic_turns(count: int, seed: int) -> list[bcp.Turn]:
+    rng = random.Random(seed)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    return [
+        bcp.Turn(
+            user=f"{sentence(rng.randint(6, 20))}\n{sentence(rng.randint(0, 12))}".strip(),
+            assistant="\n\n".join(sentence(rng.randint(10, 60)) for _ in range(rng.randint(1, 4))),
+        )
+        for _ in range(count)
+    ]
+
+
+def legacy_truncate_replay_to_cap(
+    tail_turns: list[bcp.Turn],
+    first_turn_number: int,
+    summary: str,
+    max_tail_chars: int,
+    max_replay_chars: int,
+) -> tuple[str, str, int, bool]:
+    """The pre-prefix-sum implementation, kept verbatim for comparison."""
+    blocks = [bcp._render_turn_block(turn, first_turn_number + idx) for idx, turn in enumerate(tail_turns)]
+    truncated = False
+    while blocks and len("\n".join(blocks)) > max_tail_chars:
+        blocks.pop(0)
+        truncated = True
+    if not blocks:
+        raise bcp.UnsupportedError("tail replay became empty after applying maxTailChars limit")
+    tail_content = "\n".join(blocks).strip()
+    replay = bcp._build_replay(summary, tail_content)
+    if len(replay) <= max_replay_chars:
+        return replay, tail_content, len(blocks), truncated
+
+    blocks = [bcp._render_turn_block(turn, first_turn_number + idx) for idx, turn in enumerate(tail_turns)]
+    dropped = False
+    while blocks and len(bcp._build_replay(summary, "\n".join(blocks).strip())) > max_replay_chars:
+        blocks.pop(0)
+        dropped = True
+    if not blocks:
+        raise bcp.UnsupportedError("replay payload exceeds maxReplayChars with no tail turns left")
+    tail_content = "\n".join(blocks).strip()
+    replay = bcp._build_replay(summary, tail_content)
+    return replay, tail_content, len(blocks), (truncated or dropped)
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, tuple]:
+    best = float("inf")
+    result: tuple = ()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    turns = synthetic_turns(args.turns, args.seed)
+    summary = "Front compaction summary (30%): synthetic head."
+    # (label, maxTailChars, maxReplayChars): the first case mirrors the hook
+    # defaults; the others keep a wide tail window so many blocks must be dropped.
+    cases = [
+        ("hook defaults", 16_000, 19_000),
+        ("replay cap binds", 10**9, 19_000),
+        ("tail cap binds", 19_000, 10**9),
+    ]
+
+    print(f"{args.turns} synthetic turns, best of {args.repeat}")
+    for label, max_tail, max_replay in cases:
+        call = (turns, 1, summary, max_tail, max_replay)
+        legacy_s, legacy_result = best_of(args.repeat, legacy_truncate_replay_to_cap, *call)
+        current_s, current_result = best_of(args.repeat, bcp._truncate_replay_to_cap, *call)
+        if legacy_result != current_result:
+            print(f"{label}: results differ", file=sys.stderr)
+            return 1
+        print(
+            f"- {label:17} legacy {legacy_s * 1000:10.1f}ms  "
+            f"prefix-sum {current_s * 1000:8.1f}ms  "
+            f"speedup {legacy_s / max(current_s, 1e-9):8.1f}x  "
+            f"(kept {current_result[2]} turns)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
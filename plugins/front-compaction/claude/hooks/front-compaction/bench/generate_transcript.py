@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Generate synthetic Claude Code transcripts (JSONL) for front-compaction benchmarks.
+
+Lines carry the same envelope as real transcripts (uuid chain, cwd, sessionId,
+timestamps) and mix plain user prompts, assistant text, tool_use calls and
+tool results whose toolUseResult payload repeats the output, as Claude Code
+writes it. Output is streamed, so multi-GB files need no extra memory, and a
+given seed always produces the same bytes.
+
+Usage:
+  python3 generate_transcript.py --turns 10000 --out /tmp/t.jsonl
+  python3 generate_transcript.py --target-size 1G --out /tmp/big.jsonl
+  python3 generate_transcript.py --turns 50 --start-turn 10000 --append --out /tmp/t.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import math
+import random
+import re
+import sys
+import uuid
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+
+WORDS = (
+    "config loader retry timeout cache invalidate schema migration decided because handler parse_args "
+    "rollout checklist fixture regression benchmark latency throughput index snapshot compaction replay "
+    "session transcript budget token estimate summary boundary turn window stream buffer offset"
+).split()
+FILES = (
+    "src/app/main.py src/app/config.py src/app/cache.py src/storage/index.py tests/test_api.py "
+    "tests/test_cache.py docs/architecture.md scripts/release.sh web/src/App.tsx web/src/api/client.ts"
+).split()
+COMMANDS = ("pytest -q", "npm test", "git status", "rg -n TODO src", "make lint", "ls -la src/app")
+TOOLS = ("Read", "Edit", "Bash", "Grep", "Write")
+START_TIME = dt.datetime(2026, 1, 5, 9, 0, tzinfo=dt.timezone.utc)
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?$", re.IGNORECASE)
+
+
+@dataclass
+class TranscriptShape:
+    """Knobs for the synthetic session; defaults resemble a tool-heavy coding session."""
+
+    tool_calls_per_turn: float = 2.0
+    result_bytes: int = 4096
+    max_result_bytes: int = 1024 * 1024
+    session_id: str = "bench-session"
+
+
+@dataclass
+class TranscriptStats:
+    turns: int = 0
+    lines: int = 0
+    bytes: int = 0
+    tool_calls: int = 0
+    tool_result_bytes: int = 0
+
+
+def parse_size(value: str) -> int:
+    match = _SIZE.match(value.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "_KMGT".index(unit.upper() or "_"))
+
+
+class _Session:
+    def __init__(self, seed: int, start_turn: int, shape: TranscriptShape):
+        # Seeding by the first turn number keeps appended segments deterministic too.
+        self.rng = random.Random(f"{seed}:{start_turn}")
+        self.shape = shape
+        self.parent: str | None = None
+        self.clock = START_TIME + dt.timedelta(seconds=30 * start_turn)
+        self.tool_counter = start_turn * 100
+        pool_lines = (f"{idx:>5}  {self.sentence(self.rng.randint(4, 12))}" for idx in range(1, 1 << 15))
+        self.pool = "\n".join(pool_lines)
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def sentence(self, words: int) -> str:
+        text = " ".join(self.rng.choice(WORDS) for _ in range(words))
+        return text[:1].upper() + text[1:] + "."
+
+    def paragraph(self, sentences: int) -> str:
+        return " ".join(self.sentence(self.rng.randint(5, 16)) for _ in range(sentences))
+
+    def envelope(self, kind: str, message: dict, **extra: object) -> str:
+        self.clock += dt.timedelta(seconds=self.rng.randint(1, 20))
+        entry = {
+            "parentUuid": self.parent,
+            "isSidechain": False,
+            "userType": "external",
+            "cwd": "/work/bench-repo",
+            "sessionId": self.shape.session_id,
+            "version": "1.0.0",
+            "gitBranch": "main",
+            "type": kind,
+            "message": message,
+            "uuid": self._uuid(),
+            "timestamp": self.clock.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            **extra,
+        }
+        self.parent = entry["uuid"]
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+    def assistant_message(self, content: list[dict]) -> dict:
+        return {
+            "id": f"msg_{self.rng.getrandbits(64):016x}",
+            "type": "message",
+            "role": "assistant",
+            "model": "synthetic",
+            "content": content,
+            "stop_reason": None,
+            "usage": {"input_tokens": self.rng.randint(100, 9000), "output_tokens": self.rng.randint(10, 900)},
+        }
+
+    def result_size(self) -> int:
+        # Log-normal sizes: mostly small outputs, a long tail of large reads/logs.
+        size = int(self.rng.lognormvariate(math.log(max(self.shape.result_bytes, 1)), 1.0))
+        return max(16, min(size, self.shape.max_result_bytes))
+
+    def output(self, size: int) -> str:
+        # Slicing one pre-built pool keeps multi-GB generation I/O bound.
+        start = self.rng.randrange(len(self.pool) - size) if size < len(self.pool) else 0
+        return self.pool[start : start + size]
+
+    def tool_call(self) -> tuple[dict, str, dict]:
+        """Return (tool_use item, result content, toolUseResult payload)."""
+        self.tool_counter += 1
+        tool_id = f"toolu_{self.tool_counter:012d}"
+        name = self.rng.choice(TOOLS)
+        path = "/work/bench-repo/" + self.rng.choice(FILES)
+        output = self.output(self.result_size())
+        if name == "Bash":
+            tool_input: dict = {"command": self.rng.choice(COMMANDS), "description": self.sentence(4)}
+            payload: dict = {"stdout": output, "stderr": "", "interrupted": False}
+        elif name == "Grep":
+            tool_input = {"pattern": self.rng.choice(WORDS), "path": "/work/bench-repo/src"}
+            payload = {"mode": "content", "content": output, "numLines": output.count("\n") + 1}
+        elif name in ("Edit", "Write"):
+            tool_input = {"file_path": path, "old_string": self.sentence(6), "new_string": self.sentence(6)}
+            if name == "Write":
+                tool_input = {"file_path": path, "content": output}
+            output = f"The file {path} has been updated."
+            payload = {"filePath": path, "structuredPatch": []}
+        else:
+            tool_input = {"file_path": path}
+            payload = {"type": "text", "file": {"filePath": path, "content": output, "numLines": output.count("\n") + 1}}
+        item = {"type": "tool_use", "id": tool_id, "name": name, "input": tool_input}
+        return item, output, payload | {"toolUseId": tool_id}
+
+    def turn(self, number: int, stats: TranscriptStats) -> Iterator[str]:
+        prompt = f"Turn {number}: {self.paragraph(self.rng.randint(1, 3))}"
+        if self.rng.random() < 0.2:
+            content: object = [{"type": "text", "text": prompt}]
+        else:
+            content = prompt
+        yield self.envelope("user", {"role": "user", "content": content})
+
+        calls = int(self.rng.expovariate(1 / self.shape.tool_calls_per_turn)) if self.shape.tool_calls_per_turn else 0
+        for idx in range(calls):
+            item, output, payload = self.tool_call()
+            parts = [item]
+            if idx == 0 and self.rng.random() < 0.5:
+                parts.insert(0, {"type": "text", "text": self.paragraph(1)})
+            yield self.envelope("assistant", self.assistant_message(parts), requestId=f"req_{self.tool_counter}")
+            result = {"tool_use_id": item["id"], "type": "tool_result", "content": output}
+            line = self.envelope("user", {"role": "user", "content": [result]}, toolUseResult=payload)
+            stats.tool_calls += 1
+            stats.tool_result_bytes += len(line.encode("utf-8")) + 1
+            yield line
+
+        reply = "\n\n".join(self.paragraph(self.rng.randint(1, 4)) for _ in range(self.rng.randint(1, 3)))
+        if self.rng.random() < 0.15:
+            reply += "\n\n```python\ndef handler(event):\n    return event\n```"
+        yield self.envelope("assistant", self.assistant_message([{"type": "text", "text": reply}]))
+
+
+def write_transcript(
+    out,
+    turns: int | None,
+    seed: int = 7,
+    start_turn: int = 0,
+    target_bytes: int | None = None,
+    shape: TranscriptShape | None = None,
+) -> TranscriptStats:
+    """Stream turns to the binary file ``out`` until ``turns`` or ``target_bytes`` is reached."""
+    if turns is None and target_bytes is None:
+        raise ValueError("either turns or target_bytes is required")
+    session = _Session(seed, start_turn, shape or TranscriptShape())
+    stats = TranscriptStats()
+    number = start_turn
+    while (turns is None or stats.turns < turns) and (target_bytes is None or stats.bytes < target_bytes):
+        number += 1
+        for line in session.turn(number, stats):
+            data = line.encode("utf-8") + b"\n"
+            out.write(data)
+            stats.lines += 1
+            stats.bytes += len(data)
+        stats.turns += 1
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help='transcript path, or "-" for stdout')
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--turns", type=int, help="number of user+assistant turns")
+    size.add_argument("--target-size", type=parse_size, help="stop after this many bytes, e.g. 500M or 2G")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start-turn", type=int, default=0, help="number turns after this one (for --append)")
+    parser.add_argument("--append", action="store_true", help="append to --out instead of replacing it")
+    parser.add_argument("--tool-calls-per-turn", type=float, default=TranscriptShape.tool_calls_per_turn)
+    parser.add_argument("--result-bytes", type=int, default=TranscriptShape.result_bytes, help="median tool output size")
+    parser.add_argument("--max-result-bytes", type=int, default=TranscriptShape.max_result_bytes)
+    parser.add_argument("--session-id", default=TranscriptShape.session_id)
+    args = parser.parse_args()
+
+    shape = TranscriptShape(args.tool_calls_per_turn, args.result_bytes, args.max_result_bytes, args.session_id)
+    if args.out == "-":
+        stats = write_transcript(sys.stdout.buffer, args.turns, args.seed, args.start_turn, args.target_size, shape)
+    else:
+        with open(args.out, "ab" if args.append else "wb", buffering=1024 * 1024) as handle:
+            stats = write_transcript(handle, args.turns, args.seed, args.start_turn, args.target_size, shape)
+    json.dump(asdict(stats), sys.stderr)
+    sys.stderr.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,23 +3,116 @@
 from __future__ import annotations
 
 import argparse
+import bisect
 import datetime as dt
+import functools
+import glob
 import hashlib
+import itertools
 import json
 import math
+import mmap
+import os
 import pathlib
+import re
 import sys
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from context_pack_format import PACK_SUFFIX, encode_manifest, encode_pack
+from head_summarizer import SUMMARIZERS, extractive_highlights
+from pack_store import MANIFEST_SUFFIX, ChunkStore
+from segment_summaries import SEGMENT_TURNS, hierarchical_highlights
+from token_estimator import ESTIMATORS, TokenEstimator, get_estimator
 
 
 class UnsupportedError(Exception):
     pass
 
 
+@dataclass
+class TurnStats:
+    """Tool activity of one turn, read from raw line bytes without decoding tool payloads."""
+
+    tool_calls: int = 0
+    tool_result_bytes: int = 0
+    files: list[str] = field(default_factory=list)
+
+    def merge(self, other: TurnStats) -> None:
+        self.tool_calls += other.tool_calls
+        self.tool_result_bytes += other.tool_result_bytes
+        for path in other.files:
+            if len(self.files) >= _MAX_TURN_FILES:
+                break
+            if path not in self.files:
+                self.files.append(path)
+
+
 @dataclass
 class Turn:
     user: str
     assistant: str
+    stats: TurnStats = field(default_factory=TurnStats)
+
+
+# Byte-level sniffing lets the reader skip tool payload lines (usually the
+# largest lines in a transcript) without decoding them. The patterns only ever
+# match real JSON keys: escaped quotes inside string values never do.
+# One pass over the line finds every role and any non-null toolUseResult key.
+_SNIFF_PATTERN = re.compile(rb'"(?:type"\s*:\s*"(user|assistant)"|(toolUseResult)"\s*:\s*(?!null\b))')
+_LIST_CONTENT_PATTERN = re.compile(rb'"content"\s*:\s*\[')
+_TEXT_MARKER = b'"text"'
+_TOOL_USE_MARKER = b'"tool_use"'
+_TOOL_USE_PATTERN = re.compile(rb'"type"\s*:\s*"tool_use"')
+_FILE_PATH_PATTERN = re.compile(rb'"(?:file_path|notebook_path)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_MAX_TURN_FILES = 32
+
+TURN_INDEX_VERSION = 3
+_FINGERPRINT_MAX_BYTES = 64 * 1024
+
+
+@dataclass
+class TurnRecord:
+    start: int
+    end: int
+    user_chars: int
+    assistant_chars: int
+    user_head: str
+    assistant_head: str
+    stats: TurnStats = field(default_factory=TurnStats)
+    digest: str = ""
+
+    @classmethod
+    def from_turn(cls, start: int, end: int, turn: Turn) -> TurnRecord:
+        return cls(
+            start=start,
+            end=end,
+            user_chars=len(turn.user),
+            assistant_chars=len(turn.assistant),
+            user_head=_first_line(turn.user),
+            assistant_head=_first_line(turn.assistant),
+            stats=turn.stats,
+            digest=_turn_digest(turn),
+        )
+
+
+@dataclass
+class TurnIndex:
+    """Sidecar index of closed turns; transcripts only grow by appending."""
+
+    transcript_path: str
+    inode: int
+    first_line_sha256: str
+    consumed_offset: int = 0
+    turns: list[TurnRecord] = field(default_factory=list)
+
+
+# Parsed turn indexes kept warm for long-lived callers (the resident daemon).
+# Entries are keyed by the index file's stat, so a write from another process
+# invalidates them.
+TURN_INDEX_CACHE: dict[pathlib.Path, tuple[tuple[int, int], TurnIndex]] = {}
 
 
 def _normalize_text(value: str) -> str:
@@ -27,6 +120,11 @@ def _normalize_text(value: str) -> str:
     return "\n".join(lines).strip()
 
 
+def _turn_digest(turn: Turn) -> str:
+    """Short content hash of a turn's text; segment summaries are cached by it."""
+    return hashlib.sha256(f"{turn.user}\0{turn.assistant}".encode("utf-8")).hexdigest()[:16]
+
+
 def _first_line(value: str, max_len: int = 180) -> str:
     for line in value.splitlines():
         line = line.strip()
@@ -91,61 +189,510 @@ def _extract_assistant_text(entry: dict) -> str | None:
     return "\n\n".join(parts).strip()
 
 
-def _load_turns(transcript_path: pathlib.Path) -> list[Turn]:
-    turns: list[Turn] = []
+def _decode_json_string(value: bytes) -> str:
+    try:
+        if b"\\" not in value:
+            return value.decode("utf-8")
+        return json.loads(b'"' + value + b'"')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return ""
+
+
+def _sniff_line(raw: bytes) -> tuple[bool, TurnStats | None]:
+    """Classify a raw line without decoding it.
+
+    Returns whether the line may contribute user/assistant text (False only when
+    it cannot) and its tool activity: the size of a tool result line, or the
+    tool calls and file paths of an assistant line.
+    """
+    matches = _SNIFF_PATTERN.findall(raw)
+    roles = {role for role, _ in matches if role}
+    if not roles:
+        return False, None
+    if b"user" in roles:
+        # A non-null toolUseResult next to list content marks a tool result line.
+        is_tool_result = any(key for _, key in matches) and _LIST_CONTENT_PATTERN.search(raw)
+        if not is_tool_result:
+            return True, None
+        if b"assistant" not in roles:
+            return False, TurnStats(tool_result_bytes=len(raw))
+    if b"assistant" not in roles:
+        return False, None
+
+    activity = None
+    if _TOOL_USE_MARKER in raw:
+        calls = len(_TOOL_USE_PATTERN.findall(raw))
+        if calls:
+            paths = (_decode_json_string(match[1]) for match in _FILE_PATH_PATTERN.finditer(raw))
+            activity = TurnStats(tool_calls=calls, files=list(dict.fromkeys(path for path in paths if path)))
+    return _TEXT_MARKER in raw, activity
+
+
+def _decode_entry(raw: bytes) -> tuple[dict | None, TurnStats | None]:
+    """Decode a raw line only when it may carry turn text; tool activity comes from the sniff."""
+    raw = raw.strip()
+    if not raw:
+        return None, None
+    may_carry_text, activity = _sniff_line(raw)
+    if not may_carry_text:
+        return None, activity
+    try:
+        entry = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, activity
+    return (entry if isinstance(entry, dict) else None), activity
+
+
+def _iter_lines(handle: BinaryIO, start: int = 0, end: int | None = None) -> Iterator[tuple[int, bytes]]:
+    handle.seek(start)
+    offset = start
+    for raw in handle:
+        if end is not None and offset >= end:
+            return
+        yield offset, raw
+        offset += len(raw)
 
+
+def _scan_turns(handle: BinaryIO, start: int = 0, end: int | None = None) -> Iterator[tuple[int, Turn]]:
+    """Yield (byte offset of the opening user line, turn) for each complete turn."""
     current_user: str | None = None
+    current_offset = start
+    current_stats = TurnStats()
     assistant_parts: list[str] = []
 
-    with transcript_path.open("r", encoding="utf-8") as handle:
-        for raw in handle:
-            raw = raw.strip()
-            if not raw:
-                continue
-            try:
-                entry = json.loads(raw)
-            except json.JSONDecodeError:
-                continue
+    for offset, raw in _iter_lines(handle, start, end):
+        entry, activity = _decode_entry(raw)
+        user_text = _extract_user_text(entry) if entry is not None else None
+        if user_text:
+            if current_user and assistant_parts:
+                yield current_offset, Turn(current_user, "\n\n".join(assistant_parts).strip(), current_stats)
+            current_user = user_text
+            current_offset = offset
+            current_stats = TurnStats()
+            assistant_parts = []
+        elif entry is not None:
+            assistant_text = _extract_assistant_text(entry)
+            if assistant_text and current_user:
+                assistant_parts.append(assistant_text)
+
+        # Tool lines belong to the turn opened by the latest user text line.
+        if activity is not None and current_user:
+            current_stats.merge(activity)
+
+    if current_user and assistant_parts:
+        yield current_offset, Turn(current_user, "\n\n".join(assistant_parts).strip(), current_stats)
+
+
+def _collect_turn_stats(handle: BinaryIO) -> list[TurnStats]:
+    """Forward counting pass; only each turn's tool stats are kept, not its text."""
+    return [turn.stats for _, turn in _scan_turns(handle)]
+
+
+def _iter_head_highlights(handle: BinaryIO, head_count: int) -> Iterator[tuple[str, str, TurnStats]]:
+    for _, turn in itertools.islice(_scan_turns(handle), head_count):
+        yield _first_line(turn.user), _first_line(turn.assistant), turn.stats
+
+
+def _iter_lines_reverse(buffer: mmap.mmap) -> Iterator[bytes]:
+    """Yield raw lines from EOF backward without reading the rest of the file."""
+    end = len(buffer)
+    while end > 0:
+        start = buffer.rfind(b"\n", 0, end - 1) + 1
+        yield buffer[start:end]
+        end = start
+
+
+def _scan_turns_reverse(buffer: mmap.mmap) -> Iterator[Turn]:
+    """Yield complete turns newest first, matching the grouping of _scan_turns."""
+    assistant_parts: list[str] = []
+
+    for raw in _iter_lines_reverse(buffer):
+        entry, _ = _decode_entry(raw)
+        if entry is None:
+            continue
+
+        user_text = _extract_user_text(entry)
+        if user_text:
+            if assistant_parts:
+                assistant_parts.reverse()
+                yield Turn(user=user_text, assistant="\n\n".join(assistant_parts).strip())
+            assistant_parts = []
+            continue
+
+        assistant_text = _extract_assistant_text(entry)
+        if assistant_text:
+            assistant_parts.append(assistant_text)
 
-            user_text = _extract_user_text(entry)
-            if user_text:
-                if current_user and assistant_parts:
-                    turns.append(Turn(user=current_user, assistant="\n\n".join(assistant_parts).strip()))
-                current_user = user_text
-                assistant_parts = []
-                continue
 
+def _load_tail_window(
+    buffer: mmap.mmap,
+    total_turns: int,
+    kept_turns: int,
+    max_tail_chars: int,
+    max_tail_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+) -> tuple[list[Turn], int, bool]:
+    """Walk back from EOF, keeping the newest tail turns that fit maxTailChars (and maxTailTokens).
+
+    Returns (kept turns oldest first, turn number of the first kept turn, whether older tail turns were dropped).
+    """
+    window: list[Turn] = []
+    window_chars = 0
+    window_tokens = 0
+
+    for turn in itertools.islice(_scan_turns_reverse(buffer), kept_turns):
+        block = _render_turn_block(turn, total_turns - len(window))
+        if window_chars + len(block) + len(window) > max_tail_chars:
+            break
+        if max_tail_tokens is not None and estimator is not None:
+            block_tokens = estimator.count(block)
+            if window_tokens + block_tokens + len(window) > max_tail_tokens:
+                break
+            window_tokens += block_tokens
+        window.append(turn)
+        window_chars += len(block)
+
+    window.reverse()
+    return window, total_turns - len(window) + 1, len(window) < kept_turns
+
+
+def _scan_turn_records(handle: BinaryIO, start: int) -> tuple[list[TurnRecord], tuple[TurnRecord, Turn] | None, int]:
+    """Index complete turns from ``start``.
+
+    Returns the closed turns, the last turn if it is still open (later lines may
+    add assistant text to it) and the offset the next incremental scan resumes at.
+    """
+    closed: list[TurnRecord] = []
+    current_user: str | None = None
+    current_start = start
+    current_end = start
+    current_stats = TurnStats()
+    complete_end = start
+    assistant_parts: list[str] = []
+
+    for offset, raw in _iter_lines(handle, start):
+        if raw.endswith(b"\n"):
+            complete_end = offset + len(raw)
+
+        entry, activity = _decode_entry(raw)
+        user_text = _extract_user_text(entry) if entry is not None else None
+        if user_text:
+            if current_user and assistant_parts:
+                turn = Turn(current_user, "\n\n".join(assistant_parts).strip(), current_stats)
+                closed.append(TurnRecord.from_turn(current_start, current_end, turn))
+            current_user = user_text
+            current_start = offset
+            current_stats = TurnStats()
+            assistant_parts = []
+        elif entry is not None:
             assistant_text = _extract_assistant_text(entry)
             if assistant_text and current_user:
                 assistant_parts.append(assistant_text)
+                current_end = offset + len(raw)
 
+        if activity is not None and current_user:
+            current_stats.merge(activity)
+
+    open_turn = None
     if current_user and assistant_parts:
-        turns.append(Turn(user=current_user, assistant="\n\n".join(assistant_parts).strip()))
+        turn = Turn(current_user, "\n\n".join(assistant_parts).strip(), current_stats)
+        open_turn = (TurnRecord.from_turn(current_start, current_end, turn), turn)
+
+    resume_offset = current_start if current_user else complete_end
+    return closed, open_turn, resume_offset
+
 
-    return turns
+def _transcript_fingerprint(handle: BinaryIO) -> str:
+    handle.seek(0)
+    return hashlib.sha256(handle.readline(_FINGERPRINT_MAX_BYTES)).hexdigest()
 
 
-def _render_head_summary(head_turns: list[Turn], percent: int, total_turns: int, compacted_turns: int, focus: str, max_chars: int) -> str:
-    lines: list[str] = [
-        f"Front compaction summary ({percent}%): compacted {compacted_turns}/{total_turns} turns.",
-    ]
+def _load_turn_index(index_path: pathlib.Path) -> TurnIndex | None:
+    try:
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+        if data.get("version") != TURN_INDEX_VERSION:
+            return None
+        columns = data["turns"]
+        turns = [
+            TurnRecord(*row, stats=TurnStats(tool_calls, tool_result_bytes, list(files)), digest=digest)
+            for *row, tool_calls, tool_result_bytes, files, digest in zip(
+                columns["start"],
+                columns["end"],
+                columns["userChars"],
+                columns["assistantChars"],
+                columns["userHead"],
+                columns["assistantHead"],
+                columns["toolCalls"],
+                columns["toolResultBytes"],
+                columns["files"],
+                columns["digest"],
+                strict=True,
+            )
+        ]
+        return TurnIndex(
+            transcript_path=data["transcriptPath"],
+            inode=data["inode"],
+            first_line_sha256=data["firstLineSha256"],
+            consumed_offset=data["consumedOffset"],
+            turns=turns,
+        )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _save_turn_index(index_path: pathlib.Path, index: TurnIndex) -> None:
+    payload = {
+        "version": TURN_INDEX_VERSION,
+        "transcriptPath": index.transcript_path,
+        "inode": index.inode,
+        "firstLineSha256": index.first_line_sha256,
+        "consumedOffset": index.consumed_offset,
+        "turns": {
+            "start": [turn.start for turn in index.turns],
+            "end": [turn.end for turn in index.turns],
+            "userChars": [turn.user_chars for turn in index.turns],
+            "assistantChars": [turn.assistant_chars for turn in index.turns],
+            "userHead": [turn.user_head for turn in index.turns],
+            "assistantHead": [turn.assistant_head for turn in index.turns],
+            "toolCalls": [turn.stats.tool_calls for turn in index.turns],
+            "toolResultBytes": [turn.stats.tool_result_bytes for turn in index.turns],
+            "files": [turn.stats.files for turn in index.turns],
+            "digest": [turn.digest for turn in index.turns],
+        },
+    }
+    tmp_path = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, index_path)
+    except OSError:
+        # The index is only a cache; a failed write just means a full scan next time.
+        tmp_path.unlink(missing_ok=True)
+
+
+def _index_file_stamp(index_path: pathlib.Path) -> tuple[int, int] | None:
+    try:
+        stat = index_path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _update_turn_index(
+    handle: BinaryIO,
+    transcript_path: pathlib.Path,
+    index_path: pathlib.Path,
+) -> tuple[list[TurnRecord], tuple[TurnRecord, Turn] | None]:
+    """Bring the sidecar index up to date, parsing only bytes appended since the last run.
+
+    Returns every complete turn record (closed turns plus the open last turn, if any)
+    and the open last turn with its text.
+    """
+    stat = os.fstat(handle.fileno())
+    fingerprint = _transcript_fingerprint(handle)
+
+    cached = TURN_INDEX_CACHE.get(index_path)
+    stamp = _index_file_stamp(index_path)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        index: TurnIndex | None = cached[1]
+    else:
+        index = _load_turn_index(index_path)
+    if (
+        index is None
+        or index.transcript_path != str(transcript_path)
+        or index.inode != stat.st_ino
+        or index.first_line_sha256 != fingerprint
+        or index.consumed_offset > stat.st_size
+    ):
+        index = TurnIndex(transcript_path=str(transcript_path), inode=stat.st_ino, first_line_sha256=fingerprint)
+        stamp = None
+
+    closed, open_turn, resume_offset = _scan_turn_records(handle, index.consumed_offset)
+    # Nothing new to record: leave the file alone rather than rewrite every turn.
+    unchanged = stamp is not None and not closed and resume_offset == index.consumed_offset
+    index.turns.extend(closed)
+    index.consumed_offset = resume_offset
+    if not unchanged:
+        _save_turn_index(index_path, index)
+        stamp = _index_file_stamp(index_path)
+    if stamp is not None:
+        TURN_INDEX_CACHE[index_path] = (stamp, index)
+
+    records = list(index.turns)
+    if open_turn is not None:
+        records.append(open_turn[0])
+    return records, open_turn
+
+
+def _read_turn(handle: BinaryIO, record: TurnRecord) -> Turn:
+    for _, turn in _scan_turns(handle, record.start, record.end):
+        return turn
+    raise UnsupportedError(f"turn index is stale: no turn at byte offset {record.start}")
+
+
+def _indexed_turn_loader(handle: BinaryIO, records: list[TurnRecord]):
+    """load_turns() for hierarchical summaries: decode records[first:first + count] in one range scan."""
+
+    def load_turns(first: int, count: int) -> list[tuple[str, str]]:
+        start, end = records[first].start, records[first + count - 1].end
+        turns = [(turn.user, turn.assistant) for _, turn in _scan_turns(handle, start, end)]
+        if len(turns) != count:
+            raise UnsupportedError(f"turn index is stale: expected {count} turns at byte offset {start}")
+        return turns
+
+    return load_turns
+
+
+def _segment_cache_path(index_path: pathlib.Path) -> pathlib.Path:
+    stem = index_path.name.removesuffix(".json").removesuffix(".turn-index")
+    return index_path.with_name(f"{stem}.segments.json")
+
+
+def _load_indexed_tail_window(
+    handle: BinaryIO,
+    records: list[TurnRecord],
+    open_turn: tuple[TurnRecord, Turn] | None,
+    kept_turns: int,
+    max_tail_chars: int,
+    max_tail_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+) -> tuple[list[Turn], int, bool]:
+    """Pick the newest tail turns that fit maxTailChars from indexed lengths, decoding only those.
+
+    A token budget needs the text, so each candidate is decoded before its token check;
+    at most one turn beyond the kept ones is decoded.
+    """
+    total_turns = len(records)
+    window: list[Turn] = []
+    window_chars = 0
+    window_tokens = 0
+
+    while len(window) < kept_turns:
+        number = total_turns - len(window)
+        record = records[number - 1]
+        block_chars = _turn_block_chars(record, number)
+        if window_chars + block_chars + len(window) > max_tail_chars:
+            break
+        if open_turn is not None and record is open_turn[0]:
+            turn = open_turn[1]
+        else:
+            turn = _read_turn(handle, record)
+        if max_tail_tokens is not None and estimator is not None:
+            block_tokens = estimator.count(_render_turn_block(turn, number))
+            if window_tokens + block_tokens + len(window) > max_tail_tokens:
+                break
+            window_tokens += block_tokens
+        window.append(turn)
+        window_chars += block_chars
+
+    window.reverse()
+    return window, total_turns - len(window) + 1, len(window) < kept_turns
+
+
+def _aggregate_stats(turn_stats: Iterable[TurnStats]) -> TurnStats:
+    total = TurnStats()
+    files: dict[str, None] = {}
+    for stats in turn_stats:
+        total.tool_calls += stats.tool_calls
+        total.tool_result_bytes += stats.tool_result_bytes
+        files.update(dict.fromkeys(stats.files))
+    total.files = list(files)
+    return total
+
+
+def _describe_stats(stats: TurnStats, max_files: int = 3) -> str:
+    """One-line digest of tool activity, or "" when the turns used no tools."""
+    parts = []
+    if stats.tool_calls:
+        parts.append(f"{stats.tool_calls} tool call{'' if stats.tool_calls == 1 else 's'}")
+    if stats.tool_result_bytes:
+        parts.append(f"{stats.tool_result_bytes / 1024:.1f} KB tool output")
+    if stats.files:
+        listed = ", ".join(stats.files[:max_files])
+        more = len(stats.files) - max_files
+        parts.append(f"files: {listed}" + (f" +{more} more" if more > 0 else ""))
+    return "; ".join(parts)
+
+
+def _tool_activity(turn_stats: list[TurnStats]) -> dict:
+    total = _aggregate_stats(turn_stats)
+    return {
+        "toolCalls": total.tool_calls,
+        "toolResultBytes": total.tool_result_bytes,
+        "filesTouched": total.files,
+    }
+
+
+def _summary_header(
+    percent: int,
+    total_turns: int,
+    compacted_turns: int,
+    focus: str,
+    head_stats: TurnStats | None = None,
+) -> list[str]:
+    lines = [f"Front compaction summary ({percent}%): compacted {compacted_turns}/{total_turns} turns."]
     if focus:
         lines.append(f"Focus: {focus}")
+    activity = _describe_stats(head_stats, max_files=8) if head_stats is not None else ""
+    if activity:
+        lines.append(f"Head tool activity: {activity}")
     lines.append("Compacted head highlights:")
+    return lines
 
-    for idx, turn in enumerate(head_turns, start=1):
-        user_line = _first_line(turn.user)
-        assistant_line = _first_line(turn.assistant)
-        lines.append(f"- Turn {idx} user: {user_line}")
-        lines.append(f"  Turn {idx} assistant: {assistant_line}")
 
-    summary = "\n".join(lines).strip()
-    if len(summary) <= max_chars:
-        return summary
+def _first_line_highlights(highlights: Iterable[tuple[str, str, TurnStats]]) -> Iterator[str]:
+    for idx, (user_line, assistant_line, stats) in enumerate(highlights, start=1):
+        yield f"- Turn {idx} user: {user_line}"
+        activity = _describe_stats(stats)
+        yield f"  Turn {idx} assistant: {assistant_line}" + (f" [{activity}]" if activity else "")
+
+
+def _render_head_summary(
+    highlight_lines: Iterable[str],
+    percent: int,
+    total_turns: int,
+    compacted_turns: int,
+    focus: str,
+    max_chars: int,
+    max_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+    head_stats: TurnStats | None = None,
+) -> str:
+    lines = _summary_header(percent, total_turns, compacted_turns, focus, head_stats)
+    summary_chars = len("\n".join(lines))
+
+    for line in highlight_lines:
+        lines.append(line)
+        summary_chars += len(line) + 1
+        # Stop reading the head once the truncation below is guaranteed to
+        # cut everything that follows.
+        if summary_chars - len(line) - 1 > max_chars:
+            break
 
-    suffix = "\n_summary truncated to fit maxHeadChars_"
-    allowed = max(0, max_chars - len(suffix))
-    return summary[:allowed].rstrip() + suffix
+    summary = "\n".join(lines).strip()
+    if len(summary) > max_chars:
+        suffix = "\n_summary truncated to fit maxHeadChars_"
+        allowed = max(0, max_chars - len(suffix))
+        summary = summary[:allowed].rstrip() + suffix
+
+    if max_tokens is not None and estimator is not None and estimator.count(summary) > max_tokens:
+        summary = _fit_summary_to_tokens(summary, max_tokens, estimator)
+    return summary
+
+
+def _fit_summary_to_tokens(summary: str, max_tokens: int, estimator: TokenEstimator) -> str:
+    """Keep whole leading summary lines within max_tokens, then append a truncation marker."""
+    marker = "_summary truncated to fit maxHeadTokens_"
+    # Every kept line is followed by one newline token, the last one before the marker.
+    budget = max_tokens - estimator.count(marker)
+    kept: list[str] = []
+    used = 0
+    for line in summary.split("\n"):
+        cost = estimator.count(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join([*kept, marker])
 
 
 def _render_turn_block(turn: Turn, turn_number: int) -> str:
@@ -156,19 +703,19 @@ def _render_turn_block(turn: Turn, turn_number: int) -> str:
     )
 
 
-def _build_tail_content(tail_turns: list[Turn], compacted_turns: int, max_tail_chars: int) -> tuple[str, int, bool]:
-    blocks = [_render_turn_block(turn, compacted_turns + idx + 1) for idx, turn in enumerate(tail_turns)]
-    truncated = False
+def _turn_block_chars(record: TurnRecord, turn_number: int) -> int:
+    return len(_render_turn_block(Turn(user="", assistant=""), turn_number)) + record.user_chars + record.assistant_chars
 
-    while blocks and len("\n".join(blocks)) > max_tail_chars:
-        blocks.pop(0)
-        truncated = True
 
-    if not blocks:
-        raise UnsupportedError("tail replay became empty after applying maxTailChars limit")
+def _select_tail_start(block_chars: list[int], max_chars: int) -> int:
+    """Return how many of the oldest blocks to drop so that "\n".join(kept) fits max_chars.
 
-    content = "\n".join(blocks).strip()
-    return content, len(blocks), truncated
+    With cut[k] = chars of blocks[:k] plus their k separators, the joined length of
+    blocks[k:] is cut[n] - 1 - cut[k]. cut is strictly increasing, so the smallest
+    fitting k is a single bisect. A result of len(block_chars) means nothing fits.
+    """
+    cut = [0, *itertools.accumulate(chars + 1 for chars in block_chars)]
+    return min(bisect.bisect_left(cut, cut[-1] - 1 - max_chars), len(block_chars))
 
 
 def _build_replay(summary: str, tail_raw: str) -> str:
@@ -183,38 +730,48 @@ def _build_replay(summary: str, tail_raw: str) -> str:
 
 def _truncate_replay_to_cap(
     tail_turns: list[Turn],
-    compacted_turns: int,
+    first_turn_number: int,
     summary: str,
     max_tail_chars: int,
     max_replay_chars: int,
+    already_truncated: bool = False,
+    max_tail_tokens: int | None = None,
+    max_replay_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
 ) -> tuple[str, str, int, bool]:
-    tail_content, tail_count, truncated = _build_tail_content(tail_turns, compacted_turns, max_tail_chars)
-    replay = _build_replay(summary, tail_content)
-
-    if len(replay) <= max_replay_chars:
-        return replay, tail_content, tail_count, truncated
-
-    blocks = [_render_turn_block(turn, compacted_turns + idx + 1) for idx, turn in enumerate(tail_turns)]
-    dropped = False
+    blocks = [_render_turn_block(turn, first_turn_number + idx) for idx, turn in enumerate(tail_turns)]
+    block_chars = [len(block) for block in blocks]
 
-    while blocks and len(_build_replay(summary, "\n".join(blocks).strip())) > max_replay_chars:
-        blocks.pop(0)
-        dropped = True
+    start = _select_tail_start(block_chars, max_tail_chars)
+    if start == len(blocks):
+        raise UnsupportedError("tail replay became empty after applying maxTailChars limit")
 
-    if not blocks:
+    # The replay embeds the stripped tail; only the newest block's trailing newline is stripped.
+    replay_overhead = len(_build_replay(summary, ""))
+    trailing_chars = len(blocks[-1]) - len(blocks[-1].rstrip())
+    replay_start = _select_tail_start(block_chars, max_replay_chars - replay_overhead + trailing_chars)
+    if replay_start == len(blocks):
         raise UnsupportedError("replay payload exceeds maxReplayChars with no tail turns left")
-
-    tail_content = "\n".join(blocks).strip()
+    start = max(start, replay_start)
+
+    if estimator is not None and (max_tail_tokens is not None or max_replay_tokens is not None):
+        # Newlines are single-token pieces, so token costs combine exactly like char costs.
+        block_tokens = [estimator.count(block) for block in blocks]
+        if max_tail_tokens is not None:
+            start = max(start, _select_tail_start(block_tokens, max_tail_tokens))
+            if start == len(blocks):
+                raise UnsupportedError("tail replay became empty after applying maxTailTokens limit")
+        if max_replay_tokens is not None:
+            token_overhead = estimator.count(_build_replay(summary, ""))
+            trailing_tokens = block_tokens[-1] - estimator.count(blocks[-1].rstrip())
+            start = max(start, _select_tail_start(block_tokens, max_replay_tokens - token_overhead + trailing_tokens))
+            if start == len(blocks):
+                raise UnsupportedError("replay payload exceeds maxReplayTokens with no tail turns left")
+
+    tail_content = "\n".join(blocks[start:]).strip()
     replay = _build_replay(summary, tail_content)
 
-    if len(replay) > max_replay_chars:
-        marker = "\n_tail replay truncated to fit maxReplayChars_"
-        allowed = max(0, max_replay_chars - len(marker))
-        replay = replay[:allowed].rstrip() + marker
-        tail_content = tail_content[: max(0, max_tail_chars - len(marker))].rstrip() + marker
-        dropped = True
-
-    return replay, tail_content, len(blocks), (truncated or dropped)
+    return replay, tail_content, len(blocks) - start, (already_truncated or start > 0)
 
 
 def build_context_pack(args: argparse.Namespace) -> dict:
@@ -222,40 +779,125 @@ def build_context_pack(args: argparse.Namespace) -> dict:
     if not transcript_path.is_file():
         raise UnsupportedError(f"transcript file not found: {transcript_path}")
 
-    turns = _load_turns(transcript_path)
-    total_turns = len(turns)
-
-    if total_turns < 4:
-        raise UnsupportedError(
-            f"front compaction at {args.percent}% requires at least 4 complete user+assistant turns"
-        )
-
-    compacted_turns = math.floor((total_turns * args.percent) / 100)
-    kept_turns = total_turns - compacted_turns
-
-    if compacted_turns < 1 or kept_turns < 1:
-        raise UnsupportedError(
-            f"front compaction at {args.percent}% could not compute a safe head/tail boundary"
+    index_path = pathlib.Path(args.index_path) if args.index_path else None
+    try:
+        estimator = get_estimator(args.token_estimator)
+    except ValueError as exc:
+        raise UnsupportedError(str(exc)) from exc
+
+    with transcript_path.open("rb") as handle:
+        records: list[TurnRecord] = []
+        open_turn: tuple[TurnRecord, Turn] | None = None
+        if index_path is not None:
+            records, open_turn = _update_turn_index(handle, transcript_path, index_path)
+            turn_stats = [record.stats for record in records]
+        else:
+            turn_stats = _collect_turn_stats(handle)
+        total_turns = len(turn_stats)
+
+        if total_turns < 4:
+            raise UnsupportedError(
+                f"front compaction at {args.percent}% requires at least 4 complete user+assistant turns"
+            )
+
+        compacted_turns = math.floor((total_turns * args.percent) / 100)
+        kept_turns = total_turns - compacted_turns
+
+        if compacted_turns < 1 or kept_turns < 1:
+            raise UnsupportedError(
+                f"front compaction at {args.percent}% could not compute a safe head/tail boundary"
+            )
+
+        head_stats = _aggregate_stats(turn_stats[:compacted_turns])
+        segment_stats = None
+        if args.summarizer == "hierarchical":
+            header = "\n".join(_summary_header(args.percent, total_turns, compacted_turns, args.focus, head_stats))
+            if index_path is not None:
+                digests = [record.digest for record in records[:compacted_turns]]
+                load_turns = _indexed_turn_loader(handle, records)
+                cache_path: pathlib.Path | None = _segment_cache_path(index_path)
+            else:
+                head = [turn for _, turn in itertools.islice(_scan_turns(handle), compacted_turns)]
+                digests = [_turn_digest(turn) for turn in head]
+
+                def load_turns(first: int, count: int) -> list[tuple[str, str]]:
+                    return [(turn.user, turn.assistant) for turn in head[first : first + count]]
+
+                cache_path = None
+            highlight_lines, segment_stats = hierarchical_highlights(
+                digests,
+                load_turns,
+                focus=args.focus,
+                max_chars=args.max_head_chars - len(header),
+                max_tokens=(
+                    args.max_head_tokens - estimator.count(header) if args.max_head_tokens is not None else None
+                ),
+                estimator=estimator,
+                cache_path=cache_path,
+                segment_turns=args.segment_turns,
+            )
+        elif args.summarizer == "extractive":
+            header = "\n".join(_summary_header(args.percent, total_turns, compacted_turns, args.focus, head_stats))
+            head_turns = itertools.islice(_scan_turns(handle), compacted_turns)
+            highlight_lines: Iterable[str] = extractive_highlights(
+                ((turn.user, turn.assistant) for _, turn in head_turns),
+                focus=args.focus,
+                max_chars=args.max_head_chars - len(header),
+                max_tokens=(
+                    args.max_head_tokens - estimator.count(header) if args.max_head_tokens is not None else None
+                ),
+                estimator=estimator,
+            )
+        elif index_path is not None:
+            highlight_lines = _first_line_highlights(
+                (record.user_head, record.assistant_head, record.stats) for record in records[:compacted_turns]
+            )
+        else:
+            highlight_lines = _first_line_highlights(_iter_head_highlights(handle, compacted_turns))
+
+        summary = _render_head_summary(
+            highlight_lines=highlight_lines,
+            percent=args.percent,
+            total_turns=total_turns,
+            compacted_turns=compacted_turns,
+            focus=args.focus,
+            max_chars=args.max_head_chars,
+            max_tokens=args.max_head_tokens,
+            estimator=estimator,
+            head_stats=head_stats,
         )
 
-    head_turns = turns[:compacted_turns]
-    tail_turns = turns[compacted_turns:]
-
-    summary = _render_head_summary(
-        head_turns=head_turns,
-        percent=args.percent,
-        total_turns=total_turns,
-        compacted_turns=compacted_turns,
-        focus=args.focus,
-        max_chars=args.max_head_chars,
-    )
+        if index_path is not None:
+            tail_turns, first_tail_number, window_truncated = _load_indexed_tail_window(
+                handle,
+                records,
+                open_turn,
+                kept_turns=kept_turns,
+                max_tail_chars=args.max_tail_chars,
+                max_tail_tokens=args.max_tail_tokens,
+                estimator=estimator,
+            )
+        else:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                tail_turns, first_tail_number, window_truncated = _load_tail_window(
+                    buffer,
+                    total_turns=total_turns,
+                    kept_turns=kept_turns,
+                    max_tail_chars=args.max_tail_chars,
+                    max_tail_tokens=args.max_tail_tokens,
+                    estimator=estimator,
+                )
 
     replay, tail_raw_content, tail_count, tail_truncated = _truncate_replay_to_cap(
         tail_turns=tail_turns,
-        compacted_turns=compacted_turns,
+        first_turn_number=first_tail_number,
         summary=summary,
         max_tail_chars=args.max_tail_chars,
         max_replay_chars=args.max_replay_chars,
+        already_truncated=window_truncated,
+        max_tail_tokens=args.max_tail_tokens,
+        max_replay_tokens=args.max_replay_tokens,
+        estimator=estimator,
     )
 
     digest = hashlib.sha256(replay.encode("utf-8")).hexdigest()
@@ -277,57 +919,250 @@ def build_context_pack(args: argparse.Namespace) -> dict:
         },
         "headSummary": {
             "format": "markdown",
+            "summarizer": args.summarizer,
             "content": summary,
             "charCount": len(summary),
+            "tokenCount": estimator.count(summary),
         },
         "tailRaw": {
             "format": "markdown",
             "turnCount": tail_count,
             "content": tail_raw_content,
             "charCount": len(tail_raw_content),
+            "tokenCount": estimator.count(tail_raw_content),
             "truncated": tail_truncated,
         },
         "replay": {
             "format": "markdown",
             "content": replay,
             "charCount": len(replay),
+            "tokenCount": estimator.count(replay),
+        },
+        "toolActivity": {
+            "head": _tool_activity(turn_stats[:compacted_turns]),
+            "tail": _tool_activity(turn_stats[compacted_turns:]),
+            "turns": {
+                "toolCalls": [stats.tool_calls for stats in turn_stats],
+                "toolResultBytes": [stats.tool_result_bytes for stats in turn_stats],
+                "files": [stats.files for stats in turn_stats],
+            },
         },
         "limits": {
             "maxHeadChars": args.max_head_chars,
             "maxTailChars": args.max_tail_chars,
             "maxReplayChars": args.max_replay_chars,
+            "maxHeadTokens": args.max_head_tokens,
+            "maxTailTokens": args.max_tail_tokens,
+            "maxReplayTokens": args.max_replay_tokens,
+            "tokenEstimator": estimator.name,
         },
         "integrity": {
             "sha256": digest,
             "valid": True,
         },
     }
+    if segment_stats is not None:
+        pack["headSummary"]["segments"] = {"segmentTurns": args.segment_turns, **segment_stats.as_dict()}
 
     return pack
 
 
+def _collect_sessions(args: argparse.Namespace) -> dict[str, str]:
+    """Map session id -> transcript path from --session-id/--transcript-path, --session and --projects-glob."""
+    sessions: dict[str, str] = {}
+    if args.session_id and args.transcript_path:
+        sessions[args.session_id] = args.transcript_path
+
+    for item in args.session:
+        session_id, sep, transcript_path = item.partition("=")
+        if not sep or not session_id or not transcript_path:
+            raise UnsupportedError(f"--session expects SESSION_ID=TRANSCRIPT_PATH, got: {item}")
+        sessions[session_id] = transcript_path
+
+    if args.projects_glob:
+        # Explicit sessions win; among globbed duplicates the newest transcript wins.
+        globbed: dict[str, str] = {}
+        for path in sorted(glob.glob(os.path.expanduser(args.projects_glob)), key=os.path.getmtime):
+            globbed[pathlib.Path(path).stem] = path
+        for session_id, transcript_path in globbed.items():
+            sessions.setdefault(session_id, transcript_path)
+
+    return sessions
+
+
+PACK_FORMAT_SUFFIXES = {"1": ".json", "2": PACK_SUFFIX, "3": MANIFEST_SUFFIX}
+
+
+def encode_pack_bytes(pack: dict, pack_format: str = "1", pack_dir: pathlib.Path | None = None) -> bytes:
+    if pack_format == "2":
+        return encode_pack(pack)
+    if pack_format == "3":
+        if pack_dir is None:
+            raise UnsupportedError("pack format 3 stores chunks next to its manifest and needs --pack-dir")
+        return encode_manifest(pack, ChunkStore.for_pack_dir(pack_dir))
+    return (json.dumps(pack, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def write_pack_files(
+    pack: dict,
+    pack_dir: pathlib.Path,
+    session_id: str,
+    pack_format: str = "1",
+) -> tuple[pathlib.Path, pathlib.Path]:
+    """Write <session>-<ts>.<ext> and repoint latest-<session>.<ext>, both via rename so readers never see partial files."""
+    suffix = PACK_FORMAT_SUFFIXES[pack_format]
+    ts = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    pack_path = pack_dir / f"{session_id}-{ts}{suffix}"
+    tmp_path = pack_dir / f".{pack_path.name}.{os.getpid()}.tmp"
+    tmp_path.write_bytes(encode_pack_bytes(pack, pack_format, pack_dir))
+    os.replace(tmp_path, pack_path)
+
+    latest_path = pack_dir / f"latest-{session_id}{suffix}"
+    tmp_link = pack_dir / f".{latest_path.name}.{os.getpid()}.tmp"
+    tmp_link.unlink(missing_ok=True)
+    # Relative to the link's own directory, so it resolves whatever the caller's cwd.
+    os.symlink(pack_path.name, tmp_link)
+    os.replace(tmp_link, latest_path)
+    return pack_path, latest_path
+
+
+def _build_session_pack(args: argparse.Namespace, session: tuple[str, str]) -> dict:
+    """Pool worker: build and write one session's pack, returning its summary row."""
+    session_id, transcript_path = session
+    index_path = args.index_path
+    if args.index_dir:
+        index_path = str(pathlib.Path(args.index_dir) / f"{session_id}.turn-index.json")
+    job_args = argparse.Namespace(
+        **{**vars(args), "session_id": session_id, "transcript_path": transcript_path, "index_path": index_path}
+    )
+
+    row: dict = {"sessionId": session_id, "transcriptPath": transcript_path}
+    try:
+        pack = build_context_pack(job_args)
+        pack_path, latest_path = write_pack_files(pack, pathlib.Path(args.pack_dir), session_id, args.pack_format)
+    except UnsupportedError as exc:
+        row.update(status="unsupported", error=str(exc))
+        return row
+    except OSError as exc:
+        row.update(status="error", error=f"failed to write pack: {exc}")
+        return row
+
+    row.update(
+        status="ok",
+        packPath=str(pack_path),
+        latestPath=str(latest_path),
+        totalTurns=pack["session"]["totalTurns"],
+        compactedTurns=pack["session"]["compactedTurns"],
+        keptTurns=pack["session"]["keptTurns"],
+        replayChars=pack["replay"]["charCount"],
+        replayTokens=pack["replay"]["tokenCount"],
+    )
+    return row
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    sessions = _collect_sessions(args)
+    if not sessions:
+        raise UnsupportedError("no sessions to build (use --session, --projects-glob or --session-id/--transcript-path)")
+    if args.index_path and len(sessions) > 1:
+        raise UnsupportedError("--index-path applies to a single session; use --index-dir for batches")
+
+    pack_dir = pathlib.Path(args.pack_dir).absolute()
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    # Workers and the summary's packPath/latestPath use the absolute directory.
+    args.pack_dir = str(pack_dir)
+    if args.index_dir:
+        pathlib.Path(args.index_dir).mkdir(parents=True, exist_ok=True)
+    worker = functools.partial(_build_session_pack, args)
+    jobs = min(args.jobs or os.cpu_count() or 1, len(sessions))
+    if jobs <= 1:
+        rows = [worker(session) for session in sessions.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(worker, sessions.items()))
+
+    failed = [row for row in rows if row["status"] != "ok"]
+    for row in failed:
+        prefix = f"{row['sessionId']}: " if len(rows) > 1 else ""
+        print(f"Unsupported: {prefix}{row['error']}", file=sys.stderr)
+
+    json.dump({"packs": rows, "ok": len(rows) - len(failed), "failed": len(failed)}, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 2 if failed else 0
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build front-compaction context pack")
-    parser.add_argument("--transcript-path", required=True)
-    parser.add_argument("--session-id", required=True)
+    parser.add_argument("--transcript-path", default="")
+    parser.add_argument("--session-id", default="")
     parser.add_argument("--percent", required=True, type=int)
     parser.add_argument("--focus", default="")
     parser.add_argument("--max-head-chars", type=int, default=4000)
     parser.add_argument("--max-tail-chars", type=int, default=16000)
     parser.add_argument("--max-replay-chars", type=int, default=19000)
-    return parser.parse_args()
+    parser.add_argument("--max-head-tokens", type=int, default=None)
+    parser.add_argument("--max-tail-tokens", type=int, default=None)
+    parser.add_argument("--max-replay-tokens", type=int, default=None)
+    parser.add_argument(
+        "--token-estimator",
+        default="table",
+        choices=sorted(ESTIMATORS),
+        help="offline estimator used for token budgets and pack tokenCount fields",
+    )
+    parser.add_argument(
+        "--summarizer",
+        default="first-line",
+        choices=SUMMARIZERS,
+        help="head summary: first line of every head turn, ranked extractive highlights, or cached per-segment highlights",
+    )
+    parser.add_argument(
+        "--segment-turns",
+        type=int,
+        default=SEGMENT_TURNS,
+        help="turns per segment for --summarizer hierarchical (segment summaries are cached next to the turn index)",
+    )
+    parser.add_argument(
+        "--pack-format",
+        default="1",
+        choices=sorted(PACK_FORMAT_SUFFIXES),
+        help='pack schemaVersion: "1" JSON, "2" compact binary, "3" manifest over the chunk store (see context_pack_format.py)',
+    )
+    parser.add_argument(
+        "--index-path",
+        default="",
+        help="sidecar turn index; when set, only bytes appended since the last run are parsed",
+    )
+
+    batch = parser.add_argument_group("batch mode (enabled by --pack-dir)")
+    batch.add_argument(
+        "--pack-dir",
+        default="",
+        help="write <session>-<ts>.json packs and latest-<session>.json links here and print a JSON summary",
+    )
+    batch.add_argument("--session", action="append", default=[], metavar="SESSION_ID=TRANSCRIPT_PATH")
+    batch.add_argument("--projects-glob", default="", help="transcript glob, e.g. '~/.claude/projects/*/*.jsonl'")
+    batch.add_argument("--index-dir", default="", help="directory holding <session>.turn-index.json files")
+    batch.add_argument("--jobs", type=int, default=0, help="worker processes (default: CPU count)")
+
+    args = parser.parse_args()
+    if not args.pack_dir and not (args.transcript_path and args.session_id):
+        parser.error("--transcript-path and --session-id are required unless --pack-dir is given")
+    if args.segment_turns < 1:
+        parser.error("--segment-turns must be at least 1")
+    return args
 
 
 def main() -> int:
     args = parse_args()
     try:
-        pack = build_context_pack(args)
+        if args.pack_dir:
+            return run_batch(args)
+        payload = encode_pack_bytes(build_context_pack(args), args.pack_format)
     except UnsupportedError as exc:
         print(f"Unsupported: {exc}", file=sys.stderr)
         return 2
 
-    json.dump(pack, sys.stdout, ensure_ascii=False)
-    sys.stdout.write("\n")
+    sys.stdout.buffer.write(payload)
     return 0
 
 
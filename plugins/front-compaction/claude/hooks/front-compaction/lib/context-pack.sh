@@ -10,6 +10,9 @@ FRONT_COMPACTION_STATE_DIR="$FRONT_COMPACTION_ROOT/state"
 FRONT_COMPACTION_LOG_DIR="$FRONT_COMPACTION_ROOT/logs"
 FRONT_COMPACTION_LOG_FILE="$FRONT_COMPACTION_LOG_DIR/front-compaction.jsonl"
 FRONT_COMPACTION_MAX_KEEP_PER_SESSION="${FRONT_COMPACTION_MAX_KEEP_PER_SESSION:-3}"
+FRONT_COMPACTION_DAEMON_SOCKET="${FRONT_COMPACTION_DAEMON_SOCKET:-$FRONT_COMPACTION_STATE_DIR/daemon.sock}"
+# Exit status of fc_daemon_call when no daemon answered (EX_TEMPFAIL).
+FC_DAEMON_UNAVAILABLE=75
 
 fc_require_cmds() {
   local missing=0
@@ -51,43 +54,54 @@ fc_log_event() {
     >> "$FRONT_COMPACTION_LOG_FILE" 2>/dev/null || true
 }
 
-fc_pending_path() {
-  local session_id=$1
-  echo "$FRONT_COMPACTION_STATE_DIR/${session_id}.pending"
+# Forward a hook request to the resident daemon (lib/front_compaction_daemon.py)
+# through the import-light client lib/daemon_client.py.
+# Prints the daemon's stdout/stderr and returns its exit status, or returns
+# $FC_DAEMON_UNAVAILABLE without output so the caller can run the standalone path.
+fc_daemon_call() {
+  if [[ "${FRONT_COMPACTION_DAEMON:-1}" == "0" || ! -S "$FRONT_COMPACTION_DAEMON_SOCKET" ]]; then
+    return "$FC_DAEMON_UNAVAILABLE"
+  fi
+  if ! command -v python3 >/dev/null 2>&1; then
+    return "$FC_DAEMON_UNAVAILABLE"
+  fi
+  python3 "$FRONT_COMPACTION_LIB_DIR/daemon_client.py" \
+    --socket "$FRONT_COMPACTION_DAEMON_SOCKET" "$@"
 }
 
-fc_latest_link() {
-  local session_id=$1
-  echo "$FRONT_COMPACTION_PACK_DIR/latest-${session_id}.json"
+# schemaVersion "2" packs start with the FCPK magic and "3" packs are
+# *.manifest.json files over the chunk store; both are read through
+# lib/context_pack_format.py rather than jq.
+fc_pack_needs_reader() {
+  local pack_path=$1
+  [[ "$pack_path" == *.manifest.json || "$(head -c 4 "$pack_path")" == "FCPK" ]]
 }
 
-fc_pack_path() {
+fc_pending_path() {
   local session_id=$1
-  local ts=$2
-  echo "$FRONT_COMPACTION_PACK_DIR/${session_id}-${ts}.json"
+  echo "$FRONT_COMPACTION_STATE_DIR/${session_id}.pending"
 }
 
-fc_cleanup_old_packs() {
+fc_turn_index_path() {
   local session_id=$1
-  local keep=$FRONT_COMPACTION_MAX_KEEP_PER_SESSION
-
-  shopt -s nullglob
-  local files=("$FRONT_COMPACTION_PACK_DIR/${session_id}-"*.json)
-  shopt -u nullglob
+  echo "$FRONT_COMPACTION_STATE_DIR/${session_id}.turn-index.json"
+}
 
-  if [[ "${#files[@]}" -le "$keep" ]]; then
-    return
+# One retention pass over every pack (all sessions, all formats) plus the
+# chunk store: keep N per session, optional age/size caps, never a pending pack.
+fc_gc_packs() {
+  local gc_args=(
+    --pack-dir "$FRONT_COMPACTION_PACK_DIR"
+    --state-dir "$FRONT_COMPACTION_STATE_DIR"
+    --keep-per-session "$FRONT_COMPACTION_MAX_KEEP_PER_SESSION"
+  )
+  if [[ -n "${FRONT_COMPACTION_MAX_PACK_AGE_DAYS:-}" ]]; then
+    gc_args+=(--max-age-days "$FRONT_COMPACTION_MAX_PACK_AGE_DAYS")
   fi
-
-  local sorted
-  sorted=$(ls -1t "${files[@]}")
-  local idx=0
-  while IFS= read -r file; do
-    idx=$((idx + 1))
-    if [[ "$idx" -gt "$keep" ]]; then
-      rm -f "$file"
-    fi
-  done <<< "$sorted"
+  if [[ -n "${FRONT_COMPACTION_MAX_PACK_BYTES:-}" ]]; then
+    gc_args+=(--max-bytes "$FRONT_COMPACTION_MAX_PACK_BYTES")
+  fi
+  python3 "$FRONT_COMPACTION_LIB_DIR/pack_store.py" gc "${gc_args[@]}" >/dev/null 2>&1 || true
 }
 
 fc_default_project_slug() {
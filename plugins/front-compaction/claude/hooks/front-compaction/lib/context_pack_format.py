@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Context pack formats beyond plain JSON (schemaVersion "2" and "3").
+
+Version "2" is a single binary file.
+
+Layout::
+
+    header    fixed 60 bytes, see HEADER below
+    metadata  UTF-8 JSON: the v1 pack minus replay/head/tail text
+    body      the replay, compressed once with the header's codec
+
+Head summary and raw tail are byte spans into the replay, so the text is stored
+once. The header carries the lengths and the replay sha256, which means
+metadata and integrity data can be read without touching the body. The body can
+be verified and emitted in chunks.
+
+Version "3" is a JSON manifest with the same metadata. It lists the replay as
+chunks held in the content-addressed store (see pack_store.py).
+
+Version "1" packs are plain JSON. load_pack() reads all versions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import contextlib
+import hashlib
+import json
+import pathlib
+import struct
+import sys
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from pack_store import MANIFEST_SUFFIX, ChunkStore, StoreError, split_chunks
+
+try:  # optional: zstd compresses better and faster, zlib is always available
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+PACK_MAGIC = b"FCPK"
+PACK_SUFFIX = ".pack"
+# magic, format version, codec, flags, metadata length, body length, replay length, replay sha256
+HEADER = struct.Struct(">4sHBBIQQ32s")
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+_CODEC_NAMES = {CODEC_NONE: "none", CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+_CHUNK_SIZE = 64 * 1024
+
+
+class PackFormatError(Exception):
+    pass
+
+
+@dataclass
+class PackHeader:
+    version: int
+    codec: int
+    metadata_length: int
+    body_length: int
+    replay_length: int
+    sha256: str
+
+    @property
+    def body_offset(self) -> int:
+        return HEADER.size + self.metadata_length
+
+
+def default_codec() -> int:
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise PackFormatError("zstd requested but the zstandard module is not installed")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, 9)
+    return data
+
+
+def replay_spans(replay: str, summary: str, tail: str) -> tuple[list[int], list[int]]:
+    """Byte spans of the head summary and raw tail inside the replay (see _build_replay)."""
+    head_start = replay.find(f"\n{summary}\n\n") + 1
+    if head_start <= 0 or not replay.endswith(tail):
+        raise PackFormatError("pack text is not part of the replay")
+    tail_start = len(replay) - len(tail)
+
+    def to_bytes(start: int, end: int) -> list[int]:
+        byte_start = len(replay[:start].encode("utf-8"))
+        return [byte_start, byte_start + len(replay[start:end].encode("utf-8"))]
+
+    return to_bytes(head_start, head_start + len(summary)), to_bytes(tail_start, len(replay))
+
+
+def encode_pack(pack: dict, codec: int | None = None) -> bytes:
+    """Encode a v1-shaped pack dict as a v2 binary pack."""
+    codec = default_codec() if codec is None else codec
+    replay = pack["replay"]["content"]
+    replay_bytes = replay.encode("utf-8")
+
+    metadata = json.loads(json.dumps(pack))
+    metadata["schemaVersion"] = "2"
+    metadata["replay"].pop("content")
+    metadata["replay"]["codec"] = _CODEC_NAMES[codec]
+    metadata["headSummary"]["span"], metadata["tailRaw"]["span"] = replay_spans(
+        replay, metadata["headSummary"].pop("content"), metadata["tailRaw"].pop("content")
+    )
+    metadata_bytes = json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    body = _compress(replay_bytes, codec)
+    header = HEADER.pack(
+        PACK_MAGIC,
+        2,
+        codec,
+        0,
+        len(metadata_bytes),
+        len(body),
+        len(replay_bytes),
+        hashlib.sha256(replay_bytes).digest(),
+    )
+    return header + metadata_bytes + body
+
+
+def encode_manifest(pack: dict, store: ChunkStore) -> bytes:
+    """Put the replay chunks into the store and return v3 manifest bytes for a v1-shaped pack."""
+    replay = pack["replay"]["content"]
+    digests = [store.put(chunk.encode("utf-8")) for chunk in split_chunks(replay)]
+
+    manifest = json.loads(json.dumps(pack))
+    manifest["schemaVersion"] = "3"
+    manifest["replay"].pop("content")
+    manifest["replay"]["byteCount"] = len(replay.encode("utf-8"))
+    manifest["replay"]["chunks"] = digests
+    manifest["headSummary"]["span"], manifest["tailRaw"]["span"] = replay_spans(
+        replay, manifest["headSummary"].pop("content"), manifest["tailRaw"].pop("content")
+    )
+    return (json.dumps(manifest, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def is_binary_pack(path: str | pathlib.Path) -> bool:
+    with open(path, "rb") as handle:
+        return handle.read(len(PACK_MAGIC)) == PACK_MAGIC
+
+
+def read_header(handle: BinaryIO) -> PackHeader:
+    handle.seek(0)
+    raw = handle.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        raise PackFormatError("truncated pack header")
+    magic, version, codec, _flags, metadata_length, body_length, replay_length, digest = HEADER.unpack(raw)
+    if magic != PACK_MAGIC:
+        raise PackFormatError("not a binary context pack")
+    if version != 2:
+        raise PackFormatError(f"unsupported binary pack version {version}")
+    if codec not in _CODEC_NAMES:
+        raise PackFormatError(f"unknown pack codec {codec}")
+    return PackHeader(version, codec, metadata_length, body_length, replay_length, digest.hex())
+
+
+def read_metadata(handle: BinaryIO, header: PackHeader) -> dict:
+    handle.seek(HEADER.size)
+    raw = handle.read(header.metadata_length)
+    if len(raw) != header.metadata_length:
+        raise PackFormatError("truncated pack metadata")
+    try:
+        metadata = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        raise PackFormatError(f"invalid pack metadata: {exc}") from exc
+    if not isinstance(metadata, dict):
+        raise PackFormatError("pack metadata is not a JSON object")
+    return metadata
+
+
+def iter_replay(handle: BinaryIO, header: PackHeader, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the decompressed replay in chunks without holding the whole body."""
+    handle.seek(header.body_offset)
+    remaining = header.body_length
+
+    def compressed_chunks() -> Iterator[bytes]:
+        nonlocal remaining
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                raise PackFormatError("truncated pack body")
+            remaining -= len(chunk)
+            yield chunk
+
+    try:
+        if header.codec == CODEC_NONE:
+            yield from compressed_chunks()
+        elif header.codec == CODEC_ZLIB:
+            decompressor = zlib.decompressobj()
+            for chunk in compressed_chunks():
+                yield decompressor.decompress(chunk)
+            yield decompressor.flush()
+        else:
+            if zstandard is None:
+                raise PackFormatError("pack uses zstd but the zstandard module is not installed")
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            for chunk in compressed_chunks():
+                yield decompressor.decompress(chunk)
+    except (zlib.error, ValueError) as exc:
+        raise PackFormatError(f"corrupt pack body: {exc}") from exc
+
+
+def _load_manifest(path: pathlib.Path) -> tuple[dict, list[str], ChunkStore]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        chunks = [str(digest) for digest in manifest["replay"]["chunks"]]
+    except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError) as exc:
+        raise PackFormatError(f"invalid pack manifest: {exc}") from exc
+    if not isinstance(manifest, dict):
+        raise PackFormatError("pack manifest is not a JSON object")
+    return manifest, chunks, ChunkStore.for_pack_dir(path.parent)
+
+
+def load_pack(path: str | pathlib.Path) -> dict:
+    """Read a pack of any version into the v1 shape (text fields filled in)."""
+    path = pathlib.Path(path)
+    if path.name.endswith(MANIFEST_SUFFIX):
+        pack, chunks, store = _load_manifest(path)
+        try:
+            replay_bytes = b"".join(store.iter_chunks(chunks))
+        except StoreError as exc:
+            raise PackFormatError(str(exc)) from exc
+    else:
+        with path.open("rb") as handle:
+            if handle.read(len(PACK_MAGIC)) != PACK_MAGIC:
+                handle.seek(0)
+                pack = json.loads(handle.read())
+                if not isinstance(pack, dict):
+                    raise PackFormatError("context pack is not a JSON object")
+                return pack
+            header = read_header(handle)
+            pack = read_metadata(handle, header)
+            replay_bytes = b"".join(iter_replay(handle, header))
+
+    try:
+        pack["replay"]["content"] = replay_bytes.decode("utf-8")
+        for section in ("headSummary", "tailRaw"):
+            start, end = pack[section].pop("span")
+            pack[section]["content"] = replay_bytes[start:end].decode("utf-8")
+    except (KeyError, TypeError, ValueError) as exc:
+        raise PackFormatError(f"invalid pack metadata: {exc}") from exc
+    return pack
+
+
+def write_reinject_output(replay_chunks: Iterable[bytes], out) -> None:
+    """Stream the SessionStart hook JSON with the replay as additionalContext."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    out.write('{\n  "hookSpecificOutput": {\n    "hookEventName": "SessionStart",\n    "additionalContext": "')
+    for chunk in replay_chunks:
+        out.write(json.dumps(decoder.decode(chunk), ensure_ascii=False)[1:-1])
+    out.write(json.dumps(decoder.decode(b"", final=True), ensure_ascii=False)[1:-1])
+    out.write('"\n  }\n}\n')
+
+
+def _replay_matches(replay_chunks: Iterable[bytes], expected_sha256: str, expected_length: int) -> bool:
+    digest = hashlib.sha256()
+    length = 0
+    for chunk in replay_chunks:
+        digest.update(chunk)
+        length += len(chunk)
+    return length == expected_length and digest.hexdigest() == expected_sha256
+
+
+def _reinject(pack_path: str, session_id: str) -> int:
+    """Verify a v2 or v3 pack and emit the hook JSON.
+
+    stderr gets one tab-separated line for the shell: "ok<TAB>percent" on
+    success, "<log message><TAB><user message>" (exit 3) when the pack is rejected.
+    """
+
+    def reject(log_message: str, user_message: str) -> int:
+        print(f"{log_message}\t{user_message}", file=sys.stderr)
+        return 3
+
+    path = pathlib.Path(pack_path)
+    try:
+        with contextlib.ExitStack() as stack:
+            if path.name.endswith(MANIFEST_SUFFIX):
+                expected_schema = "3"
+                metadata, chunks, store = _load_manifest(path)
+                integrity = metadata.get("integrity") if isinstance(metadata.get("integrity"), dict) else {}
+                expected_sha256 = str(integrity.get("sha256") or "")
+                expected_length = int(metadata["replay"].get("byteCount") or 0)
+
+                def replay_chunks() -> Iterator[bytes]:
+                    return store.iter_chunks(chunks)
+
+            else:
+                expected_schema = "2"
+                handle = stack.enter_context(path.open("rb"))
+                header = read_header(handle)
+                metadata = read_metadata(handle, header)
+                expected_sha256 = header.sha256
+                expected_length = header.replay_length
+
+                def replay_chunks() -> Iterator[bytes]:
+                    return iter_replay(handle, header)
+
+            session = metadata.get("session") if isinstance(metadata.get("session"), dict) else {}
+            if metadata.get("schemaVersion") != expected_schema:
+                schema = metadata.get("schemaVersion")
+                return reject(f"schema mismatch: {schema}", f"context pack schema mismatch ({schema}).")
+            if session.get("sessionId") != session_id:
+                return reject("session mismatch in context pack", "context pack session mismatch.")
+            if expected_length == 0 or not expected_sha256:
+                return reject(
+                    "missing replay payload or sha", "context pack missing replay payload or integrity hash."
+                )
+            # Two streaming passes: nothing is written unless the whole replay checks out.
+            if not _replay_matches(replay_chunks(), expected_sha256, expected_length):
+                return reject("integrity check failed", "context pack integrity check failed.")
+            write_reinject_output(replay_chunks(), sys.stdout)
+    except (OSError, ValueError, PackFormatError, StoreError) as exc:
+        return reject(f"unreadable context pack: {exc}", "context pack could not be read.")
+
+    percent = metadata.get("percent")
+    print(f"ok\t{'' if percent is None else percent}", file=sys.stderr)
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect and replay v2/v3 context packs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show = subparsers.add_parser("show", help="print a pack of any version as v1-shaped JSON")
+    show.add_argument("pack_path")
+
+    reinject = subparsers.add_parser("reinject", help="verify a v2/v3 pack and emit SessionStart hook JSON")
+    reinject.add_argument("pack_path")
+    reinject.add_argument("session_id")
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "reinject":
+        return _reinject(args.pack_path, args.session_id)
+
+    try:
+        pack = load_pack(args.pack_path)
+    except (OSError, ValueError, PackFormatError, StoreError) as exc:
+        print(f"Unsupported: {exc}", file=sys.stderr)
+        return 2
+    json.dump(pack, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
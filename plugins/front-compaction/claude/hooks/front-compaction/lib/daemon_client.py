@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Thin client for the resident front-compaction daemon (front_compaction_daemon.py).
+
+Sends one request and replays the daemon's {"exitCode", "stdout", "stderr"}
+answer. Exits with CALL_UNAVAILABLE, without printing anything, when no daemon
+is listening. Hooks run this on every call, so it imports only the standard
+library modules it needs and none of the pack builder.
+
+Usage: daemon_client.py --socket PATH [--stdin] OP [KEY=VALUE]...
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import sys
+
+CALL_UNAVAILABLE = 75
+CALL_OPS = ("prepare", "reinject", "status", "shutdown")
+_CALL_TIMEOUT_SECONDS = 120.0
+_USAGE = "usage: daemon_client.py --socket PATH [--stdin] {prepare,reinject,status,shutdown} [KEY=VALUE]..."
+
+
+def call(socket_path: str, op: str, fields: list[str], read_stdin: bool) -> int:
+    request: dict = {"op": op}
+    for item in fields:
+        key, _, value = item.partition("=")
+        request[key] = value
+    if read_stdin:
+        request["input"] = sys.stdin.read()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(_CALL_TIMEOUT_SECONDS)
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return CALL_UNAVAILABLE
+        try:
+            client.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            with client.makefile("rb") as reader:
+                response = json.loads(reader.readline())
+        except (OSError, ValueError) as exc:
+            print(f"front-compaction: daemon request failed: {exc}", file=sys.stderr)
+            return 1
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("exitCode", 1))
+
+
+def main(argv: list[str]) -> int:
+    # Parsed by hand: argparse alone would add several milliseconds to every hook call.
+    socket_path = ""
+    read_stdin = False
+    positional: list[str] = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--socket":
+            socket_path = next(args, "")
+        elif arg == "--stdin":
+            read_stdin = True
+        else:
+            positional.append(arg)
+    if not socket_path or not positional or positional[0] not in CALL_OPS:
+        print(_USAGE, file=sys.stderr)
+        return 2
+    return call(socket_path, positional[0], positional[1:], read_stdin)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
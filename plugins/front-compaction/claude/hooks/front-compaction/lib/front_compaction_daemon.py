@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Optional resident helper for the front-compaction hooks.
+
+`serve` listens on a Unix socket and answers `prepare`, `reinject` and `status`
+requests with turn indexes and parsed packs kept in memory. The hooks reach it
+through lib/daemon_client.py, which imports nothing from the pack builder and
+exits with CALL_UNAVAILABLE, without printing anything, when no daemon is
+listening, so the hooks can fall back to their standalone path. `call` here
+runs the same client for manual use.
+
+Protocol: one JSON object per line in each direction, one request per
+connection. Hook requests are answered with {"exitCode", "stdout", "stderr"},
+which `call` replays verbatim.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+import pathlib
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import build_context_pack as bcp
+from context_pack_format import PackFormatError, load_pack
+from daemon_client import CALL_OPS, call
+from pack_store import StoreError
+from pack_store import gc as gc_packs
+from segment_summaries import SEGMENT_CACHE
+
+_MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class HookResult:
+    exit_code: int = 0
+    stdout: str = ""
+    stderr: str = ""
+
+    def to_json(self) -> dict:
+        return {"exitCode": self.exit_code, "stdout": self.stdout, "stderr": self.stderr}
+
+
+def _jq_text(value: object) -> str:
+    """Mirror `jq -r '.field // empty'` inside "$(...)": null/false become "", trailing newlines are dropped."""
+    if value is None or value is False:
+        return ""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return text.rstrip("\n")
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+class FrontCompactionState:
+    """Everything the hooks would otherwise re-read from disk on every invocation."""
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+        self.pack_dir = root / "context-pack"
+        self.state_dir = root / "state"
+        self.log_file = root / "logs" / "front-compaction.jsonl"
+        self.started = time.monotonic()
+        self.requests = {"prepare": 0, "reinject": 0, "status": 0}
+        # pack path -> ((mtime_ns, size), pack, replay already verified)
+        self.packs: dict[str, tuple[tuple[int, int], dict, bool]] = {}
+        self.lock = threading.Lock()
+
+    def ensure_dirs(self) -> None:
+        for path in (self.pack_dir, self.state_dir, self.log_file.parent):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def log_event(
+        self,
+        event: str,
+        status: str,
+        session_id: str = "",
+        message: str = "",
+        percent: str = "",
+        pack_path: str = "",
+    ) -> None:
+        record = {
+            "timestamp": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "event": event,
+            "status": status,
+            "sessionId": session_id,
+            "message": message,
+            "percent": percent,
+            "packPath": pack_path,
+        }
+        try:
+            with self.log_file.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        except OSError:
+            pass
+
+    def dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "prepare":
+            with self.lock:
+                self.requests["prepare"] += 1
+                return self.prepare(request).to_json()
+        if op == "reinject":
+            with self.lock:
+                self.requests["reinject"] += 1
+                return self.reinject(str(request.get("input", ""))).to_json()
+        if op == "status":
+            with self.lock:
+                self.requests["status"] += 1
+                return HookResult(stdout=json.dumps(self.status()) + "\n").to_json()
+        return HookResult(exit_code=2, stderr=f"front-compaction daemon: unknown op: {op}\n").to_json()
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "root": str(self.root),
+            "uptimeSeconds": round(time.monotonic() - self.started, 3),
+            "requests": dict(self.requests),
+            "cachedTurnIndexes": len(bcp.TURN_INDEX_CACHE),
+            "cachedSegmentCaches": len(SEGMENT_CACHE),
+            "cachedPacks": len(self.packs),
+        }
+
+    def prepare(self, request: dict) -> HookResult:
+        """Same steps as prepare-front-compaction.sh after it has resolved the transcript."""
+        session_id = str(request.get("sessionId", ""))
+        transcript_path = str(request.get("transcriptPath", ""))
+        percent = str(request.get("percent", ""))
+        args = argparse.Namespace(
+            transcript_path=transcript_path,
+            session_id=session_id,
+            percent=int(percent),
+            focus=str(request.get("focus", "")),
+            max_head_chars=4000,
+            max_tail_chars=16000,
+            max_replay_chars=19000,
+            max_head_tokens=_optional_int(request.get("maxHeadTokens")),
+            max_tail_tokens=_optional_int(request.get("maxTailTokens")),
+            max_replay_tokens=_optional_int(request.get("maxReplayTokens")),
+            token_estimator="table",
+            summarizer=str(request.get("summarizer") or "first-line"),
+            segment_turns=bcp.SEGMENT_TURNS,
+            index_path=str(self.state_dir / f"{session_id}.turn-index.json"),
+            pack_format=str(request.get("packFormat") or "1"),
+        )
+        self.ensure_dirs()
+
+        try:
+            pack = bcp.build_context_pack(args)
+            pack_path, _ = bcp.write_pack_files(pack, self.pack_dir, session_id, args.pack_format)
+        except bcp.UnsupportedError as exc:
+            message = f"Unsupported: {exc}"
+            self.log_event("prepare", "error", session_id, message, percent)
+            return HookResult(exit_code=2, stderr=message + "\n")
+        except (OSError, PackFormatError) as exc:
+            message = f"front-compaction: failed to write context pack: {exc}"
+            self.log_event("prepare", "error", session_id, message, percent)
+            return HookResult(exit_code=1, stderr=message + "\n")
+
+        stat = pack_path.stat()
+        if args.pack_format != "1":
+            pack = {**pack, "schemaVersion": args.pack_format}
+        self.packs[str(pack_path)] = ((stat.st_mtime_ns, stat.st_size), pack, True)
+        (self.state_dir / f"{session_id}.pending").write_text(f"{pack_path}\n", encoding="utf-8")
+        self._gc_packs(request)
+
+        session = pack["session"]
+        compacted, total, kept = session["compactedTurns"], session["totalTurns"], session["keptTurns"]
+        self.log_event(
+            "prepare",
+            "success",
+            session_id,
+            f"prepared compacted={compacted} total={total} kept={kept}",
+            percent,
+            str(pack_path),
+        )
+        return HookResult(
+            stdout=(
+                f"Front compaction prepared ({percent}%, hard).\n"
+                f"- Compacted oldest turns: {compacted}/{total}\n"
+                f"- Kept tail turns: {kept}\n"
+                f"- Context pack: {pack_path}\n"
+                "Next step: run /compact\n"
+            )
+        )
+
+    def _gc_packs(self, request: dict) -> None:
+        """Same retention pass as fc_gc_packs."""
+        max_age_days = request.get("maxPackAgeDays")
+        try:
+            gc_packs(
+                self.pack_dir,
+                state_dir=self.state_dir,
+                keep_per_session=int(request.get("maxKeep") or 3),
+                max_age_seconds=float(max_age_days) * 86400 if max_age_days else None,
+                max_bytes=_optional_int(request.get("maxPackBytes")),
+            )
+        except (OSError, ValueError):
+            pass
+        self.packs = {path: entry for path, entry in self.packs.items() if os.path.exists(path)}
+
+    def _load_pack(self, pack_path: str) -> tuple[dict, bool]:
+        stat = os.stat(pack_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self.packs.get(pack_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        pack = load_pack(pack_path)
+        self.packs[pack_path] = (stamp, pack, False)
+        return pack, False
+
+    def reinject(self, raw_input: str) -> HookResult:
+        """Same checks and output as reinject-after-compact.sh, without forking jq or shasum."""
+        try:
+            hook_input = json.loads(raw_input)
+        except json.JSONDecodeError:
+            return HookResult(exit_code=1, stderr="front-compaction: invalid SessionStart hook input JSON.\n")
+        if not isinstance(hook_input, dict):
+            hook_input = {}
+
+        self.ensure_dirs()
+        source_event = _jq_text(hook_input.get("source"))
+        session_id = _jq_text(hook_input.get("session_id"))
+        if source_event != "compact":
+            return HookResult()
+
+        if not session_id:
+            self.log_event("reinject", "error", "", "missing session_id for compact reinjection")
+            return HookResult(stderr="Unsupported: missing session_id for compact reinjection.\n")
+
+        pending_file = self.state_dir / f"{session_id}.pending"
+        if not pending_file.is_file():
+            self.log_event("reinject", "noop", session_id, "no pending pack for compact start")
+            return HookResult()
+
+        def reject(log_message: str, user_message: str, pack_path: str = "") -> HookResult:
+            pending_file.unlink(missing_ok=True)
+            self.log_event("reinject", "error", session_id, log_message, "", pack_path)
+            return HookResult(stderr=f"Unsupported: {user_message}\n")
+
+        pack_path = pending_file.read_text(encoding="utf-8").rstrip("\n")
+        if not pack_path or not os.path.isfile(pack_path):
+            return reject(
+                "pending marker exists but pack file is missing",
+                f"no valid pending front-compaction pack for session {session_id}.",
+                pack_path,
+            )
+
+        try:
+            pack, verified = self._load_pack(pack_path)
+        except (OSError, ValueError, PackFormatError, StoreError) as exc:
+            return reject(f"unreadable context pack: {exc}", "context pack could not be read.", pack_path)
+
+        schema = _jq_text(pack.get("schemaVersion"))
+        session = pack.get("session") if isinstance(pack.get("session"), dict) else {}
+        replay = pack.get("replay") if isinstance(pack.get("replay"), dict) else {}
+        integrity = pack.get("integrity") if isinstance(pack.get("integrity"), dict) else {}
+        replay_content = _jq_text(replay.get("content"))
+        expected_sha = _jq_text(integrity.get("sha256"))
+
+        if schema not in ("1", "2", "3"):
+            return reject(f"schema mismatch: {schema}", f"context pack schema mismatch ({schema}).", pack_path)
+        if _jq_text(session.get("sessionId")) != session_id:
+            return reject("session mismatch in context pack", "context pack session mismatch.", pack_path)
+        if not replay_content or not expected_sha:
+            return reject(
+                "missing replay payload or sha",
+                "context pack missing replay payload or integrity hash.",
+                pack_path,
+            )
+        if not verified:
+            if hashlib.sha256(replay_content.encode("utf-8")).hexdigest() != expected_sha:
+                return reject("integrity check failed", "context pack integrity check failed.", pack_path)
+            stamp = self.packs[pack_path][0]
+            self.packs[pack_path] = (stamp, pack, True)
+
+        self.log_event(
+            "reinject",
+            "success",
+            session_id,
+            "replay injected on SessionStart(compact)",
+            _jq_text(pack.get("percent")),
+            pack_path,
+        )
+        output = {"hookSpecificOutput": {"hookEventName": "SessionStart", "additionalContext": replay_content}}
+        pending_file.unlink(missing_ok=True)
+        self.packs.pop(pack_path, None)
+        return HookResult(stdout=json.dumps(output, ensure_ascii=False, indent=2) + "\n")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(_MAX_REQUEST_BYTES)
+        stop = False
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not a JSON object")
+        except ValueError as exc:
+            response = HookResult(exit_code=2, stderr=f"front-compaction daemon: bad request: {exc}\n").to_json()
+        else:
+            if request.get("op") == "shutdown":
+                stop = True
+                response = HookResult(stdout="front-compaction daemon stopping\n").to_json()
+            else:
+                try:
+                    response = self.server.state.dispatch(request)
+                except Exception as exc:  # keep serving; the hook reports the failure
+                    response = HookResult(exit_code=1, stderr=f"front-compaction daemon: {exc}\n").to_json()
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+        if stop:
+            # Reply first: once serve_forever() returns the process exits and
+            # takes this (daemon) handler thread with it.
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, state: FrontCompactionState):
+        self.state = state
+        super().__init__(socket_path, _RequestHandler)
+
+
+def _socket_is_live(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(root: pathlib.Path, socket_path: str) -> int:
+    state = FrontCompactionState(root)
+    state.ensure_dirs()
+    if os.path.exists(socket_path):
+        if _socket_is_live(socket_path):
+            print(f"front-compaction daemon already listening on {socket_path}", file=sys.stderr)
+            return 1
+        os.unlink(socket_path)
+
+    previous_umask = os.umask(0o077)
+    try:
+        server = _Server(socket_path, state)
+    finally:
+        os.umask(previous_umask)
+
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"front-compaction daemon listening on {socket_path} (pid {os.getpid()})", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pathlib.Path(socket_path).unlink(missing_ok=True)
+    return 0
+
+
+def _default_root() -> pathlib.Path:
+    env_root = os.environ.get("FRONT_COMPACTION_ROOT")
+    if env_root:
+        return pathlib.Path(env_root)
+    return pathlib.Path(__file__).resolve().parent.parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resident front-compaction helper")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="listen for hook requests")
+    serve_parser.add_argument("--root", default="", help="front-compaction root (default: $FRONT_COMPACTION_ROOT)")
+    serve_parser.add_argument("--socket", default="", help="socket path (default: <root>/state/daemon.sock)")
+
+    call_parser = subparsers.add_parser("call", help="send one request to a running daemon")
+    call_parser.add_argument("--socket", required=True)
+    call_parser.add_argument("op", choices=CALL_OPS)
+    call_parser.add_argument("fields", nargs="*", metavar="KEY=VALUE")
+    call_parser.add_argument("--stdin", action="store_true", help="send stdin as the request's input field")
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "serve":
+        root = pathlib.Path(args.root) if args.root else _default_root()
+        return serve(root, args.socket or str(root / "state" / "daemon.sock"))
+    return call(args.socket, args.op, args.fields, args.stdin)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
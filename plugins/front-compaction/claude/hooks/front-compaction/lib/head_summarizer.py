@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Extractive head summaries for front-compaction context packs.
+
+Every sentence of the compacted head turns is scored with cheap offline signals:
+
+- cosine similarity between the sentence's TF-IDF vector and the --focus text;
+- centrality: cosine with the centroid of all head sentences;
+- file paths, code identifiers and decision keywords it mentions;
+- small boosts for user requests and for the opening sentence of a message.
+
+The best non-redundant sentences that fit the budget are kept in
+chronological order. Term weighting and scoring run as whole-array operations
+with numpy when it is installed. A pure-Python fallback produces the same
+ranking.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from token_estimator import TokenEstimator
+
+try:  # optional: vectorized scoring for sessions with thousands of turns
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+SUMMARIZERS = ("first-line", "extractive", "hierarchical")
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9`\"'(\[])|\n+")
+_TERM = re.compile(r"[a-z0-9_]{2,}")
+# Side signals are classified per whitespace token with set lookups; on long
+# heads this is several times faster than running one regex per signal.
+_PATH_SUFFIXES = frozenset(
+    "py pyi ts tsx js jsx sh md json jsonl yaml yml toml go rs java rb c h cpp css html sql".split()
+)
+_DECISION_WORDS = frozenset(
+    """
+    decide decided decides deciding decision decisions agreed chose choose chosen because must requirement
+    requirements constraint constraints recommend recommended recommends recommendation fix fixed todo
+    tradeoff tradeoffs trade-off trade-offs
+    """.split()
+)
+_DECISION_PHRASES = ("going with", "settled on", "will use", "instead of", "root cause")
+_EDGE_PUNCTUATION = ".,;:!?\"'()[]{}<>*"
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can could did do does for from had has have how if in into is it its
+    just let me my no not of on or our so than that the their them then there these they this to too up us
+    was we were what when where which while who why will with would you your ok okay yes sure please also
+    """.split()
+)
+
+_MAX_SENTENCE_CHARS = 180
+_MIN_SENTENCE_CHARS = 12
+_REDUNDANCY_THRESHOLD = 0.6
+_SCORE_DIGITS = 9
+
+# Feature columns: focus, centrality, paths, identifiers, decisions, lead sentence, user role.
+WEIGHTS = (3.0, 1.0, 0.8, 0.5, 1.2, 0.3, 0.2)
+
+
+@dataclass
+class Sentence:
+    turn: int
+    role: str
+    position: int
+    text: str
+    terms: Counter
+
+    @classmethod
+    def from_text(cls, turn: int, role: str, position: int, text: str) -> Sentence:
+        return cls(turn, role, position, text, _terms(text))
+
+    def render(self) -> str:
+        return f"- Turn {self.turn} {self.role}: {self.text}"
+
+
+def _terms(text: str) -> Counter:
+    return Counter(term for term in _TERM.findall(text.lower()) if term not in _STOPWORDS)
+
+
+def split_sentences(turns: Iterable[tuple[str, str]], first_turn: int = 1) -> list[Sentence]:
+    sentences: list[Sentence] = []
+    for turn_number, (user, assistant) in enumerate(turns, start=first_turn):
+        for role, text in (("user", user), ("assistant", assistant)):
+            position = 0
+            for part in _SENTENCE_SPLIT.split(text):
+                part = " ".join(part.split())
+                if len(part) < _MIN_SENTENCE_CHARS or part.startswith("```"):
+                    continue
+                sentences.append(Sentence(turn_number, role, position, part[:_MAX_SENTENCE_CHARS], _terms(part)))
+                position += 1
+    return sentences
+
+
+def _is_identifier(raw: str, word: str) -> bool:
+    if "`" in raw or "()" in raw:
+        return True
+    if not word.replace("_", "").isalnum():
+        return False
+    if "_" in word.strip("_"):
+        return True
+    # camelCase / PascalCase: an uppercase letter after the first character, not ALLCAPS.
+    return not word.isupper() and any(char.isupper() for char in word[1:])
+
+
+def _signal_counts(text: str) -> tuple[int, int, int]:
+    paths = identifiers = decisions = 0
+    for raw in text.split():
+        word = raw.strip(_EDGE_PUNCTUATION)
+        if not word:
+            continue
+        stem, dot, suffix = word.rpartition(".")
+        if "/" in word.strip("/") or (dot and stem and suffix.lower() in _PATH_SUFFIXES):
+            paths += 1
+        elif _is_identifier(raw, word):
+            identifiers += 1
+        if word.lower() in _DECISION_WORDS:
+            decisions += 1
+    lowered = text.lower()
+    decisions += sum(lowered.count(phrase) for phrase in _DECISION_PHRASES)
+    return paths, identifiers, decisions
+
+
+def _side_features(sentences: list[Sentence]) -> list[tuple[float, float, float, float, float]]:
+    """Token signals, capped and scaled to [0, 1]: paths, identifiers, decisions, lead, user."""
+    features = []
+    for sentence in sentences:
+        paths, identifiers, decisions = _signal_counts(sentence.text)
+        features.append(
+            (
+                min(paths, 2) / 2,
+                min(identifiers, 3) / 3,
+                min(decisions, 2) / 2,
+                1.0 if sentence.position == 0 else 0.0,
+                1.0 if sentence.role == "user" else 0.0,
+            )
+        )
+    return features
+
+
+def _score_python(sentences: list[Sentence], focus_terms: Counter) -> list[float]:
+    count = len(sentences)
+    document_frequency: Counter = Counter()
+    for sentence in sentences:
+        document_frequency.update(sentence.terms.keys())
+    idf = {term: math.log((count + 1) / (df + 1)) + 1.0 for term, df in document_frequency.items()}
+
+    weights = [{term: tf * idf[term] for term, tf in sentence.terms.items()} for sentence in sentences]
+    norms = [math.sqrt(sum(w * w for w in vector.values())) or 1.0 for vector in weights]
+
+    centroid: Counter = Counter()
+    for vector, norm in zip(weights, norms):
+        for term, w in vector.items():
+            centroid[term] += w / norm / count
+
+    focus_vector = {term: idf[term] for term in focus_terms if term in idf}
+    focus_norm = math.sqrt(sum(w * w for w in focus_vector.values())) or 1.0
+
+    scores = []
+    for vector, norm, side in zip(weights, norms, _side_features(sentences)):
+        focus = sum(w * focus_vector.get(term, 0.0) for term, w in vector.items()) / (norm * focus_norm)
+        centrality = sum(w / norm * centroid[term] for term, w in vector.items())
+        features = (focus, centrality, *side)
+        scores.append(round(sum(weight * value for weight, value in zip(WEIGHTS, features)), _SCORE_DIGITS))
+    return scores
+
+
+def _score_numpy(sentences: list[Sentence], focus_terms: Counter) -> list[float]:
+    count = len(sentences)
+    vocabulary: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    tfs: list[int] = []
+    for row, sentence in enumerate(sentences):
+        for term, tf in sentence.terms.items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            tfs.append(tf)
+
+    row_ids = np.asarray(rows, dtype=np.int64)
+    col_ids = np.asarray(cols, dtype=np.int64)
+    size = len(vocabulary)
+    idf = np.log((count + 1) / (np.bincount(col_ids, minlength=size) + 1)) + 1.0
+    weights = np.asarray(tfs, dtype=np.float64) * idf[col_ids]
+    norms = np.sqrt(np.bincount(row_ids, weights=weights * weights, minlength=count))
+    norms[norms == 0] = 1.0
+    unit = weights / norms[row_ids]
+
+    centroid = np.bincount(col_ids, weights=unit, minlength=size) / count
+    centrality = np.bincount(row_ids, weights=unit * centroid[col_ids], minlength=count)
+
+    focus_weights = np.zeros(size)
+    for term in focus_terms:
+        if term in vocabulary:
+            focus_weights[vocabulary[term]] = idf[vocabulary[term]]
+    focus_norm = float(np.sqrt(np.dot(focus_weights, focus_weights))) or 1.0
+    focus = np.bincount(row_ids, weights=unit * focus_weights[col_ids], minlength=count) / focus_norm
+
+    features = np.column_stack([focus, centrality, np.asarray(_side_features(sentences)).reshape(count, 5)])
+    return np.round(features @ np.asarray(WEIGHTS), _SCORE_DIGITS).tolist()
+
+
+def score_sentences(sentences: list[Sentence], focus: str, use_numpy: bool | None = None) -> list[float]:
+    if not sentences:
+        return []
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    focus_terms = _terms(focus)
+    return _score_numpy(sentences, focus_terms) if use_numpy else _score_python(sentences, focus_terms)
+
+
+def _jaccard(left: Counter, right: Counter) -> float:
+    if not left or not right:
+        return 0.0
+    shared = sum(1 for term in left if term in right)
+    return shared / (len(left) + len(right) - shared)
+
+
+def select_sentences(
+    sentences: list[Sentence],
+    focus: str,
+    max_chars: int,
+    max_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+) -> list[Sentence]:
+    """Best-scoring non-redundant sentences that fit the char (and token) budget, in transcript order.
+
+    Each sentence costs its rendered length plus one newline against max_chars,
+    and its estimate plus one newline token against max_tokens.
+    """
+    scores = score_sentences(sentences, focus)
+    ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], sentences[i].turn, sentences[i].role != "user"))
+
+    chosen: list[int] = []
+    chars_left = max_chars
+    tokens_left = max_tokens
+    for idx in ranked:
+        sentence = sentences[idx]
+        line = sentence.render()
+        if len(line) + 1 > chars_left:
+            continue
+        token_cost = 0
+        if tokens_left is not None and estimator is not None:
+            token_cost = estimator.count(line) + 1
+            if token_cost > tokens_left:
+                continue
+        if any(_jaccard(sentence.terms, sentences[other].terms) > _REDUNDANCY_THRESHOLD for other in chosen):
+            continue
+        chosen.append(idx)
+        chars_left -= len(line) + 1
+        if tokens_left is not None:
+            tokens_left -= token_cost
+        if chars_left <= _MIN_SENTENCE_CHARS:
+            break
+
+    chosen.sort(key=lambda i: (sentences[i].turn, sentences[i].role != "user", sentences[i].position))
+    return [sentences[idx] for idx in chosen]
+
+
+def extractive_highlights(
+    turns: Iterable[tuple[str, str]],
+    focus: str,
+    max_chars: int,
+    max_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+) -> list[str]:
+    """Rendered select_sentences() lines for the given (user, assistant) turns."""
+    selected = select_sentences(split_sentences(turns), focus, max_chars, max_tokens, estimator)
+    return [sentence.render() for sentence in selected]
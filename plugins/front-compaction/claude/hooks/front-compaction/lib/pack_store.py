@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Content-addressed chunk store for context packs (schemaVersion "3").
+
+A replay is split at turn boundaries. Each piece is stored once under
+context-pack/store/chunks/<sha[:2]>/<sha256>, zlib-compressed, so repeated
+compactions of one session share their tail turns on disk. A manifest
+(<session>-<ts>.manifest.json, see context_pack_format.encode_manifest) holds
+the v1 pack metadata and lists its chunks.
+
+`gc` is the single retention pass for the whole pack directory. It applies
+age, per-session count and total size limits to packs of every format, then
+sweeps chunks no manifest references.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sys
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+
+STORE_DIRNAME = "store"
+MANIFEST_SUFFIX = ".manifest.json"
+# Chunk boundaries sit in front of each "### Turn N" heading, so an unchanged
+# tail turn hashes to the same chunk in every later pack of the session.
+_CHUNK_BOUNDARY = re.compile(r"(?=\n### Turn \d+\n)")
+_PACK_NAME = re.compile(r"^(?P<session>.+)-(?P<ts>\d{8}T\d{6}Z)(?P<suffix>\.json|\.pack|\.manifest\.json)$")
+# Chunks written moments ago may belong to a manifest that is not renamed into
+# place yet; the sweep leaves them alone.
+DEFAULT_SWEEP_GRACE_SECONDS = 300.0
+
+
+class StoreError(Exception):
+    pass
+
+
+def split_chunks(text: str) -> list[str]:
+    return [part for part in _CHUNK_BOUNDARY.split(text) if part]
+
+
+class ChunkStore:
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+        self.chunk_dir = root / "chunks"
+
+    @classmethod
+    def for_pack_dir(cls, pack_dir: pathlib.Path) -> ChunkStore:
+        return cls(pack_dir / STORE_DIRNAME)
+
+    def chunk_path(self, digest: str) -> pathlib.Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if path.exists():
+            # Refresh the mtime so a concurrent sweep sees the chunk as recent.
+            try:
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                pass  # swept since the exists() check: write it again below
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{digest}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(zlib.compress(data, 9))
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        try:
+            data = zlib.decompress(self.chunk_path(digest).read_bytes())
+        except OSError as exc:
+            raise StoreError(f"missing chunk {digest}") from exc
+        except zlib.error as exc:
+            raise StoreError(f"corrupt chunk {digest}: {exc}") from exc
+        return data
+
+    def iter_chunks(self, digests: Iterable[str]) -> Iterator[bytes]:
+        for digest in digests:
+            yield self.get(digest)
+
+    def iter_stored(self) -> Iterator[pathlib.Path]:
+        if self.chunk_dir.is_dir():
+            yield from (path for path in self.chunk_dir.glob("*/*") if not path.name.startswith("."))
+
+
+@dataclasses.dataclass
+class PackFile:
+    path: pathlib.Path
+    session_id: str
+    created: float
+    size: int
+
+
+def _list_packs(pack_dir: pathlib.Path) -> list[PackFile]:
+    packs = []
+    for path in pack_dir.iterdir():
+        match = _PACK_NAME.match(path.name)
+        if match is None or path.is_symlink() or not path.is_file():
+            continue
+        stat = path.stat()
+        packs.append(PackFile(path, match["session"], stat.st_mtime, stat.st_size))
+    return packs
+
+
+def _pending_packs(state_dir: pathlib.Path | None) -> set[pathlib.Path]:
+    """Packs named by a .pending marker are about to be reinjected and never collected."""
+    if state_dir is None or not state_dir.is_dir():
+        return set()
+    protected = set()
+    for marker in state_dir.glob("*.pending"):
+        try:
+            target = marker.read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if target:
+            protected.add(pathlib.Path(target).resolve())
+    return protected
+
+
+def _manifest_chunks(path: pathlib.Path) -> list[str]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        return list(manifest["replay"]["chunks"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+
+def gc(
+    pack_dir: pathlib.Path,
+    state_dir: pathlib.Path | None = None,
+    keep_per_session: int | None = None,
+    max_age_seconds: float | None = None,
+    max_bytes: int | None = None,
+    sweep_grace_seconds: float = DEFAULT_SWEEP_GRACE_SECONDS,
+    now: float | None = None,
+) -> dict:
+    """Apply retention to every pack in pack_dir and sweep unreferenced chunks."""
+    now = time.time() if now is None else now
+    store = ChunkStore.for_pack_dir(pack_dir)
+    protected = _pending_packs(state_dir)
+    packs = sorted(_list_packs(pack_dir), key=lambda pack: pack.created, reverse=True)
+
+    doomed: set[pathlib.Path] = set()
+    seen_per_session: dict[str, int] = {}
+    for pack in packs:
+        seen_per_session[pack.session_id] = seen_per_session.get(pack.session_id, 0) + 1
+        if pack.path.resolve() in protected:
+            continue
+        if keep_per_session is not None and seen_per_session[pack.session_id] > keep_per_session:
+            doomed.add(pack.path)
+        elif max_age_seconds is not None and now - pack.created > max_age_seconds:
+            doomed.add(pack.path)
+
+    chunk_sizes = {path.name: path.stat().st_size for path in store.iter_stored()}
+    if max_bytes is not None:
+        survivors = [pack for pack in packs if pack.path not in doomed]
+        references: dict[str, int] = {}
+        for pack in survivors:
+            if pack.path.name.endswith(MANIFEST_SUFFIX):
+                for digest in set(_manifest_chunks(pack.path)):
+                    references[digest] = references.get(digest, 0) + 1
+        total = sum(pack.size for pack in survivors) + sum(
+            size for digest, size in chunk_sizes.items() if digest in references
+        )
+        # Oldest first; a chunk only stops counting once its last manifest goes.
+        for pack in reversed(survivors):
+            if total <= max_bytes:
+                break
+            if pack.path.resolve() in protected:
+                continue
+            doomed.add(pack.path)
+            total -= pack.size
+            if pack.path.name.endswith(MANIFEST_SUFFIX):
+                for digest in set(_manifest_chunks(pack.path)):
+                    references[digest] -= 1
+                    if references[digest] == 0:
+                        total -= chunk_sizes.get(digest, 0)
+
+    freed = 0
+    for path in doomed:
+        try:
+            freed += path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    live_chunks: set[str] = set()
+    for pack in packs:
+        if pack.path not in doomed and pack.path.name.endswith(MANIFEST_SUFFIX):
+            live_chunks.update(_manifest_chunks(pack.path))
+
+    removed_chunks = 0
+    for path in list(store.iter_stored()):
+        if path.name in live_chunks:
+            continue
+        try:
+            stat = path.stat()
+            if now - stat.st_mtime < sweep_grace_seconds:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        freed += stat.st_size
+        removed_chunks += 1
+
+    for link in pack_dir.glob("latest-*"):
+        if link.is_symlink() and not link.exists():
+            link.unlink(missing_ok=True)
+
+    kept = [pack for pack in packs if pack.path not in doomed]
+    return {
+        "removedPacks": len(doomed),
+        "removedChunks": removed_chunks,
+        "freedBytes": freed,
+        "keptPacks": len(kept),
+        "packBytes": sum(pack.size for pack in kept),
+        "storeBytes": sum(size for digest, size in chunk_sizes.items() if digest in live_chunks),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Context pack store maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gc_parser = subparsers.add_parser("gc", help="apply retention to all packs and sweep unreferenced chunks")
+    gc_parser.add_argument("--pack-dir", required=True)
+    gc_parser.add_argument("--state-dir", default="", help="packs named by <state-dir>/*.pending are kept")
+    gc_parser.add_argument("--keep-per-session", type=int, default=None)
+    gc_parser.add_argument("--max-age-days", type=float, default=None)
+    gc_parser.add_argument("--max-bytes", type=int, default=None)
+    gc_parser.add_argument("--sweep-grace-seconds", type=float, default=DEFAULT_SWEEP_GRACE_SECONDS)
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    pack_dir = pathlib.Path(args.pack_dir)
+    if not pack_dir.is_dir():
+        print(f"Unsupported: pack directory not found: {pack_dir}", file=sys.stderr)
+        return 2
+    summary = gc(
+        pack_dir,
+        state_dir=pathlib.Path(args.state_dir) if args.state_dir else None,
+        keep_per_session=args.keep_per_session,
+        max_age_seconds=args.max_age_days * 86400 if args.max_age_days is not None else None,
+        max_bytes=args.max_bytes,
+        sweep_grace_seconds=args.sweep_grace_seconds,
+    )
+    json.dump(summary, sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
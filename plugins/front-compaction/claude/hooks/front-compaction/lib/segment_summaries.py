@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Hierarchical head summaries backed by a per-session segment cache.
+
+The compacted head is cut into aligned segments of ``segment_turns`` turns. A
+segment is summarized with the extractive ranker from head_summarizer, keeping
+at most BLOCK_CHARS. FANOUT neighbouring blocks of one level merge into one
+block of the next level by re-ranking their kept sentences against the same
+budget. The head is then covered from turn 1 with the largest aligned blocks
+that fit, so old turns are described by a few coarse blocks and recent turns
+by fine ones.
+
+Each block is cached under a key over the digests of the turns it covers
+(plus the settings and focus that shaped it). When a session grows, the
+aligned blocks of its older turns keep their keys. A repeated compaction
+therefore summarizes only the new segments and the merges above them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from head_summarizer import Sentence, select_sentences, split_sentences
+from token_estimator import TokenEstimator
+
+SEGMENT_TURNS = 16
+FANOUT = 4
+BLOCK_CHARS = 480
+SEGMENT_CACHE_VERSION = 1
+
+# Parsed segment caches kept warm for long-lived callers (the resident daemon),
+# keyed by the cache file's stat like the turn index cache.
+SEGMENT_CACHE: dict[pathlib.Path, tuple[tuple[int, int], dict[str, list]]] = {}
+
+TurnLoader = Callable[[int, int], list[tuple[str, str]]]
+
+
+@dataclass(frozen=True)
+class Block:
+    """``count`` head turns starting at 0-based turn ``first``, summarized at ``level``."""
+
+    level: int
+    first: int
+    count: int
+
+    def heading(self) -> str:
+        return f"Turns {self.first + 1}-{self.first + self.count}:"
+
+
+@dataclass
+class SegmentCacheStats:
+    reused_blocks: int = 0
+    built_blocks: int = 0
+    summarized_turns: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "reusedBlocks": self.reused_blocks,
+            "builtBlocks": self.built_blocks,
+            "summarizedTurns": self.summarized_turns,
+        }
+
+
+def plan_blocks(head_turns: int, segment_turns: int = SEGMENT_TURNS, fanout: int = FANOUT) -> list[Block]:
+    """Cover turns [0, head_turns) greedily with the largest aligned blocks, oldest first.
+
+    The last block is a partial level-0 segment when head_turns is not a
+    multiple of segment_turns.
+    """
+    blocks: list[Block] = []
+    first = 0
+    while first < head_turns:
+        remaining = head_turns - first
+        if remaining < segment_turns:
+            blocks.append(Block(0, first, remaining))
+            break
+        level, size = 0, segment_turns
+        while first % (size * fanout) == 0 and size * fanout <= remaining:
+            level, size = level + 1, size * fanout
+        blocks.append(Block(level, first, size))
+        first += size
+    return blocks
+
+
+def _cache_stamp(cache_path: pathlib.Path) -> tuple[int, int] | None:
+    try:
+        stat = cache_path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_segment_cache(cache_path: pathlib.Path) -> dict[str, list]:
+    stamp = _cache_stamp(cache_path)
+    cached = SEGMENT_CACHE.get(cache_path)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        return dict(cached[1])
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("version") != SEGMENT_CACHE_VERSION or not isinstance(data["blocks"], dict):
+            return {}
+        return dict(data["blocks"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def save_segment_cache(cache_path: pathlib.Path, blocks: dict[str, list]) -> None:
+    payload = {"version": SEGMENT_CACHE_VERSION, "blocks": blocks}
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Like the turn index, the cache is optional; the next run rebuilds what it needs.
+        tmp_path.unlink(missing_ok=True)
+        return
+    stamp = _cache_stamp(cache_path)
+    if stamp is not None:
+        SEGMENT_CACHE[cache_path] = (stamp, dict(blocks))
+
+
+class _BlockSummarizer:
+    def __init__(
+        self,
+        digests: list[str],
+        load_turns: TurnLoader,
+        focus: str,
+        segment_turns: int,
+        cached: dict[str, list],
+    ):
+        self.digests = digests
+        self.load_turns = load_turns
+        self.focus = focus
+        self.segment_turns = segment_turns
+        self.cached = cached
+        self.used: dict[str, list] = {}
+        self.stats = SegmentCacheStats()
+
+    def key(self, block: Block) -> str:
+        settings = [SEGMENT_CACHE_VERSION, self.segment_turns, FANOUT, BLOCK_CHARS, self.focus]
+        covered = self.digests[block.first : block.first + block.count]
+        payload = json.dumps([*settings, block.level, block.first, block.count, covered], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def sentences(self, block: Block) -> list[Sentence]:
+        key = self.key(block)
+        items = self.used.get(key)
+        if items is None:
+            items = self.cached.get(key)
+            if items is not None:
+                self.stats.reused_blocks += 1
+            else:
+                items = [[s.turn, s.role, s.position, s.text] for s in self._build(block)]
+                self.stats.built_blocks += 1
+            self.used[key] = items
+        return [Sentence.from_text(turn, role, position, text) for turn, role, position, text in items]
+
+    def _build(self, block: Block) -> list[Sentence]:
+        if block.level == 0:
+            turns = self.load_turns(block.first, block.count)
+            self.stats.summarized_turns += len(turns)
+            candidates = split_sentences(turns, first_turn=block.first + 1)
+        else:
+            child_size = block.count // FANOUT
+            candidates = []
+            for idx in range(FANOUT):
+                child = Block(block.level - 1, block.first + idx * child_size, child_size)
+                candidates.extend(self.sentences(child))
+        return select_sentences(candidates, self.focus, BLOCK_CHARS)
+
+
+def hierarchical_highlights(
+    digests: list[str],
+    load_turns: TurnLoader,
+    focus: str,
+    max_chars: int,
+    max_tokens: int | None = None,
+    estimator: TokenEstimator | None = None,
+    cache_path: pathlib.Path | None = None,
+    segment_turns: int = SEGMENT_TURNS,
+) -> tuple[list[str], SegmentCacheStats]:
+    """Summary lines for the head turns described by ``digests`` (one per turn, oldest first).
+
+    ``load_turns(first, count)`` returns the (user, assistant) text of head turns
+    [first, first + count); it is only called for segments missing from the cache.
+    Blocks are added newest first while they fit max_chars (and max_tokens);
+    older blocks that do not fit are replaced by one "omitted" line. The cache
+    file keeps exactly the blocks this run used or built.
+    """
+    cached = load_segment_cache(cache_path) if cache_path is not None else {}
+    summarizer = _BlockSummarizer(digests, load_turns, focus, segment_turns, cached)
+    blocks = plan_blocks(len(digests), segment_turns)
+
+    omitted_note = f"Turns 1-{len(digests)}: omitted to fit the head budget"
+    chars_left = max_chars - len(omitted_note) - 1
+    tokens_left = None
+    if max_tokens is not None and estimator is not None:
+        tokens_left = max_tokens - estimator.count(omitted_note) - 1
+
+    # Every planned block is summarized, even one that will not fit, so the
+    # cache always holds the children of the next merge.
+    rendered = [[block.heading(), *(s.render() for s in summarizer.sentences(block))] for block in blocks]
+
+    kept: list[list[str]] = []
+    for lines in reversed(rendered):
+        chars = sum(len(line) + 1 for line in lines)
+        tokens = sum(estimator.count(line) + 1 for line in lines) if tokens_left is not None else 0
+        if chars > chars_left or (tokens_left is not None and tokens > tokens_left):
+            break
+        kept.append(lines)
+        chars_left -= chars
+        if tokens_left is not None:
+            tokens_left -= tokens
+
+    if cache_path is not None and summarizer.used != cached:
+        save_segment_cache(cache_path, summarizer.used)
+
+    highlight_lines: list[str] = []
+    if len(kept) < len(blocks):
+        omitted = blocks[len(blocks) - len(kept) - 1]
+        highlight_lines.append(f"Turns 1-{omitted.first + omitted.count}: omitted to fit the head budget")
+    for lines in reversed(kept):
+        highlight_lines.extend(lines)
+    return highlight_lines, summarizer.stats
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Offline token estimators for front-compaction context packs.
+
+Estimators must treat every newline as its own one-token piece. The estimate
+for blocks joined with "\\n" is then (sum of block estimates) + (number of
+separators), and build_context_pack relies on that to select budgets with
+prefix sums.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import math
+import pathlib
+import re
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Protocol
+
+TABLE_PATH = pathlib.Path(__file__).resolve().with_name("token_table.json")
+
+# Pieces never span a newline, so estimates are local to each line.
+_PIECE_PATTERN = re.compile(r"\n| ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|[^\S\n]+")
+_CACHE_SIZE = 4096
+# Replay-sized texts are counted too, so count caches are also bounded by characters held.
+_CACHE_MAX_CHARS = 1 << 20
+
+
+class TokenEstimator(Protocol):
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+class _CountCache:
+    """Per-estimator LRU of text -> token count, bounded by entries and by total characters.
+
+    Estimators live as long as the process (see get_estimator), which under the
+    resident daemon means indefinitely.
+    """
+
+    def __init__(self, compute: Callable[[str], int], max_entries: int = _CACHE_SIZE, max_chars: int = _CACHE_MAX_CHARS):
+        self._compute = compute
+        self._max_entries = max_entries
+        self._max_chars = max_chars
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._chars = 0
+
+    def __call__(self, text: str) -> int:
+        count = self._entries.get(text)
+        if count is not None:
+            self._entries.move_to_end(text)
+            return count
+        count = self._compute(text)
+        if len(text) <= self._max_chars:
+            self._entries[text] = count
+            self._chars += len(text)
+            while len(self._entries) > self._max_entries or self._chars > self._max_chars:
+                evicted, _ = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+        return count
+
+
+class CharRatioTokenEstimator:
+    """Rule-of-thumb estimate: one token per four characters, per line."""
+
+    name = "chars"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self._counts = _CountCache(self._count)
+
+    def count(self, text: str) -> int:
+        return self._counts(text)
+
+    def _count(self, text: str) -> int:
+        lines = text.split("\n")
+        return sum(math.ceil(len(line) / self.chars_per_token) for line in lines) + len(lines) - 1
+
+
+class TableTokenEstimator:
+    """BPE-style estimate from the approximation table shipped in token_table.json.
+
+    Text is pre-tokenized like byte-level BPE tokenizers (a leading space is glued
+    to the following word). Known words cost one token. Unknown ASCII words are
+    split greedily into the longest known subwords, where each leftover character
+    costs one token, capped by the table's average chars-per-token for words.
+    Other piece kinds use the table's per-class ratios.
+    """
+
+    name = "table"
+
+    def __init__(self, table: dict):
+        self.words = frozenset(table["wordTokens"])
+        self.subwords = frozenset(table["subwordTokens"])
+        self.max_subword_chars = int(table["maxSubwordChars"])
+        self.ascii_word_chars_per_token = float(table["asciiWordCharsPerToken"])
+        self.non_ascii_bytes_per_token = float(table["nonAsciiBytesPerToken"])
+        self.digits_per_token = float(table["digitsPerToken"])
+        self.punctuation_chars_per_token = float(table["punctuationCharsPerToken"])
+        self.spaces_per_token = float(table["spacesPerToken"])
+        self._counts = _CountCache(self._count)
+        self._word_tokens = functools.lru_cache(maxsize=_CACHE_SIZE)(self._split_word_tokens)
+
+    @classmethod
+    def load(cls, path: pathlib.Path = TABLE_PATH) -> TableTokenEstimator:
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def count(self, text: str) -> int:
+        return self._counts(text)
+
+    def _count(self, text: str) -> int:
+        return sum(self._piece_tokens(piece) for piece in _PIECE_PATTERN.findall(text))
+
+    def _piece_tokens(self, piece: str) -> int:
+        if piece == "\n":
+            return 1
+        word = piece[1:] if piece[0] == " " and len(piece) > 1 else piece
+        first = word[0]
+        if first.isspace():
+            return math.ceil(len(word) / self.spaces_per_token)
+        if first.isdigit():
+            return math.ceil(len(word) / self.digits_per_token)
+        if not first.isalpha():
+            return math.ceil(len(word) / self.punctuation_chars_per_token)
+        if not word.isascii():
+            return math.ceil(len(word.encode("utf-8")) / self.non_ascii_bytes_per_token)
+        return self._word_tokens(word.lower())
+
+    def _split_word_tokens(self, word: str) -> int:
+        if word in self.words:
+            return 1
+        tokens = 0
+        pos = 0
+        while pos < len(word):
+            for size in range(min(self.max_subword_chars, len(word) - pos), 0, -1):
+                if size == 1 or word[pos : pos + size] in self.subwords or word[pos : pos + size] in self.words:
+                    pos += size
+                    tokens += 1
+                    break
+        return min(tokens, math.ceil(len(word) / self.ascii_word_chars_per_token))
+
+
+ESTIMATORS: dict[str, Callable[[], TokenEstimator]] = {
+    "table": TableTokenEstimator.load,
+    "chars": CharRatioTokenEstimator,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_estimator(name: str) -> TokenEstimator:
+    try:
+        factory = ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(f"unknown token estimator '{name}' (available: {', '.join(sorted(ESTIMATORS))})") from None
+    return factory()
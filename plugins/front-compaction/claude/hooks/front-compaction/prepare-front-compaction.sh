@@ -69,18 +69,54 @@ if [[ -z "$transcript_path" || ! -f "$transcript_path" ]]; then
   exit 2
 fi
 
+token_budget_args=()
+if [[ -n "${FRONT_COMPACTION_MAX_HEAD_TOKENS:-}" ]]; then
+  token_budget_args+=(--max-head-tokens "$FRONT_COMPACTION_MAX_HEAD_TOKENS")
+fi
+if [[ -n "${FRONT_COMPACTION_MAX_TAIL_TOKENS:-}" ]]; then
+  token_budget_args+=(--max-tail-tokens "$FRONT_COMPACTION_MAX_TAIL_TOKENS")
+fi
+if [[ -n "${FRONT_COMPACTION_MAX_REPLAY_TOKENS:-}" ]]; then
+  token_budget_args+=(--max-replay-tokens "$FRONT_COMPACTION_MAX_REPLAY_TOKENS")
+fi
+
+daemon_status=0
+fc_daemon_call prepare \
+  "sessionId=$session_id" \
+  "transcriptPath=$transcript_path" \
+  "percent=$percent" \
+  "focus=$focus" \
+  "maxKeep=$FRONT_COMPACTION_MAX_KEEP_PER_SESSION" \
+  "maxPackAgeDays=${FRONT_COMPACTION_MAX_PACK_AGE_DAYS:-}" \
+  "maxPackBytes=${FRONT_COMPACTION_MAX_PACK_BYTES:-}" \
+  "packFormat=${FRONT_COMPACTION_PACK_FORMAT:-1}" \
+  "summarizer=${FRONT_COMPACTION_SUMMARIZER:-first-line}" \
+  "maxHeadTokens=${FRONT_COMPACTION_MAX_HEAD_TOKENS:-}" \
+  "maxTailTokens=${FRONT_COMPACTION_MAX_TAIL_TOKENS:-}" \
+  "maxReplayTokens=${FRONT_COMPACTION_MAX_REPLAY_TOKENS:-}" || daemon_status=$?
+if [[ "$daemon_status" -ne "$FC_DAEMON_UNAVAILABLE" ]]; then
+  exit "$daemon_status"
+fi
+
 tmp_json=$(mktemp)
 tmp_err=$(mktemp)
 trap 'rm -f "$tmp_json" "$tmp_err"' EXIT
 
+# Batch mode with a single session: the builder writes the pack and the
+# latest-* link atomically and prints a one-line summary for the shell.
 if python3 "$SCRIPT_DIR/lib/build_context_pack.py" \
-  --transcript-path "$transcript_path" \
-  --session-id "$session_id" \
+  --pack-dir "$FRONT_COMPACTION_PACK_DIR" \
+  --session "$session_id=$transcript_path" \
+  --jobs 1 \
   --percent "$percent" \
   --focus "$focus" \
   --max-head-chars 4000 \
   --max-tail-chars 16000 \
-  --max-replay-chars 19000 > "$tmp_json" 2> "$tmp_err"; then
+  --max-replay-chars 19000 \
+  --pack-format "${FRONT_COMPACTION_PACK_FORMAT:-1}" \
+  --summarizer "${FRONT_COMPACTION_SUMMARIZER:-first-line}" \
+  --index-path "$(fc_turn_index_path "$session_id")" \
+  ${token_budget_args[@]+"${token_budget_args[@]}"} > "$tmp_json" 2> "$tmp_err"; then
   :
 else
   status=$?
@@ -90,18 +126,13 @@ else
   exit "$status"
 fi
 
-ts=$(date -u +"%Y%m%dT%H%M%SZ")
-pack_path=$(fc_pack_path "$session_id" "$ts")
-cp "$tmp_json" "$pack_path"
+IFS=$'\t' read -r pack_path compacted total kept < <(
+  jq -r '.packs[0] | [.packPath, .compactedTurns, .totalTurns, .keptTurns] | @tsv' "$tmp_json"
+)
 
-ln -sfn "$pack_path" "$(fc_latest_link "$session_id")"
 printf '%s\n' "$pack_path" > "$(fc_pending_path "$session_id")"
 
-fc_cleanup_old_packs "$session_id"
-
-compacted=$(jq -r '.session.compactedTurns' "$pack_path")
-total=$(jq -r '.session.totalTurns' "$pack_path")
-kept=$(jq -r '.session.keptTurns' "$pack_path")
+fc_gc_packs
 
 fc_log_event "prepare" "success" "$session_id" "prepared compacted=${compacted} total=${total} kept=${kept}" "$percent" "$pack_path"
 
@@ -6,10 +6,18 @@ SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 # shellcheck source=./lib/context-pack.sh
 source "$SCRIPT_DIR/lib/context-pack.sh"
 
+input=$(cat)
+
+daemon_status=0
+printf '%s' "$input" | fc_daemon_call reinject --stdin || daemon_status=$?
+if [[ "$daemon_status" -ne "$FC_DAEMON_UNAVAILABLE" ]]; then
+  exit "$daemon_status"
+fi
+
+# Only the standalone path below needs these.
 fc_require_cmds jq shasum
 fc_ensure_dirs
 
-input=$(cat)
 source_event=$(printf '%s' "$input" | jq -r '.source // empty')
 session_id=$(printf '%s' "$input" | jq -r '.session_id // empty')
 
@@ -37,6 +45,28 @@ if [[ -z "$pack_path" || ! -f "$pack_path" ]]; then
   exit 0
 fi
 
+if fc_pack_needs_reader "$pack_path"; then
+  # schemaVersion "2"/"3": the reader checks the sha256 against the streamed
+  # replay before it writes anything, then streams the hook JSON straight to
+  # stdout. No field is extracted through jq.
+  fc_require_cmds python3
+  tmp_status=$(mktemp)
+  trap 'rm -f "$tmp_status"' EXIT
+  emit_status=0
+  python3 "$SCRIPT_DIR/lib/context_pack_format.py" reinject "$pack_path" "$session_id" 2> "$tmp_status" \
+    || emit_status=$?
+  IFS=$'\t' read -r reader_result reader_info < "$tmp_status" || true
+  if [[ "$emit_status" -ne 0 ]]; then
+    rm -f "$pending_file"
+    fc_log_event "reinject" "error" "$session_id" "${reader_result:-context pack reader failed}" "" "$pack_path"
+    echo "Unsupported: ${reader_info:-context pack could not be read.}" >&2
+    exit 0
+  fi
+  fc_log_event "reinject" "success" "$session_id" "replay injected on SessionStart(compact)" "$reader_info" "$pack_path"
+  rm -f "$pending_file"
+  exit 0
+fi
+
 schema=$(jq -r '.schemaVersion // empty' "$pack_path")
 pack_session_id=$(jq -r '.session.sessionId // empty' "$pack_path")
 replay_content=$(jq -r '.replay.content // empty' "$pack_path")
@@ -7,6 +7,7 @@ PREPARE_SCRIPT="$SCRIPT_DIR/prepare-front-compaction.sh"
 REINJECT_SCRIPT="$SCRIPT_DIR/reinject-after-compact.sh"
 FIXTURE_OK="$SCRIPT_DIR/testdata/transcript-6-turns.jsonl"
 FIXTURE_SHORT="$SCRIPT_DIR/testdata/transcript-2-turns.jsonl"
+FIXTURE_TOOL_USE="$SCRIPT_DIR/testdata/transcript-tool-use.jsonl"
 
 if ! command -v jq >/dev/null 2>&1; then
   echo "jq is required" >&2
@@ -32,7 +33,7 @@ assert_contains() {
   fi
 }
 
-echo "[1/6] prepare should succeed for 50% with 6 complete turns"
+echo "[1/15] prepare should succeed for 50% with 6 complete turns"
 out_prepare=$(
   "$PREPARE_SCRIPT" \
     --session-id "$session_id" \
@@ -58,7 +59,7 @@ fi
 jq -e '.mode == "hard" and .percent == 50 and .session.totalTurns == 6 and .session.compactedTurns == 3 and .session.keptTurns == 3' "$pack_path" >/dev/null
 
 
-echo "[2/6] reinject hook should emit SessionStart additionalContext JSON"
+echo "[2/15] reinject hook should emit SessionStart additionalContext JSON"
 hook_input=$(jq -n --arg sid "$session_id" '{hook_event_name:"SessionStart", source:"compact", session_id:$sid}')
 out_reinject=$(printf '%s' "$hook_input" | "$REINJECT_SCRIPT")
 
@@ -71,7 +72,7 @@ if [[ -f "$pending_file" ]]; then
 fi
 
 
-echo "[3/6] invalid percent should fail with clear message and clear stale pending"
+echo "[3/15] invalid percent should fail with clear message and clear stale pending"
 out_prepare_again=$(
   "$PREPARE_SCRIPT" \
     --session-id "$session_id" \
@@ -101,7 +102,7 @@ if [[ -f "$pending_file" ]]; then
 fi
 
 
-echo "[4/6] insufficient turns should fail with Unsupported"
+echo "[4/15] insufficient turns should fail with Unsupported"
 short_stdout=$(mktemp)
 short_stderr=$(mktemp)
 if "$PREPARE_SCRIPT" --session-id "$session_id" --transcript-path "$FIXTURE_SHORT" 50 >"$short_stdout" 2>"$short_stderr"; then
@@ -114,7 +115,7 @@ rm -f "$short_stdout" "$short_stderr"
 assert_contains "Unsupported:" "$short_err"
 
 
-echo "[5/6] compact SessionStart without pending pack should be no-op"
+echo "[5/15] compact SessionStart without pending pack should be no-op"
 out_noop=$(printf '%s' "$hook_input" | "$REINJECT_SCRIPT")
 if [[ -n "$out_noop" ]]; then
   echo "Expected empty output when no pending pack exists" >&2
@@ -122,7 +123,229 @@ if [[ -n "$out_noop" ]]; then
   exit 1
 fi
 
-echo "[6/6] logs should contain prepare/reinject events"
+echo "[6/15] tool-use and tool-result lines should not split or leak into turns"
+tool_session_id="test-session-front-compaction-tools"
+"$PREPARE_SCRIPT" --session-id "$tool_session_id" --transcript-path "$FIXTURE_TOOL_USE" 40 >/dev/null
+tool_pack_path=$(cat "$FRONT_COMPACTION_ROOT/state/${tool_session_id}.pending")
+jq -e '.session.totalTurns == 5 and .session.compactedTurns == 2 and .tailRaw.turnCount == 3' "$tool_pack_path" >/dev/null
+jq -e '.replay.content | contains("Running the suite now.") and (contains("3 passed") | not)' "$tool_pack_path" >/dev/null
+jq -e '.toolActivity.head == {"toolCalls": 2, "toolResultBytes": 541, "filesTouched": ["/repo/src/config.py"]} and .toolActivity.turns.toolCalls == [1, 1, 1, 0, 0]' \
+  "$tool_pack_path" >/dev/null
+jq -e '.headSummary.content | contains("Head tool activity: 2 tool calls") and contains("[1 tool call; 0.3 KB tool output; files: /repo/src/config.py]")' \
+  "$tool_pack_path" >/dev/null
+
+echo "[7/15] turn index should pick up appended turns and rebuild after rewrites"
+index_session_id="test-session-front-compaction-index"
+growing_transcript="$tmp_root/growing-transcript.jsonl"
+index_file="$FRONT_COMPACTION_ROOT/state/${index_session_id}.turn-index.json"
+head -n 8 "$FIXTURE_OK" > "$growing_transcript"
+"$PREPARE_SCRIPT" --session-id "$index_session_id" --transcript-path "$growing_transcript" 50 >/dev/null
+if [[ ! -f "$index_file" ]]; then
+  echo "Turn index not created: $index_file" >&2
+  exit 1
+fi
+jq -e '.turns.start | length == 3' "$index_file" >/dev/null
+tail -n +9 "$FIXTURE_OK" >> "$growing_transcript"
+"$PREPARE_SCRIPT" --session-id "$index_session_id" --transcript-path "$growing_transcript" 50 >/dev/null
+jq -e '.session.totalTurns == 6 and (.replay.content | contains("Turn 6 assistant: provided rollout checklist."))' \
+  "$(cat "$FRONT_COMPACTION_ROOT/state/${index_session_id}.pending")" >/dev/null
+index_mtime() { python3 -c 'import os, sys; print(os.stat(sys.argv[1]).st_mtime_ns)' "$index_file"; }
+index_stamp=$(index_mtime)
+"$PREPARE_SCRIPT" --session-id "$index_session_id" --transcript-path "$growing_transcript" 50 >/dev/null
+if [[ "$(index_mtime)" != "$index_stamp" ]]; then
+  echo "Expected the turn index not to be rewritten when no turns were appended" >&2
+  exit 1
+fi
+cp "$FIXTURE_SHORT" "$growing_transcript"
+if "$PREPARE_SCRIPT" --session-id "$index_session_id" --transcript-path "$growing_transcript" 50 >/dev/null 2>&1; then
+  echo "Expected prepare to rebuild the index and fail after the transcript shrank" >&2
+  exit 1
+fi
+
+echo "[8/15] token budgets should cap the replay and be recorded in the pack"
+token_session_id="test-session-front-compaction-tokens"
+FRONT_COMPACTION_MAX_REPLAY_TOKENS=200 \
+  "$PREPARE_SCRIPT" --session-id "$token_session_id" --transcript-path "$FIXTURE_OK" 50 >/dev/null
+token_pack_path=$(cat "$FRONT_COMPACTION_ROOT/state/${token_session_id}.pending")
+jq -e '.limits.maxReplayTokens == 200 and .replay.tokenCount <= 200 and .tailRaw.truncated == true and (.headSummary.tokenCount | type == "number")' \
+  "$token_pack_path" >/dev/null
+
+echo "[9/15] extractive summarizer should rank focus-related head sentences first"
+extractive_session_id="test-session-front-compaction-extractive"
+FRONT_COMPACTION_SUMMARIZER=extractive FRONT_COMPACTION_MAX_HEAD_TOKENS=55 \
+  "$PREPARE_SCRIPT" --session-id "$extractive_session_id" --transcript-path "$FIXTURE_OK" 50 constraints and trade-offs >/dev/null
+extractive_pack_path=$(cat "$FRONT_COMPACTION_ROOT/state/${extractive_session_id}.pending")
+jq -e '.headSummary.summarizer == "extractive" and .headSummary.tokenCount <= 55 and (.headSummary.content | contains("captured constraints and trade-offs"))' \
+  "$extractive_pack_path" >/dev/null
+# numpy is optional (requirements-optional.txt): when it is installed, both scorers must rank alike.
+python3 "$SCRIPT_DIR/bench/generate_transcript.py" --out "$tmp_root/ranking.jsonl" --turns 400 --seed 7 >/dev/null 2>&1
+python3 - "$SCRIPT_DIR/lib" "$tmp_root/ranking.jsonl" <<'PY'
+import sys
+
+lib, transcript = sys.argv[1:3]
+sys.path.insert(0, lib)
+import build_context_pack as bcp
+import head_summarizer as hs
+
+if hs.np is None:
+    print("  numpy not installed: only the pure-Python scorer ran")
+    raise SystemExit(0)
+
+score_sentences = hs.score_sentences
+checked = []
+
+
+def both_paths(sentences, focus, use_numpy=None):
+    fast = score_sentences(sentences, focus, use_numpy=True)
+    slow = score_sentences(sentences, focus, use_numpy=False)
+    order = lambda scores: sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+    if order(fast) != order(slow):
+        raise SystemExit(f"numpy and pure-Python scoring rank {len(sentences)} sentences differently (focus {focus!r})")
+    checked.append(len(sentences))
+    return slow
+
+
+hs.score_sentences = both_paths
+for summarizer in ("extractive", "hierarchical"):
+    for focus in ("", "config retries and trade-offs", "tests failing in src"):
+        sys.argv = [
+            "build_context_pack.py", "--transcript-path", transcript, "--session-id", "ranking",
+            "--percent", "60", "--summarizer", summarizer, "--focus", focus, "--max-head-tokens", "800",
+        ]
+        bcp.build_context_pack(bcp.parse_args())
+if not checked:
+    raise SystemExit("expected the extractive summarizers to score sentences")
+print(f"  numpy and pure-Python rankings agree on {sum(checked)} sentences")
+PY
+
+echo "[10/15] hierarchical summarizer should reuse cached segment summaries as the head grows"
+hierarchical_dir="$tmp_root/hierarchical"
+mkdir -p "$hierarchical_dir"
+for percent in 50 67; do
+  python3 "$SCRIPT_DIR/lib/build_context_pack.py" --transcript-path "$FIXTURE_OK" \
+    --session-id "test-session-front-compaction-hierarchical" --percent "$percent" \
+    --summarizer hierarchical --segment-turns 1 \
+    --index-path "$hierarchical_dir/hierarchical.turn-index.json" > "$hierarchical_dir/pack-$percent.json"
+done
+jq -e '.headSummary.segments == {"segmentTurns": 1, "reusedBlocks": 0, "builtBlocks": 3, "summarizedTurns": 3}' \
+  "$hierarchical_dir/pack-50.json" >/dev/null
+jq -e '.headSummary.segments == {"segmentTurns": 1, "reusedBlocks": 3, "builtBlocks": 2, "summarizedTurns": 1}
+  and (.headSummary.content | contains("Turns 1-4:"))' "$hierarchical_dir/pack-67.json" >/dev/null
+jq -e '.blocks | length == 5' "$hierarchical_dir/hierarchical.segments.json" >/dev/null
+
+echo "[11/15] batch builder should write packs for many sessions and report failures per session"
+batch_dir="$tmp_root/batch"
+mkdir -p "$batch_dir/projects/repo"
+cp "$FIXTURE_OK" "$batch_dir/projects/repo/batch-ok.jsonl"
+cp "$FIXTURE_TOOL_USE" "$batch_dir/projects/repo/batch-tools.jsonl"
+cp "$FIXTURE_SHORT" "$batch_dir/projects/repo/batch-short.jsonl"
+if python3 "$SCRIPT_DIR/lib/build_context_pack.py" --percent 50 --jobs 2 \
+  --pack-dir "$batch_dir/packs" --index-dir "$batch_dir/state" \
+  --projects-glob "$batch_dir/projects/*/*.jsonl" > "$batch_dir/summary.json" 2>/dev/null; then
+  echo "Expected batch build to exit non-zero when one session is unsupported" >&2
+  exit 1
+fi
+jq -e '.ok == 2 and .failed == 1 and ([.packs[] | select(.status == "unsupported") | .sessionId] == ["batch-short"])' \
+  "$batch_dir/summary.json" >/dev/null
+jq -e '.session.sessionId == "batch-tools"' "$batch_dir/packs/latest-batch-tools.json" >/dev/null
+if [[ ! -f "$batch_dir/state/batch-ok.turn-index.json" ]]; then
+  echo "Expected batch build to write per-session turn indexes" >&2
+  exit 1
+fi
+(cd "$batch_dir" && python3 "$SCRIPT_DIR/lib/build_context_pack.py" --percent 50 \
+  --pack-dir rel-packs --session "batch-tools=projects/repo/batch-tools.jsonl" > rel-summary.json)
+jq -e '.packs[0].packPath | startswith("/")' "$batch_dir/rel-summary.json" >/dev/null
+jq -e '.session.sessionId == "batch-tools"' "$batch_dir/rel-packs/latest-batch-tools.json" >/dev/null
+if [[ "$(readlink "$batch_dir/rel-packs/latest-batch-tools.json")" == */* ]]; then
+  echo "Expected latest-* links to point at a file name in the pack directory" >&2
+  exit 1
+fi
+
+echo "[12/15] schemaVersion 2 packs should store the replay once and reinject after verification"
+binary_session_id="test-session-front-compaction-binary"
+FRONT_COMPACTION_PACK_FORMAT=2 \
+  "$PREPARE_SCRIPT" --session-id "$binary_session_id" --transcript-path "$FIXTURE_OK" 50 >/dev/null
+binary_pack_path=$(cat "$FRONT_COMPACTION_ROOT/state/${binary_session_id}.pending")
+if [[ "$binary_pack_path" != *.pack || "$(head -c 4 "$binary_pack_path")" != "FCPK" ]]; then
+  echo "Expected a binary pack, got: $binary_pack_path" >&2
+  exit 1
+fi
+python3 "$SCRIPT_DIR/lib/context_pack_format.py" show "$binary_pack_path" \
+  | jq -e '.tailRaw.content as $tail | .schemaVersion == "2" and ($tail | contains("Turn 6 assistant: provided rollout checklist.")) and (.replay.content | endswith($tail))' >/dev/null
+binary_reinject_out=$(printf '%s' "{\"source\":\"compact\",\"session_id\":\"$binary_session_id\"}" | "$REINJECT_SCRIPT")
+printf '%s' "$binary_reinject_out" | jq -e '.hookSpecificOutput.additionalContext | startswith("## Front Compaction Replay (hard mode)")' >/dev/null
+FRONT_COMPACTION_PACK_FORMAT=2 \
+  "$PREPARE_SCRIPT" --session-id "$binary_session_id" --transcript-path "$FIXTURE_OK" 50 >/dev/null
+binary_pack_path=$(cat "$FRONT_COMPACTION_ROOT/state/${binary_session_id}.pending")
+# Flip one byte of the sha256 stored in the header (bytes 28..59).
+python3 - "$binary_pack_path" <<'PY'
+import sys
+with open(sys.argv[1], "r+b") as handle:
+    handle.seek(40)
+    byte = handle.read(1)[0]
+    handle.seek(40)
+    handle.write(bytes([byte ^ 0xFF]))
+PY
+tampered_err=$(printf '%s' "{\"source\":\"compact\",\"session_id\":\"$binary_session_id\"}" | "$REINJECT_SCRIPT" 2>&1 >/dev/null)
+assert_contains "Unsupported: context pack integrity check failed." "$tampered_err"
+
+echo "[13/15] schemaVersion 3 manifests should share chunks and the global gc should sweep them"
+store_root="$tmp_root/front-compaction-store"
+store_dir="$store_root/context-pack/store/chunks"
+for store_session_id in test-session-front-compaction-store-a test-session-front-compaction-store-b; do
+  FRONT_COMPACTION_ROOT="$store_root" FRONT_COMPACTION_PACK_FORMAT=3 \
+    "$PREPARE_SCRIPT" --session-id "$store_session_id" --transcript-path "$FIXTURE_OK" 50 >/dev/null
+done
+store_pack_path=$(cat "$store_root/state/test-session-front-compaction-store-b.pending")
+chunk_refs=$(jq '.replay.chunks | length' "$store_pack_path")
+chunk_files=$(find "$store_dir" -type f | wc -l | tr -d ' ')
+if [[ "$chunk_files" -ne "$chunk_refs" ]]; then
+  echo "Expected two identical replays to share $chunk_refs chunks, found $chunk_files chunk files" >&2
+  exit 1
+fi
+store_reinject_out=$(printf '%s' '{"source":"compact","session_id":"test-session-front-compaction-store-b"}' \
+  | FRONT_COMPACTION_ROOT="$store_root" "$REINJECT_SCRIPT")
+printf '%s' "$store_reinject_out" | jq -e '.hookSpecificOutput.additionalContext | contains("Turn 6 assistant: provided rollout checklist.")' >/dev/null
+# Session a still has a pending marker, so its manifest (and the shared chunks) must survive.
+python3 "$SCRIPT_DIR/lib/pack_store.py" gc --pack-dir "$store_root/context-pack" \
+  --state-dir "$store_root/state" --keep-per-session 0 --sweep-grace-seconds 0 \
+  | jq -e '.keptPacks == 1 and .removedChunks == 0' >/dev/null
+rm -f "$store_root/state/test-session-front-compaction-store-a.pending"
+python3 "$SCRIPT_DIR/lib/pack_store.py" gc --pack-dir "$store_root/context-pack" \
+  --state-dir "$store_root/state" --keep-per-session 0 --sweep-grace-seconds 0 >/dev/null
+if [[ -n "$(find "$store_dir" -type f)" || -n "$(find "$store_root/context-pack" -maxdepth 1 -type f -name '*.json')" ]]; then
+  echo "Expected gc with keep-per-session 0 to remove every unpinned pack and chunk" >&2
+  exit 1
+fi
+
+echo "[14/15] hooks should go through the resident daemon when it is running"
+daemon_socket="$FRONT_COMPACTION_ROOT/state/daemon.sock"
+python3 "$SCRIPT_DIR/lib/front_compaction_daemon.py" serve --root "$FRONT_COMPACTION_ROOT" 2>/dev/null &
+daemon_pid=$!
+trap 'kill "$daemon_pid" 2>/dev/null || true; rm -rf "$tmp_root"' EXIT
+for _ in $(seq 50); do
+  [[ -S "$daemon_socket" ]] && break
+  sleep 0.1
+done
+daemon_session_id="test-session-front-compaction-daemon"
+daemon_prepare_out=$("$PREPARE_SCRIPT" --session-id "$daemon_session_id" --transcript-path "$FIXTURE_OK" 50 focus on config)
+assert_contains "Front compaction prepared (50%, hard)." "$daemon_prepare_out"
+daemon_reinject_out=$(printf '%s' "{\"source\":\"compact\",\"session_id\":\"$daemon_session_id\"}" | "$REINJECT_SCRIPT")
+printf '%s' "$daemon_reinject_out" | jq -e '.hookSpecificOutput.additionalContext | contains("Turn 6 assistant: provided rollout checklist.")' >/dev/null
+if [[ -f "$FRONT_COMPACTION_ROOT/state/${daemon_session_id}.pending" ]]; then
+  echo "Expected daemon reinject to clear the pending marker" >&2
+  exit 1
+fi
+python3 "$SCRIPT_DIR/lib/front_compaction_daemon.py" call --socket "$daemon_socket" status \
+  | jq -e '.requests.prepare == 1 and .requests.reinject == 1 and .cachedTurnIndexes == 1' >/dev/null
+python3 "$SCRIPT_DIR/lib/front_compaction_daemon.py" call --socket "$daemon_socket" shutdown >/dev/null
+wait "$daemon_pid"
+if [[ -e "$daemon_socket" ]]; then
+  echo "Expected daemon to remove its socket on shutdown" >&2
+  exit 1
+fi
+
+echo "[15/15] logs should contain prepare/reinject events"
 log_file="$FRONT_COMPACTION_ROOT/logs/front-compaction.jsonl"
 if [[ ! -f "$log_file" ]]; then
   echo "Expected log file to exist: $log_file" >&2
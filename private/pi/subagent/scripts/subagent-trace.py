@@ -1,13 +1,53 @@
 #!/usr/bin/env python3
 
 import argparse
+import contextlib
+import datetime as dt
+import fcntl
+import gzip
+import hashlib
+import heapq
+import itertools
 import json
+import math
+import os
+import sqlite3
 import sys
-from collections import defaultdict
+import time
+from collections import Counter, defaultdict
 from pathlib import Path
 
 DEFAULT_TRACE = Path.home() / ".pi" / "agent" / "logs" / "subagent-trace.jsonl"
 
+# Sidecar SQLite index: per-root byte spans plus the collect_roots() aggregates,
+# updated from the last indexed offset on every command.
+INDEX_SUFFIX = ".index.sqlite"
+INDEX_VERSION = 2
+INDEX_FLUSH_ROWS = 50_000
+# Spans of one root closer than this are read with a single seek; the lines in
+# between are decoded and filtered out.
+SPAN_MERGE_GAP = 64 * 1024
+FINGERPRINT_MAX_BYTES = 64 * 1024
+TOP_K = 5
+# Timestamps are logged per event, so a child may appear to end a few ms after
+# its container or after the sibling that took over its slot.
+CHAIN_TOLERANCE_MS = 50
+# `stats` percentiles come from log-bucketed sketches with this relative error.
+SKETCH_ACCURACY = 0.01
+STATS_QUANTILES = (0.5, 0.95, 0.99)
+# Writers append independently, so trace timestamps are only roughly ordered;
+# the window search starts (and stops) this far outside the requested bounds.
+TRACE_SKEW = dt.timedelta(minutes=1)
+WINDOW_SEARCH_MIN_BYTES = 64 * 1024
+FAILURE_RATE_REGRESSION = 0.05
+# `compact` moves finished roots into <trace>.archive/<day>-<n>.jsonl.gz segments,
+# one gzip member per root, next to a <day>-<n>.summary.json table.
+ARCHIVE_SUFFIX = ".archive"
+ARCHIVE_VERSION = 1
+SEGMENT_DATA_SUFFIX = ".jsonl.gz"
+SEGMENT_SUMMARY_SUFFIX = ".summary.json"
+COMPACT_KEEP_DAYS = 7
+
 
 def fmt_ms(value):
     if value is None:
@@ -43,90 +83,384 @@ def classify_error(stderr_tail):
     return "error"
 
 
-def load_events(path):
-    events = []
+def parse_event(raw, line_no):
+    line = raw.strip()
+    if not line:
+        return None
     try:
-        with path.open("r", encoding="utf-8") as handle:
-            for line_no, line in enumerate(handle, start=1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                event["_line"] = line_no
-                events.append(event)
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    event["_line"] = line_no
+    return event
+
+
+def require_trace(path):
+    if not path.is_file():
+        print(f"trace file not found: {path}", file=sys.stderr)
+        sys.exit(1)
+
+
+def iter_events(path):
+    """Yield trace events one at a time, tagged with their 1-based line number."""
+    try:
+        with path.open("rb") as handle:
+            for line_no, raw in enumerate(handle, start=1):
+                event = parse_event(raw, line_no)
+                if event is not None:
+                    yield event
     except FileNotFoundError:
         print(f"trace file not found: {path}", file=sys.stderr)
         sys.exit(1)
-    return events
 
 
-def collect_roots(events):
+def index_path_for(trace):
+    return trace.with_name(trace.name + INDEX_SUFFIX)
+
+
+def trace_fingerprint(handle):
+    handle.seek(0)
+    return hashlib.sha256(handle.readline(FINGERPRINT_MAX_BYTES)).hexdigest()
+
+
+def create_index_schema(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS roots (root_id TEXT PRIMARY KEY, start_line INTEGER, summary TEXT);
+        CREATE INDEX IF NOT EXISTS roots_start_line ON roots (start_line);
+        CREATE TABLE IF NOT EXISTS spans (root_id TEXT, start_offset INTEGER, end_offset INTEGER, first_line INTEGER);
+        CREATE INDEX IF NOT EXISTS spans_root ON spans (root_id, start_offset);
+        CREATE TABLE IF NOT EXISTS invocations (invocation_id TEXT PRIMARY KEY, root_id TEXT);
+    """)
+
+
+def flush_index_rows(conn, spans, roots, dirty):
+    conn.executemany("INSERT INTO spans VALUES (?, ?, ?, ?)", spans)
+    conn.executemany(
+        "INSERT OR REPLACE INTO roots VALUES (?, ?, ?)",
+        ((root_id, roots[root_id]["startLine"], json.dumps(roots[root_id])) for root_id in dirty),
+    )
+    spans.clear()
+    roots.clear()
+    dirty.clear()
+
+
+def index_new_lines(conn, handle, offset, line_no):
+    """Index complete lines after `offset`; return the new (offset, line count)."""
     roots = {}
-    for event in events:
+    known_missing = set()
+    dirty = set()
+    spans = []
+    seen_invocations = set()
+
+    handle.seek(offset)
+    for raw in handle:
+        if not raw.endswith(b"\n"):
+            break  # a writer is mid-line; the next run picks it up
+        start = offset
+        offset += len(raw)
+        line_no += 1
+        event = parse_event(raw, line_no)
+        if event is None:
+            continue
         invocation_id = event.get("invocationId")
         root_id = event.get("rootInvocationId") or invocation_id
-        event_name = event.get("event")
+        if not root_id:
+            continue
 
-        if invocation_id == root_id and event_name == "subagent_invocation_start":
-            requested = event.get("requestedAgents") or []
-            roots.setdefault(root_id, {
-                "rootId": root_id,
-                "startLine": event["_line"],
-                "startTs": event.get("timestamp"),
-                "mode": event.get("mode"),
-                "agent": requested[0] if requested else event.get("agent", "-"),
-                "status": "running",
-                "elapsedMs": None,
-                "childInvocations": 0,
-                "childRuns": 0,
-                "childFailures": 0,
-            })
+        if spans and spans[-1][0] == root_id and spans[-1][2] == start:
+            spans[-1][2] = offset
+        else:
+            spans.append([root_id, start, offset, line_no])
+        if invocation_id and invocation_id != root_id and invocation_id not in seen_invocations:
+            seen_invocations.add(invocation_id)
+            conn.execute("INSERT OR IGNORE INTO invocations VALUES (?, ?)", (invocation_id, root_id))
+
+        if root_id not in roots and root_id not in known_missing:
+            row = conn.execute("SELECT summary FROM roots WHERE root_id = ?", (root_id,)).fetchone()
+            if row:
+                roots[root_id] = json.loads(row[0])
+            else:
+                known_missing.add(root_id)
+        if apply_root_event(roots, event) is not None:
+            known_missing.discard(root_id)
+            dirty.add(root_id)
+
+        if len(spans) + len(dirty) >= INDEX_FLUSH_ROWS:
+            flush_index_rows(conn, spans, roots, dirty)
+            known_missing.clear()
+            seen_invocations.clear()
+
+    flush_index_rows(conn, spans, roots, dirty)
+    return offset, line_no
+
+
+def update_index(conn, trace):
+    # executescript() commits on its own, so the schema goes in before the transaction.
+    create_index_schema(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        with trace.open("rb") as handle:
+            stat = os.fstat(handle.fileno())
+            fingerprint = trace_fingerprint(handle)
+            offset = int(meta.get("offset", 0))
+            line_no = int(meta.get("lines", 0))
+            if (
+                meta.get("version") != str(INDEX_VERSION)
+                or meta.get("inode") != str(stat.st_ino)
+                or meta.get("fingerprint") != fingerprint
+                or offset > stat.st_size
+            ):
+                # Rotated, rewritten or truncated trace: start over.
+                for table in ("roots", "spans", "invocations"):
+                    conn.execute(f"DELETE FROM {table}")
+                offset = line_no = 0
+            if offset < stat.st_size:
+                offset, line_no = index_new_lines(conn, handle, offset, line_no)
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [
+                ("version", str(INDEX_VERSION)),
+                ("inode", str(stat.st_ino)),
+                ("fingerprint", fingerprint),
+                ("offset", str(offset)),
+                ("lines", str(line_no)),
+            ],
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def open_index(args):
+    """Return an up-to-date index connection for the caller to close, or None to fall back to a full scan."""
+    require_trace(args.trace)
+    if args.no_index:
+        return None
+    conn = None
+    try:
+        conn = sqlite3.connect(index_path_for(args.trace), timeout=30, isolation_level=None)
+        update_index(conn, args.trace)
+    except (sqlite3.Error, OSError):
+        if conn is not None:
+            conn.close()
+        return None
+    return conn
+
+
+def read_spans(trace, spans):
+    """Yield events from (start, end, first_line) byte spans, sorted by start."""
+    merged = []
+    for start, end, first_line in spans:
+        if merged and start - merged[-1][1] <= SPAN_MERGE_GAP:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end, first_line])
+
+    with trace.open("rb") as handle:
+        for start, end, first_line in merged:
+            handle.seek(start)
+            offset = start
+            line_no = first_line - 1
+            for raw in handle:
+                offset += len(raw)
+                line_no += 1
+                event = parse_event(raw, line_no)
+                if event is not None:
+                    yield event
+                if offset >= end:
+                    break
+
+
+def iter_root_summaries(args):
+    """Root summaries, newest first, from the hot trace and the archive."""
+    archived = sorted(
+        iter_archived_root_summaries(args.trace), key=lambda row: row.get("startTs") or "", reverse=True
+    )
+    if not archived:
+        yield from iter_hot_root_summaries(args)
+        return
+    hot = list(iter_hot_root_summaries(args))
+    # A compaction interrupted before it rewrote the hot trace leaves both copies; the hot one wins.
+    hot_ids = {row["rootId"] for row in hot}
+    archived = [row for row in archived if row["rootId"] not in hot_ids]
+    yield from heapq.merge(hot, archived, key=lambda row: row.get("startTs") or "", reverse=True)
+
+
+def iter_hot_root_summaries(args):
+    """Root summaries of the hot trace, newest first."""
+    conn = open_index(args)
+    if conn is None:
+        roots = collect_roots(iter_events(args.trace))
+        yield from sorted(roots.values(), key=lambda row: row.get("startLine", 0), reverse=True)
+        return
+    with contextlib.closing(conn):
+        for (summary,) in conn.execute("SELECT summary FROM roots ORDER BY start_line DESC"):
+            yield json.loads(summary)
+
+
+def root_spans(conn, invocation_id):
+    row = conn.execute("SELECT root_id FROM invocations WHERE invocation_id = ?", (invocation_id,)).fetchone()
+    root_id = row[0] if row else invocation_id
+    return conn.execute(
+        "SELECT start_offset, end_offset, first_line FROM spans WHERE root_id = ? ORDER BY start_offset",
+        (root_id,),
+    ).fetchall()
+
+
+def load_root_events(args, invocation_id):
+    """Events that build_root_index() may need for `invocation_id`.
+
+    Archived roots are read from their archive segment. Otherwise the index
+    narrows the hot trace down when possible.
+    """
+    archived = archived_root_events(args.trace, invocation_id)
+    conn = open_index(args)
+    if conn is None:
+        return prefer_hot(iter_events(args.trace), invocation_id, archived)
+    with contextlib.closing(conn):
+        spans = root_spans(conn, invocation_id)
+    return prefer_hot(read_spans(args.trace, spans), invocation_id, archived)
+
+
+def prefer_hot(hot_events, invocation_id, archived):
+    """Hot events, then the archived copy of the root only if none of them belonged to it."""
+    found = False
+    for event in hot_events:
+        found = found or invocation_id in (event.get("rootInvocationId"), event.get("invocationId"))
+        yield event
+    if not found:
+        yield from archived
+
+
+def iter_appended(handle, offset, line_no):
+    """Yield (event or None, offset after the line, line number) for complete lines after `offset`."""
+    handle.seek(offset)
+    for raw in handle:
+        if not raw.endswith(b"\n"):
+            return  # a writer is mid-line
+        offset += len(raw)
+        line_no += 1
+        yield parse_event(raw, line_no), offset, line_no
+
+
+def apply_root_event(roots, event):
+    """Fold one event into the per-root summaries used by `roots` and `latest`.
+
+    Returns the root summary the event touched, or None.
+    """
+    invocation_id = event.get("invocationId")
+    root_id = event.get("rootInvocationId") or invocation_id
+    event_name = event.get("event")
+
+    if invocation_id == root_id and event_name == "subagent_invocation_start":
+        requested = event.get("requestedAgents") or []
+        roots.setdefault(root_id, {
+            "rootId": root_id,
+            "startLine": event["_line"],
+            "startTs": event.get("timestamp"),
+            "mode": event.get("mode"),
+            "agent": requested[0] if requested else event.get("agent", "-"),
+            "status": "running",
+            "elapsedMs": None,
+            "childInvocations": 0,
+            "childRuns": 0,
+            "childFailures": 0,
+        })
 
-        if root_id not in roots:
-            continue
+    if root_id not in roots:
+        return None
+
+    root = roots[root_id]
+    if invocation_id == root_id and event_name == "subagent_run_end":
+        root["status"] = event.get("status", root["status"])
+        root["elapsedMs"] = event.get("elapsedMs", root["elapsedMs"])
+        root["endLine"] = event["_line"]
+        root["endTs"] = event.get("timestamp")
+    elif invocation_id == root_id and event_name == "subagent_invocation_end":
+        root["status"] = event.get("status", root["status"])
+        root["elapsedMs"] = event.get("elapsedMs", root["elapsedMs"])
+        root["endLine"] = event["_line"]
+        root["endTs"] = event.get("timestamp")
+        # Root run_end events also set endLine; only this one means no more events follow.
+        root["finished"] = True
+    elif event_name == "subagent_invocation_start" and invocation_id != root_id:
+        root["childInvocations"] += 1
+    elif event_name == "subagent_run_end" and event.get("depth", 0) > 0:
+        root["childRuns"] += 1
+        if event.get("status") != "success":
+            root["childFailures"] += 1
+    return root
 
-        root = roots[root_id]
-        if invocation_id == root_id and event_name == "subagent_run_end":
-            root["status"] = event.get("status", root["status"])
-            root["elapsedMs"] = event.get("elapsedMs", root["elapsedMs"])
-            root["endLine"] = event["_line"]
-            root["endTs"] = event.get("timestamp")
-        elif invocation_id == root_id and event_name == "subagent_invocation_end":
-            root["status"] = event.get("status", root["status"])
-            root["elapsedMs"] = event.get("elapsedMs", root["elapsedMs"])
-            root["endLine"] = event["_line"]
-            root["endTs"] = event.get("timestamp")
-        elif event_name == "subagent_invocation_start" and invocation_id != root_id:
-            root["childInvocations"] += 1
-        elif event_name == "subagent_run_end" and event.get("depth", 0) > 0:
-            root["childRuns"] += 1
-            if event.get("status") != "success":
-                root["childFailures"] += 1
 
+def collect_roots(events):
+    roots = {}
+    for event in events:
+        apply_root_event(roots, event)
     return roots
 
 
-def build_root_index(events, root_id):
-    invocations = {}
-    run_tool_sum = defaultdict(int)
-    tool_events = []
-
-    for event in events:
+class TopK:
+    """The k largest items seen so far, by key, kept in a bounded min-heap."""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def push(self, key, item):
+        # Keys end with a unique tie-breaker (line number), so items are never compared.
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (key, item))
+        elif key > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (key, item))
+
+    def items(self):
+        return [item for _, item in sorted(self.heap, key=lambda entry: entry[0], reverse=True)]
+
+
+class RootIndex:
+    """Invocation/run tree of one root plus the `debug` aggregates, built in one pass.
+
+    Besides the tree itself, memory is bounded: tool time is one running total
+    per run, and the slowest runs/tools live in TopK heaps.
+    """
+
+    def __init__(self, root_id, min_tool_ms=0, top_k=TOP_K):
+        self.root_id = root_id
+        self.min_tool_ms = min_tool_ms
+        self.invocations = {}
+        self.invocation_order = {}
+        # A run's tool_end events may be logged after its run_end, so the totals
+        # are only read in finish().
+        self.run_tool_ms = defaultdict(int)
+        self.failures = []
+        self.slow_runs = TopK(top_k)
+        self.overhead = TopK(top_k)
+        self.slow_tools = TopK(top_k)
+        # agent -> [total elapsed of child runs, (invocation order, line) of its first run]
+        self.cumulative = {}
+
+    def add(self, event):
+        root_id = self.root_id
         if event.get("rootInvocationId") != root_id and event.get("invocationId") != root_id:
-            continue
+            return None
 
         invocation_id = event.get("invocationId")
         if not invocation_id:
-            continue
-
-        info = invocations.setdefault(invocation_id, {
-            "invocationId": invocation_id,
-            "runs": [],
-            "requestedAgents": [],
-        })
+            return None
+
+        info = self.invocations.get(invocation_id)
+        if info is None:
+            info = self.invocations[invocation_id] = {
+                "invocationId": invocation_id,
+                "runs": [],
+                "requestedAgents": [],
+            }
+            self.invocation_order[invocation_id] = len(self.invocation_order)
 
         event_name = event.get("event")
         if event_name == "subagent_invocation_start":
@@ -146,6 +480,7 @@ def build_root_index(events, root_id):
                 info["agent"] = event.get("agent")
         elif event_name == "subagent_parallel_start":
             info["parallelTaskCount"] = event.get("taskCount")
+            info["maxConcurrency"] = event.get("maxConcurrency")
         elif event_name == "subagent_invocation_end":
             info.update({
                 "status": event.get("status", info.get("status")),
@@ -175,35 +510,72 @@ def build_root_index(events, root_id):
                 info["elapsedMs"] = event.get("elapsedMs")
             if event.get("agent") and not info.get("agent"):
                 info["agent"] = event.get("agent")
+            self.add_run(invocation_id, run)
         elif event_name == "subagent_tool_end":
             run_id = event.get("runId")
             if run_id:
                 try:
-                    run_tool_sum[run_id] += int(event.get("elapsedMs") or 0)
+                    self.run_tool_ms[run_id] += int(event.get("elapsedMs") or 0)
                 except (TypeError, ValueError):
                     pass
-            if event.get("depth", 0) >= 1:
-                tool_events.append({
+            elapsed = event.get("elapsedMs") or 0
+            if event.get("depth", 0) >= 1 and int(elapsed) >= self.min_tool_ms:
+                self.slow_tools.push((int(elapsed), -event["_line"]), {
                     "line": event["_line"],
                     "invocationId": invocation_id,
                     "runId": run_id,
                     "agent": event.get("agent"),
-                    "elapsedMs": event.get("elapsedMs") or 0,
+                    "elapsedMs": elapsed,
                     "toolName": event.get("toolName"),
                     "toolSummary": event.get("toolSummary"),
                 })
+        return info
+
+    def add_run(self, invocation_id, run):
+        if (run.get("depth") or 0) < 1:
+            return
+
+        # Ties rank like a stable sort over invocations in first-seen order, then runs by line.
+        order = self.invocation_order[invocation_id]
+        elapsed = int(run.get("elapsedMs") or 0)
+        totals = self.cumulative.setdefault(run.get("agent") or "-", [0, (order, run["line"])])
+        totals[0] += elapsed
+        totals[1] = min(totals[1], (order, run["line"]))
+
+        if run.get("status") != "success":
+            self.failures.append(run)
+            return
+        self.slow_runs.push((elapsed, -order, -run["line"]), (run, invocation_id))
+
+    def finish(self):
+        if self.root_id not in self.invocations:
+            self.invocations = {}
+            return self
+
+        # Backfill root status from run when invocation_end is missing
+        root_info = self.invocations[self.root_id]
+        if root_info.get("status") is None and root_info.get("runs"):
+            latest_run = max(root_info["runs"], key=lambda r: r["line"])
+            root_info["status"] = latest_run.get("status")
+            root_info["elapsedMs"] = latest_run.get("elapsedMs")
+
+        for info in self.invocations.values():
+            for run in info["runs"]:
+                if (run.get("depth") or 0) < 1 or run.get("status") != "success":
+                    continue
+                elapsed = int(run.get("elapsedMs") or 0)
+                tool_time = int(self.run_tool_ms.get(run.get("runId"), 0))
+                self.overhead.push(
+                    (elapsed - tool_time, elapsed, tool_time, -run["line"]), (elapsed - tool_time, elapsed, tool_time, run)
+                )
+        return self
 
-    if root_id not in invocations:
-        return {}, {}, []
-
-    # Backfill root status from run when invocation_end is missing
-    root_info = invocations[root_id]
-    if root_info.get("status") is None and root_info.get("runs"):
-        latest_run = sorted(root_info["runs"], key=lambda r: r["line"])[-1]
-        root_info["status"] = latest_run.get("status")
-        root_info["elapsedMs"] = latest_run.get("elapsedMs")
 
-    return invocations, run_tool_sum, tool_events
+def build_root_index(events, root_id, min_tool_ms=0):
+    index = RootIndex(root_id, min_tool_ms)
+    for event in events:
+        index.add(event)
+    return index.finish()
 
 
 def build_children(invocations, root_id):
@@ -281,21 +653,23 @@ def print_tree(invocations, root_id, include_runs=False):
     walk(root_id, "")
 
 
-def cmd_roots(args):
-    events = load_events(args.trace)
-    roots = collect_roots(events)
-
-    rows = sorted(roots.values(), key=lambda row: row.get("startLine", 0), reverse=True)
+def matching_roots(args):
+    rows = iter_root_summaries(args)
     if args.agent:
         target = args.agent.lower()
-        rows = [row for row in rows if target in (row.get("agent", "").lower())]
+        rows = (row for row in rows if target in (row.get("agent", "").lower()))
+    return rows
+
+
+def cmd_roots(args):
+    rows = list(itertools.islice(matching_roots(args), args.limit))
 
     if not rows:
         print("no matching root invocations found")
         return
 
     print("START (UTC)               AGENT           STATUS            ELAPSED   FAIL/RUNS  ROOT")
-    for row in rows[: args.limit]:
+    for row in rows:
         child_runs = row.get("childRuns", 0)
         child_failures = row.get("childFailures", 0)
         print(
@@ -309,19 +683,11 @@ def cmd_roots(args):
 
 
 def cmd_latest(args):
-    events = load_events(args.trace)
-    roots = collect_roots(events)
-
-    rows = sorted(roots.values(), key=lambda row: row.get("startLine", 0), reverse=True)
-    if args.agent:
-        target = args.agent.lower()
-        rows = [row for row in rows if target in (row.get("agent", "").lower())]
-
-    if not rows:
+    row = next(matching_roots(args), None)
+    if row is None:
         print("no matching root invocations found", file=sys.stderr)
         sys.exit(1)
 
-    row = rows[0]
     if args.id_only:
         print(row["rootId"])
         return
@@ -335,35 +701,26 @@ def cmd_latest(args):
 
 
 def cmd_tree(args):
-    events = load_events(args.trace)
-    invocations, _, _ = build_root_index(events, args.root)
-    if args.root not in invocations:
+    index = build_root_index(load_root_events(args, args.root), args.root)
+    if args.root not in index.invocations:
         print(f"root invocation not found: {args.root}", file=sys.stderr)
         sys.exit(1)
-    print_tree(invocations, args.root, include_runs=args.runs)
+    print_tree(index.invocations, args.root, include_runs=args.runs)
 
 
 def cmd_debug(args):
-    events = load_events(args.trace)
-    invocations, run_tool_sum, tool_events = build_root_index(events, args.root)
-    if args.root not in invocations:
+    index = build_root_index(load_root_events(args, args.root), args.root, min_tool_ms=args.min_tool_ms)
+    if args.root not in index.invocations:
         print(f"root invocation not found: {args.root}", file=sys.stderr)
         sys.exit(1)
 
-    print_tree(invocations, args.root, include_runs=True)
-
-    runs = []
-    for invocation in invocations.values():
-        runs.extend(invocation.get("runs", []))
-
-    child_runs = [run for run in runs if (run.get("depth") or 0) >= 1]
-    failures = [run for run in child_runs if run.get("status") != "success"]
+    print_tree(index.invocations, args.root, include_runs=True)
 
     print("\nFailures")
-    if not failures:
+    if not index.failures:
         print("- none")
     else:
-        for run in sorted(failures, key=lambda item: item["line"]):
+        for run in sorted(index.failures, key=lambda item: item["line"]):
             error_label = classify_error(run.get("stderrTail", ""))
             suffix = f" ({error_label})" if error_label else ""
             print(
@@ -371,48 +728,34 @@ def cmd_debug(args):
                 f"[{run.get('status', 'running')}, {fmt_ms(run.get('elapsedMs'))}]{suffix}"
             )
 
-    success_runs = [run for run in child_runs if run.get("status") == "success"]
+    slow_runs = index.slow_runs.items()
 
     print("\nSlowest specialist attempts")
-    if not success_runs:
+    if not slow_runs:
         print("- none")
     else:
-        top = sorted(success_runs, key=lambda item: item.get("elapsedMs") or 0, reverse=True)[:5]
-        for run in top:
-            print(
-                f"- {run.get('agent', '-')}: {fmt_ms(run.get('elapsedMs'))} "
-                f"(invocation {next((iid for iid, info in invocations.items() if run in info.get('runs', [])), '-')})"
-            )
-
-    cumulative = defaultdict(int)
-    for run in child_runs:
-        cumulative[run.get("agent") or "-"] += int(run.get("elapsedMs") or 0)
+        for run, invocation_id in slow_runs:
+            print(f"- {run.get('agent', '-')}: {fmt_ms(run.get('elapsedMs'))} (invocation {invocation_id})")
 
     print("\nCumulative by specialist")
-    if not cumulative:
+    if not index.cumulative:
         print("- none")
     else:
-        for agent, total in sorted(cumulative.items(), key=lambda item: item[1], reverse=True):
+        ranked = sorted(index.cumulative.items(), key=lambda item: (-item[1][0], item[1][1]))
+        for agent, (total, _) in ranked:
             print(f"- {agent}: {fmt_ms(total)}")
 
     print("\nRun overhead (elapsed - tool time)")
-    if not success_runs:
+    if not slow_runs:
         print("- none")
     else:
-        rows = []
-        for run in success_runs:
-            run_id = run.get("runId")
-            elapsed = int(run.get("elapsedMs") or 0)
-            tool_time = int(run_tool_sum.get(run_id, 0))
-            rows.append((elapsed - tool_time, elapsed, tool_time, run))
-        for non_tool, elapsed, tool_time, run in sorted(rows, reverse=True)[:5]:
+        for non_tool, elapsed, tool_time, run in index.overhead.items():
             print(
                 f"- {run.get('agent', '-')}: non-tool {fmt_ms(non_tool)} "
                 f"(elapsed {fmt_ms(elapsed)}, tools {fmt_ms(tool_time)})"
             )
 
-    slow_tools = sorted(tool_events, key=lambda item: int(item.get("elapsedMs") or 0), reverse=True)
-    slow_tools = [tool for tool in slow_tools if int(tool.get("elapsedMs") or 0) >= args.min_tool_ms][:5]
+    slow_tools = index.slow_tools.items()
 
     print(f"\nSlow tools (>= {args.min_tool_ms}ms)")
     if not slow_tools:
@@ -425,6 +768,1340 @@ def cmd_debug(args):
             )
 
 
+def parse_ts(value):
+    try:
+        return dt.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def snapshot_root(args, root_id, consume):
+    """Feed every event already traced for `root_id` to `consume`; return the (offset, line) to tail from."""
+    archived = archived_root_events(args.trace, root_id)
+    conn = open_index(args)
+    if conn is not None:
+        with contextlib.closing(conn):
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            spans = root_spans(conn, root_id)
+        for event in prefer_hot(read_spans(args.trace, spans), root_id, archived):
+            consume(event)
+        return int(meta["offset"]), int(meta["lines"])
+
+    offset = line_no = 0
+    with args.trace.open("rb") as handle:
+        position = {"offset": 0, "line": 0}
+
+        def hot_events():
+            for event, position["offset"], position["line"] in iter_appended(handle, 0, 0):
+                if event is not None:
+                    yield event
+
+        for event in prefer_hot(hot_events(), root_id, archived):
+            consume(event)
+        offset, line_no = position["offset"], position["line"]
+    return offset, line_no
+
+
+class FollowState:
+    """What `follow` prints per new event: one line per changed node, never the whole tree."""
+
+    HEARTBEAT_ITEMS = 5
+
+    def __init__(self, root_id):
+        self.index = RootIndex(root_id)
+        self.running_invocations = {}
+        self.running_runs = {}
+        self.labels = {}
+
+    def root_finished(self):
+        root = self.index.invocations.get(self.index.root_id)
+        return bool(root and root.get("endLine"))
+
+    def apply(self, event):
+        """Fold one new event into the tree; return the lines to print for it."""
+        info = self.index.add(event)
+        if info is None:
+            return []
+        name = event.get("event")
+        invocation_id = info["invocationId"]
+        clock = str(event.get("timestamp") or "")[11:19] or "--:--:--"
+        indent = "  " * int(event.get("depth") or 0)
+
+        if name == "subagent_run_start":
+            self.running_runs[event.get("runId")] = event
+            return []
+        if name == "subagent_invocation_start":
+            self.running_invocations[invocation_id] = info
+        elif name == "subagent_invocation_end":
+            self.running_invocations.pop(invocation_id, None)
+        elif name == "subagent_run_end":
+            self.running_runs.pop(event.get("runId"), None)
+            run = info["runs"][-1]
+            failed = run.get("status") != "success"
+            line = f"run {run.get('agent', '-')} [{run.get('status', 'running')}, {fmt_ms(run.get('elapsedMs'))}]"
+            error_label = classify_error(run.get("stderrTail", ""))
+            if error_label:
+                line += f" ({error_label})"
+            return [f"{clock} {'FAIL' if failed else '    '} {indent}  {line} in {invocation_id}"]
+        elif name != "subagent_parallel_start":
+            return []
+
+        label = invocation_label(info)
+        if self.labels.get(invocation_id) == label:
+            return []
+        self.labels[invocation_id] = label
+        failed = name == "subagent_invocation_end" and info.get("status") not in ("success", None)
+        return [f"{clock} {'FAIL' if failed else '    '} {indent}{invocation_id} {label}"]
+
+    def _longest_running(self, items, now):
+        elapsed = []
+        for name, started_ts in items:
+            started = parse_ts(started_ts)
+            if started is not None:
+                elapsed.append(((now - started).total_seconds() * 1000, name))
+        elapsed.sort(reverse=True)
+        text = ", ".join(f"{name} {fmt_ms(ms)}" for ms, name in elapsed[: self.HEARTBEAT_ITEMS])
+        if len(elapsed) > self.HEARTBEAT_ITEMS:
+            text += f", +{len(elapsed) - self.HEARTBEAT_ITEMS} more"
+        return text
+
+    def heartbeat(self, now):
+        """Running elapsed time of the longest open invocations and runs, measured from their start events."""
+        invocations = self._longest_running(
+            (
+                ("parallel" if info.get("mode") == "parallel" else info.get("agent") or "-", info.get("startTs"))
+                for info in self.running_invocations.values()
+            ),
+            now,
+        )
+        runs = self._longest_running(
+            ((event.get("agent") or "-", event.get("timestamp")) for event in self.running_runs.values()), now
+        )
+        if not invocations and not runs:
+            return None
+        line = f"{now.strftime('%H:%M:%S')} .... running: {invocations or '-'}"
+        if runs:
+            line += f" | runs: {runs}"
+        return line
+
+
+def cmd_follow(args):
+    root_id = args.root
+    if not root_id:
+        row = next(matching_roots(args), None)
+        if row is None:
+            print("no matching root invocations found", file=sys.stderr)
+            sys.exit(1)
+        root_id = row["rootId"]
+
+    state = FollowState(root_id)
+    offset, line_no = snapshot_root(args, root_id, state.apply)
+    if root_id in state.index.invocations:
+        print_tree(state.index.invocations, root_id, include_runs=args.runs)
+    else:
+        print(f"waiting for root invocation {root_id}")
+    print(f"--- following {args.trace} (Ctrl-C to stop)", flush=True)
+
+    inode = args.trace.stat().st_ino
+    last_heartbeat = time.monotonic()
+    try:
+        while not state.root_finished():
+            try:
+                stat = args.trace.stat()
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and (stat.st_ino != inode or stat.st_size < offset):
+                # Rotated or compacted: rebuild from the new file, then keep tailing it.
+                print("--- trace was rotated; reloading", flush=True)
+                state = FollowState(root_id)
+                offset, line_no = snapshot_root(args, root_id, state.apply)
+                inode = stat.st_ino
+                continue
+            if stat is not None and stat.st_size > offset:
+                with args.trace.open("rb") as handle:
+                    for event, offset, line_no in iter_appended(handle, offset, line_no):
+                        if event is None:
+                            continue
+                        for line in state.apply(event):
+                            print(line)
+                sys.stdout.flush()
+                last_heartbeat = time.monotonic()
+                continue
+            if args.heartbeat > 0 and time.monotonic() - last_heartbeat >= args.heartbeat:
+                last_heartbeat = time.monotonic()
+                line = state.heartbeat(dt.datetime.now(dt.timezone.utc))
+                if line:
+                    print(line, flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return
+
+    root = state.index.invocations[root_id]
+    print(f"--- root finished: {root_id} {invocation_label(root)}")
+
+
+def ts_ms(value):
+    parsed = parse_ts(value) if value else None
+    return parsed.timestamp() * 1000 if parsed is not None else None
+
+
+def build_timeline(index):
+    """Nest invocations and runs of one root as timed nodes (ms since epoch).
+
+    A run's start is its end timestamp minus elapsedMs. Invocations hang off the
+    run that spawned them (parentRunId), or off their parent invocation when that
+    run is unknown. Returns the root node, or None when it has no timestamps.
+    """
+    invocations = index.invocations
+    known_runs = {run.get("runId") for info in invocations.values() for run in info.get("runs", [])}
+    by_parent_run = defaultdict(list)
+    by_parent_invocation = defaultdict(list)
+    for invocation_id, info in invocations.items():
+        if invocation_id == index.root_id:
+            continue
+        if info.get("parentRunId") in known_runs:
+            by_parent_run[info["parentRunId"]].append(invocation_id)
+        else:
+            by_parent_invocation[info.get("parentInvocationId") or index.root_id].append(invocation_id)
+
+    def finish_node(node):
+        starts = [child["start"] for child in node["children"]]
+        ends = [child["end"] for child in node["children"]]
+        if node["start"] is None:
+            node["start"] = min(starts, default=None)
+        if node["end"] is None:
+            node["end"] = max(ends, default=node["start"])
+        if node["start"] is None or node["end"] is None:
+            return None
+        node["children"].sort(key=lambda child: (child["start"], child["end"]))
+        return node
+
+    def run_node(run, invocation_id):
+        end = ts_ms(run.get("timestamp"))
+        if end is None:
+            return None
+        node = {
+            "kind": "run",
+            "id": run.get("runId"),
+            "invocationId": invocation_id,
+            "label": (
+                f"run {run.get('agent') or '-'} "
+                f"[{run.get('status') or 'running'}, {fmt_ms(run.get('elapsedMs'))}]"
+            ),
+            "start": end - int(run.get("elapsedMs") or 0),
+            "end": end,
+            "children": [],
+        }
+        for child_id in by_parent_run.get(run.get("runId"), []):
+            child = invocation_node(child_id)
+            if child is not None:
+                node["children"].append(child)
+        return finish_node(node)
+
+    def invocation_node(invocation_id):
+        info = invocations[invocation_id]
+        node = {
+            "kind": "invocation",
+            "id": invocation_id,
+            "label": f"{invocation_id} {invocation_label(info)}",
+            "mode": info.get("mode"),
+            "maxConcurrency": info.get("maxConcurrency"),
+            "start": ts_ms(info.get("startTs")),
+            "end": ts_ms(info.get("endTs")),
+            "children": [],
+        }
+        for run in info.get("runs", []):
+            child = run_node(run, invocation_id)
+            if child is not None:
+                node["children"].append(child)
+        for child_id in by_parent_invocation.get(invocation_id, []):
+            child = invocation_node(child_id)
+            if child is not None:
+                node["children"].append(child)
+        return finish_node(node)
+
+    if index.root_id not in invocations:
+        return None
+    return invocation_node(index.root_id)
+
+
+def critical_chain(node):
+    """Children that determine when `node` ends.
+
+    That is the last child to finish, then whatever ended before it started, and so on.
+    """
+    chain = []
+    cursor = node["end"]
+    candidates = node["children"]
+    while True:
+        candidates = [child for child in candidates if child["end"] <= cursor + CHAIN_TOLERANCE_MS]
+        if not candidates:
+            break
+        last = max(candidates, key=lambda child: (child["end"], -child["start"]))
+        chain.append(last)
+        candidates = [child for child in candidates if child is not last]
+        cursor = last["start"]
+    chain.reverse()
+    return chain
+
+
+def critical_path(node, depth=0):
+    """(depth, node, own time) steps along the critical path, in time order."""
+    chain = critical_chain(node)
+    covered = sum(child["end"] - child["start"] for child in chain)
+    steps = [(depth, node, max(0.0, node["end"] - node["start"] - covered))]
+    for child in chain:
+        steps.extend(critical_path(child, depth + 1))
+    return steps
+
+
+def assign_slack(node, slack=0.0):
+    """Set node["slack"]: how much later it could end without delaying the root.
+
+    A run waits on the invocations it spawns, so they inherit its slack. Inside
+    an invocation, siblings that started after a child ended (and end later)
+    are treated as waiting on it (the next chain step, or the task that took
+    its fan-out slot). The child may end as late as the least-slack such
+    successor allows. Without successors, the invocation's own end is the limit.
+    """
+    node["slack"] = slack
+    children = sorted(node["children"], key=lambda child: child["end"], reverse=True)
+    for child in children:
+        if node["kind"] == "run":
+            child["slack"] = slack
+            continue
+        limit = node["end"] + slack
+        for other in children:
+            # Only siblings that end later already have their slack.
+            if other["end"] <= child["end"]:
+                break
+            if other["start"] >= child["end"] - CHAIN_TOLERANCE_MS:
+                limit = min(limit, other["start"] + other["slack"])
+        child["slack"] = max(0.0, limit - child["end"])
+    for child in children:
+        assign_slack(child, child["slack"])
+
+
+def iter_nodes(node):
+    yield node
+    for child in node["children"]:
+        yield from iter_nodes(child)
+
+
+def concurrency(runs, wall_ms):
+    """(peak running runs, ms offset of the peak from the first start, average over wall_ms)."""
+    if not runs:
+        return 0, 0.0, 0.0
+    edges = sorted([(run["start"], 1) for run in runs] + [(run["end"], -1) for run in runs])
+    origin = edges[0][0]
+    peak, peak_at, running = 0, origin, 0
+    for at, delta in edges:
+        running += delta
+        if running > peak:
+            peak, peak_at = running, at
+    busy = sum(run["end"] - run["start"] for run in runs)
+    return peak, peak_at - origin, busy / wall_ms if wall_ms > 0 else 0.0
+
+
+def fan_out_stats(node):
+    """Serialization inside a parallel invocation: makespan of its runs minus the longest one."""
+    runs = [child for child in node["children"] if child["kind"] == "run"]
+    if not runs:
+        return None
+    durations = [run["end"] - run["start"] for run in runs]
+    makespan = max(run["end"] for run in runs) - min(run["start"] for run in runs)
+    return {
+        "tasks": len(runs),
+        "makespan": makespan,
+        "longest": max(durations),
+        "sum": sum(durations),
+        "lost": max(0.0, makespan - max(durations)),
+    }
+
+
+def cmd_critical_path(args):
+    index = build_root_index(load_root_events(args, args.root), args.root)
+    if args.root not in index.invocations:
+        print(f"root invocation not found: {args.root}", file=sys.stderr)
+        sys.exit(1)
+    root = build_timeline(index)
+    if root is None:
+        print(f"root invocation has no timestamps: {args.root}", file=sys.stderr)
+        sys.exit(1)
+
+    wall = root["end"] - root["start"]
+    path = critical_path(root)
+    on_path = {id(node) for _, node, _ in path}
+    assign_slack(root)
+
+    running = "" if index.invocations[args.root].get("endTs") else "; still running, only finished runs are timed"
+    print(f"Critical path for {args.root} (wall {fmt_ms(wall)}{running})")
+    for depth, node, own in path:
+        offset = fmt_ms(node["start"] - root["start"])
+        line = f"+{offset:>7} {fmt_ms(node['end'] - node['start']):>7}  {'  ' * depth}{node['label']}"
+        if node["children"]:
+            line += f"  own {fmt_ms(own)}"
+        print(line)
+
+    runs = [node for node in iter_nodes(root) if node["kind"] == "run"]
+    peak, peak_at, average = concurrency(runs, wall)
+    print("\nConcurrency")
+    print(f"- peak {peak} runs at +{fmt_ms(peak_at)}, average {average:.2f} over {fmt_ms(wall)} wall")
+
+    fan_outs = []
+    for node in iter_nodes(root):
+        if node["kind"] == "invocation" and node.get("mode") == "parallel":
+            stats = fan_out_stats(node)
+            if stats is not None:
+                fan_outs.append((stats["lost"], node, stats))
+    fan_outs.sort(key=lambda item: item[0], reverse=True)
+
+    print("\nParallel fan-outs (lost = makespan - longest task; * = on the critical path)")
+    if not fan_outs:
+        print("- none")
+    else:
+        for lost, node, stats in fan_outs[: args.limit]:
+            marker = "*" if id(node) in on_path else " "
+            print(
+                f"-{marker}{node['id']}: {stats['tasks']} tasks, max {node.get('maxConcurrency') or '?'} concurrent, "
+                f"makespan {fmt_ms(stats['makespan'])}, longest {fmt_ms(stats['longest'])}, "
+                f"sum {fmt_ms(stats['sum'])}, lost {fmt_ms(lost)}"
+            )
+        critical_lost = sum(lost for lost, node, _ in fan_outs if id(node) in on_path)
+        print(f"- unlimited concurrency on critical-path fan-outs would save up to {fmt_ms(critical_lost)}")
+
+    print("\nRun slack (least first; * = on the critical path)")
+    if not runs:
+        print("- none")
+    else:
+        for run in sorted(runs, key=lambda node: (node["slack"], node["start"]))[: args.limit]:
+            marker = "*" if id(run) in on_path else " "
+            print(f"-{marker}{run['label']} in {run['invocationId']}: slack {fmt_ms(run['slack'])}")
+
+
+class LatencySketch:
+    """Mergeable quantile sketch (DDSketch-style) over millisecond latencies.
+
+    Values land in logarithmic buckets, so every quantile is within
+    SKETCH_ACCURACY of a true sample value. Memory grows with the number of
+    occupied buckets (under a thousand for anything up to days), not with
+    the number of samples.
+    """
+
+    GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+    LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self):
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0
+
+    def add(self, ms):
+        ms = max(0, int(ms or 0))
+        self.count += 1
+        self.total += ms
+        if ms < 1:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(ms) / self.LOG_GAMMA)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return round(2 * self.GAMMA**key / (self.GAMMA + 1))
+        return None
+
+    def to_json(self):
+        return {"buckets": self.buckets, "zeros": self.zeros, "count": self.count, "total": self.total}
+
+    @classmethod
+    def from_json(cls, data):
+        sketch = cls()
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zeros, sketch.count, sketch.total = data["zeros"], data["count"], data["total"]
+        return sketch
+
+    def as_dict(self):
+        summary = {"count": self.count, "meanMs": round(self.total / self.count) if self.count else None}
+        for q in STATS_QUANTILES:
+            summary[f"p{round(q * 100)}"] = self.quantile(q)
+        return summary
+
+
+def format_window_ts(value):
+    """Trace-style timestamp (UTC, milliseconds, Z) for an ISO date/datetime argument."""
+    parsed = parse_ts(value) if isinstance(value, str) else value
+    if parsed is None:
+        raise ValueError(f"invalid timestamp: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return parsed.astimezone(dt.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def line_timestamp(raw):
+    event = parse_event(raw, 0)
+    timestamp = event.get("timestamp") if event else None
+    return timestamp if isinstance(timestamp, str) else None
+
+
+def seek_timestamp(handle, target):
+    """Offset of a line boundary at or before the first line stamped `target` or later.
+
+    Binary search over the byte range. Lines without a timestamp are skipped.
+    """
+    handle.seek(0, os.SEEK_END)
+    low, high = 0, handle.tell()
+    while high - low > WINDOW_SEARCH_MIN_BYTES:
+        middle = (low + high) // 2
+        handle.seek(middle)
+        handle.readline()
+        timestamp = None
+        while timestamp is None and handle.tell() < high:
+            raw = handle.readline()
+            if not raw:
+                break
+            timestamp = line_timestamp(raw)
+        if timestamp is None or timestamp >= target:
+            high = middle
+        else:
+            low = middle
+    if low:
+        handle.seek(low)
+        handle.readline()
+        return handle.tell()
+    return 0
+
+
+def iter_window_events(path, since, until):
+    """Trace events stamped within [since, until); either bound may be None.
+
+    Reading starts TRACE_SKEW before `since` (found by binary search) and stops
+    at the first line stamped TRACE_SKEW past `until`.
+    """
+    require_trace(path)
+    start = format_window_ts(parse_ts(since) - TRACE_SKEW) if since else None
+    stop = format_window_ts(parse_ts(until) + TRACE_SKEW) if until else None
+    with path.open("rb") as handle:
+        handle.seek(seek_timestamp(handle, start) if start else 0)
+        for raw in handle:
+            event = parse_event(raw, None)
+            if event is None:
+                continue
+            timestamp = event.get("timestamp")
+            if not isinstance(timestamp, str):
+                continue
+            if stop and timestamp >= stop:
+                return
+            if (since and timestamp < since) or (until and timestamp >= until):
+                continue
+            yield event
+
+
+def iso_week(timestamp, cache):
+    day = timestamp[:10]
+    week = cache.get(day)
+    if week is None:
+        try:
+            year, number, _ = dt.date.fromisoformat(day).isocalendar()
+            week = f"{year}-W{number:02d}"
+        except ValueError:
+            week = "-"
+        cache[day] = week
+    return week
+
+
+def new_run_stats():
+    return {"latency": LatencySketch(), "runs": 0, "failures": Counter()}
+
+
+def new_tool_stats():
+    return {"latency": LatencySketch(), "errors": 0}
+
+
+class TraceStats:
+    """Per-agent run and per-tool call statistics, overall and per ISO week.
+
+    Only sketches and counters are kept, so memory depends on the number of
+    agents, tools and weeks, not on the size of the trace.
+    """
+
+    def __init__(self):
+        self.roots = 0
+        self.agents = defaultdict(new_run_stats)
+        self.tools = defaultdict(new_tool_stats)
+        self.weeks = defaultdict(lambda: {"agents": defaultdict(new_run_stats), "tools": defaultdict(new_tool_stats)})
+        self.week_cache = {}
+
+    def add(self, event):
+        event_name = event.get("event")
+        if event_name == "subagent_invocation_start":
+            if event.get("invocationId") == (event.get("rootInvocationId") or event.get("invocationId")):
+                self.roots += 1
+        elif event_name == "subagent_run_end":
+            agent = event.get("agent") or "-"
+            week = self.weeks[iso_week(event["timestamp"], self.week_cache)]
+            category = None
+            if event.get("status") != "success":
+                category = classify_error(event.get("stderrTail", "")) or "no stderr"
+            for stats in (self.agents[agent], week["agents"][agent]):
+                stats["runs"] += 1
+                stats["latency"].add(event.get("elapsedMs"))
+                if category:
+                    stats["failures"][category] += 1
+        elif event_name == "subagent_tool_end":
+            tool = event.get("toolName") or "-"
+            week = self.weeks[iso_week(event["timestamp"], self.week_cache)]
+            for stats in (self.tools[tool], week["tools"][tool]):
+                stats["latency"].add(event.get("elapsedMs"))
+                if event.get("isError"):
+                    stats["errors"] += 1
+
+    def to_partial(self):
+        """JSON-ready counters and sketches, as stored per day in archive segment summaries."""
+        return {
+            "roots": self.roots,
+            "agents": {
+                name: {
+                    "runs": value["runs"],
+                    "failures": dict(value["failures"]),
+                    "latency": value["latency"].to_json(),
+                }
+                for name, value in self.agents.items()
+            },
+            "tools": {
+                name: {"errors": value["errors"], "latency": value["latency"].to_json()}
+                for name, value in self.tools.items()
+            },
+        }
+
+    def merge_partial(self, day, partial):
+        """Add one day's to_partial() counters without touching the events behind them."""
+        self.roots += partial["roots"]
+        week = self.weeks[iso_week(day, self.week_cache)]
+        for name, value in partial["agents"].items():
+            sketch = LatencySketch.from_json(value["latency"])
+            for stats in (self.agents[name], week["agents"][name]):
+                stats["runs"] += value["runs"]
+                stats["failures"].update(value["failures"])
+                stats["latency"].merge(sketch)
+        for name, value in partial["tools"].items():
+            sketch = LatencySketch.from_json(value["latency"])
+            for stats in (self.tools[name], week["tools"][name]):
+                stats["errors"] += value["errors"]
+                stats["latency"].merge(sketch)
+
+
+def run_stats_dict(stats):
+    failures = sum(stats["failures"].values())
+    return {
+        "runs": stats["runs"],
+        "failures": failures,
+        "failureRate": round(failures / stats["runs"], 4) if stats["runs"] else None,
+        "failuresByCategory": dict(stats["failures"].most_common()),
+        "latencyMs": stats["latency"].as_dict(),
+    }
+
+
+def tool_stats_dict(stats):
+    count = stats["latency"].count
+    return {
+        "calls": count,
+        "errors": stats["errors"],
+        "errorRate": round(stats["errors"] / count, 4) if count else None,
+        "latencyMs": stats["latency"].as_dict(),
+    }
+
+
+def week_regressions(previous, current, threshold, min_count):
+    """Agents and tools whose latency percentiles or failure rate got worse from `previous` to `current` week."""
+    found = []
+    for kind, to_dict in (("agents", run_stats_dict), ("tools", tool_stats_dict)):
+        for name, stats in sorted(current[kind].items()):
+            if name not in previous[kind]:
+                continue
+            before, after = to_dict(previous[kind][name]), to_dict(stats)
+            if min(before["latencyMs"]["count"], after["latencyMs"]["count"]) < min_count:
+                continue
+            for q in STATS_QUANTILES[:2]:
+                key = f"p{round(q * 100)}"
+                old, new = before["latencyMs"][key], after["latencyMs"][key]
+                if old and new > old * (1 + threshold):
+                    found.append({"kind": kind[:-1], "name": name, "metric": key, "before": old, "after": new})
+            rate_key = "failureRate" if kind == "agents" else "errorRate"
+            if after[rate_key] - before[rate_key] >= FAILURE_RATE_REGRESSION:
+                found.append({
+                    "kind": kind[:-1],
+                    "name": name,
+                    "metric": rate_key,
+                    "before": before[rate_key],
+                    "after": after[rate_key],
+                })
+    return found
+
+
+def format_regression(item):
+    if item["metric"].endswith("Rate"):
+        change = f"{item['before'] * 100:.1f}% -> {item['after'] * 100:.1f}%"
+    else:
+        growth = (item["after"] / item["before"] - 1) * 100
+        change = f"{fmt_ms(item['before'])} -> {fmt_ms(item['after'])} (+{growth:.0f}%)"
+    return f"- {item['kind']} {item['name']}: {item['metric']} {change}"
+
+
+def cmd_stats(args):
+    since, until = args.since, args.until
+    try:
+        if args.days is not None:
+            since = format_window_ts(dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=args.days))
+        elif since:
+            since = format_window_ts(since)
+        if until:
+            until = format_window_ts(until)
+    except (TypeError, ValueError) as exc:
+        print(str(exc), file=sys.stderr)
+        sys.exit(2)
+
+    stats = TraceStats()
+    for data_path, summary in iter_archive_segments(args.trace):
+        add_archived_stats(stats, data_path, summary, since, until)
+    for event in skip_archived(iter_window_events(args.trace, since, until), archived_hot_roots(args)):
+        stats.add(event)
+
+    weeks = sorted(stats.weeks)
+    regressions = []
+    if len(weeks) >= 2:
+        previous, current = stats.weeks[weeks[-2]], stats.weeks[weeks[-1]]
+        regressions = week_regressions(previous, current, args.threshold, args.min_count)
+    failure_categories = Counter()
+    for agent_stats in stats.agents.values():
+        failure_categories.update(agent_stats["failures"])
+    total_runs = sum(agent_stats["runs"] for agent_stats in stats.agents.values())
+
+    if args.json:
+        report = {
+            "window": {"since": since, "until": until},
+            "roots": stats.roots,
+            "runs": total_runs,
+            "agents": {name: run_stats_dict(value) for name, value in sorted(stats.agents.items())},
+            "tools": {name: tool_stats_dict(value) for name, value in sorted(stats.tools.items())},
+            "failureCategories": dict(failure_categories.most_common()),
+            "weeks": {
+                week: {
+                    "agents": {name: run_stats_dict(value) for name, value in sorted(data["agents"].items())},
+                    "tools": {name: tool_stats_dict(value) for name, value in sorted(data["tools"].items())},
+                }
+                for week, data in sorted(stats.weeks.items())
+            },
+            "regressions": {
+                "current": weeks[-1] if len(weeks) >= 2 else None,
+                "previous": weeks[-2] if len(weeks) >= 2 else None,
+                "items": regressions,
+            },
+        }
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    if not total_runs and not stats.tools:
+        print("no runs in the selected window")
+        return
+
+    print(f"Window: {since or 'start'} .. {until or 'end'}  roots {stats.roots}, runs {total_runs}")
+    print("\nAGENT               RUNS   FAIL%      P50      P95      P99")
+    for name, value in sorted(stats.agents.items(), key=lambda item: -item[1]["runs"]):
+        row = run_stats_dict(value)
+        latency = row["latencyMs"]
+        print(
+            f"{name:16.16} {row['runs']:7} {row['failureRate'] * 100:6.1f}% "
+            f"{fmt_ms(latency['p50']):>8} {fmt_ms(latency['p95']):>8} {fmt_ms(latency['p99']):>8}"
+        )
+    print("\nTOOL               CALLS    ERR%      P50      P95      P99")
+    for name, value in sorted(stats.tools.items(), key=lambda item: -item[1]["latency"].count):
+        row = tool_stats_dict(value)
+        latency = row["latencyMs"]
+        print(
+            f"{name:16.16} {row['calls']:7} {row['errorRate'] * 100:6.1f}% "
+            f"{fmt_ms(latency['p50']):>8} {fmt_ms(latency['p95']):>8} {fmt_ms(latency['p99']):>8}"
+        )
+
+    print("\nFailures by category")
+    if not failure_categories:
+        print("- none")
+    for category, count in failure_categories.most_common():
+        agents = sorted(
+            (value["failures"][category], name)
+            for name, value in stats.agents.items()
+            if value["failures"][category]
+        )[::-1]
+        by_agent = ", ".join(f"{name} {agent_count}" for agent_count, name in agents)
+        print(f"- {category}: {count} ({count / total_runs * 100:.1f}% of runs; {by_agent})")
+
+    if len(weeks) < 2:
+        print("\nWeek-over-week: needs runs from at least two ISO weeks")
+        return
+    print(f"\nWeek-over-week ({weeks[-1]} vs {weeks[-2]})")
+    if not regressions:
+        print("- no regressions")
+    for item in regressions:
+        print(format_regression(item))
+
+
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def ts_us(value):
+    parsed = parse_ts(value) if value else None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return (parsed - EPOCH) // dt.timedelta(microseconds=1)
+
+
+class ChromeTraceExporter:
+    """Streams trace events out as Chrome Trace Event "X" (complete) slices.
+
+    Each root is one process. Within it, tid 0 holds the root invocation, and
+    every agent gets one track per concurrent run ("reviewer", "reviewer #2",
+    ...). A lane is claimed at subagent_run_start and released at
+    subagent_run_end. A run's tools land on its lane, and each invocation sits
+    on the lane of the run that spawned it, inside that run's tool slice. This
+    gives invocation > run > tool > invocation nesting a flame-chart viewer
+    can draw. Only open invocations/runs and the lanes of unfinished roots are
+    kept in memory.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.first = True
+        self.roots = {}
+        self.next_pid = 1
+        self.open_invocations = {}
+        self.open_runs = {}
+        self.last_us = None
+        self.slices = 0
+
+    def write(self, record):
+        self.out.write("" if self.first else ",\n")
+        self.out.write(json.dumps(record, separators=(",", ":")))
+        self.first = False
+
+    def root_state(self, root_id, agent=None):
+        state = self.roots.get(root_id)
+        if state is None:
+            pid = self.next_pid
+            self.next_pid += 1
+            state = self.roots[root_id] = {"pid": pid, "lanes": {}, "next_tid": 1}
+            label = f"{root_id} {agent}" if agent else root_id
+            self.write({"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": label}})
+            self.write({"ph": "M", "name": "process_sort_index", "pid": pid, "tid": 0, "args": {"sort_index": pid}})
+            self.write({"ph": "M", "name": "thread_name", "pid": pid, "tid": 0, "args": {"name": "invocations"}})
+        return state
+
+    def claim_lane(self, state, agent):
+        lanes = state["lanes"].setdefault(agent, [])
+        for lane in lanes:
+            if not lane["busy"]:
+                lane["busy"] = True
+                return lane
+        lane = {"tid": state["next_tid"], "busy": True}
+        state["next_tid"] += 1
+        lanes.append(lane)
+        name = agent if len(lanes) == 1 else f"{agent} #{len(lanes)}"
+        self.write({"ph": "M", "name": "thread_name", "pid": state["pid"], "tid": lane["tid"], "args": {"name": name}})
+        self.write({
+            "ph": "M",
+            "name": "thread_sort_index",
+            "pid": state["pid"],
+            "tid": lane["tid"],
+            "args": {"sort_index": lane["tid"]},
+        })
+        return lane
+
+    def slice(self, pid, tid, name, category, start_us, end_us, args):
+        self.slices += 1
+        self.write({
+            "ph": "X",
+            "name": name,
+            "cat": category,
+            "pid": pid,
+            "tid": tid,
+            "ts": start_us,
+            "dur": max(0, end_us - start_us),
+            "args": {key: value for key, value in args.items() if value is not None},
+        })
+
+    def add(self, event):
+        end_us = ts_us(event.get("timestamp"))
+        if end_us is None:
+            return
+        self.last_us = end_us if self.last_us is None else max(self.last_us, end_us)
+        name = event.get("event")
+        invocation_id = event.get("invocationId")
+        root_id = event.get("rootInvocationId") or invocation_id
+        if not root_id:
+            return
+        agent = event.get("agent") or "-"
+
+        if name == "subagent_invocation_start":
+            requested = event.get("requestedAgents") or []
+            state = self.root_state(root_id, requested[0] if requested and invocation_id == root_id else None)
+            parent = self.open_runs.get(event.get("parentRunId"))
+            self.open_invocations[invocation_id] = {
+                "root": root_id,
+                "pid": state["pid"],
+                "tid": parent["lane"]["tid"] if parent else 0,
+                "start": end_us,
+                "name": f"{event.get('mode') or 'invocation'} {', '.join(requested) or '-'}",
+                "args": {"invocationId": invocation_id, "depth": event.get("depth"), "mode": event.get("mode")},
+            }
+        elif name == "subagent_invocation_end":
+            info = self.open_invocations.pop(invocation_id, None)
+            if info is None:
+                return
+            args = dict(info["args"], status=event.get("status"), elapsedMs=event.get("elapsedMs"))
+            self.slice(info["pid"], info["tid"], info["name"], "invocation", info["start"], end_us, args)
+            if invocation_id == root_id:
+                self.finish_root(root_id)
+        elif name == "subagent_run_start":
+            state = self.root_state(root_id)
+            self.open_runs[event.get("runId")] = {
+                "root": root_id,
+                "state": state,
+                "lane": self.claim_lane(state, agent),
+            }
+        elif name == "subagent_run_end":
+            run = self.open_runs.pop(event.get("runId"), None)
+            if run is None:
+                # The run started before the exported window: place it on a fresh lane.
+                state = self.root_state(root_id)
+                run = {"state": state, "lane": self.claim_lane(state, agent)}
+            run["lane"]["busy"] = False
+            elapsed_us = int(event.get("elapsedMs") or 0) * 1000
+            error_label = classify_error(event.get("stderrTail", ""))
+            args = {
+                "runId": event.get("runId"),
+                "invocationId": invocation_id,
+                "status": event.get("status"),
+                "elapsedMs": event.get("elapsedMs"),
+                "error": error_label or None,
+            }
+            pid, tid = run["state"]["pid"], run["lane"]["tid"]
+            self.slice(pid, tid, f"run {agent}", "run", end_us - elapsed_us, end_us, args)
+        elif name == "subagent_tool_end":
+            run = self.open_runs.get(event.get("runId"))
+            if run is None:
+                return
+            elapsed_us = int(event.get("elapsedMs") or 0) * 1000
+            args = {
+                "summary": event.get("toolSummary"),
+                "elapsedMs": event.get("elapsedMs"),
+                "isError": event.get("isError"),
+            }
+            pid, tid = run["state"]["pid"], run["lane"]["tid"]
+            self.slice(pid, tid, event.get("toolName") or "tool", "tool", end_us - elapsed_us, end_us, args)
+
+    def finish_root(self, root_id):
+        self.roots.pop(root_id, None)
+        for run_id in [run_id for run_id, run in self.open_runs.items() if run["root"] == root_id]:
+            self.open_runs.pop(run_id)
+
+    def close(self):
+        """Slices for invocations still open at the end of the input, cut at the last timestamp seen."""
+        for info in self.open_invocations.values():
+            args = dict(info["args"], status="running")
+            self.slice(info["pid"], info["tid"], info["name"], "invocation", info["start"], self.last_us, args)
+        self.open_invocations.clear()
+
+
+def cmd_export(args):
+    since, until = args.since, args.until
+    try:
+        since = format_window_ts(since) if since else None
+        until = format_window_ts(until) if until else None
+    except (TypeError, ValueError) as exc:
+        print(str(exc), file=sys.stderr)
+        sys.exit(2)
+
+    if args.root:
+        events = load_root_events(args, args.root)
+        if since or until:
+            events = (
+                event for event in events
+                if (not since or str(event.get("timestamp")) >= since)
+                and (not until or str(event.get("timestamp")) < until)
+            )
+    else:
+        events = itertools.chain(
+            iter_archived_events(args.trace, since, until),
+            skip_archived(iter_window_events(args.trace, since, until), archived_hot_roots(args)),
+        )
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        out.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+        exporter = ChromeTraceExporter(out)
+        for event in events:
+            if args.root and args.root not in (event.get("rootInvocationId"), event.get("invocationId")):
+                continue
+            exporter.add(event)
+        exporter.close()
+        out.write("\n]}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if not exporter.slices:
+        target = f"root {args.root}" if args.root else "the selected window"
+        print(f"no invocations, runs or tools found for {target}", file=sys.stderr)
+        sys.exit(1)
+    if out is not sys.stdout:
+        print(f"wrote {exporter.slices} slices to {args.out}", file=sys.stderr)
+
+
+def archive_dir_for(trace):
+    return trace.with_name(trace.name + ARCHIVE_SUFFIX)
+
+
+def iter_archive_segments(trace):
+    """(data path, summary) for each complete archive segment, oldest first.
+
+    A segment counts once its summary exists; compact writes that file last.
+    """
+    directory = archive_dir_for(trace)
+    if not directory.is_dir():
+        return
+    for summary_path in sorted(directory.glob("*" + SEGMENT_SUMMARY_SUFFIX)):
+        try:
+            summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if not isinstance(summary, dict) or summary.get("version") != ARCHIVE_VERSION:
+            continue
+        data_path = summary_path.with_name(summary_path.name[: -len(SEGMENT_SUMMARY_SUFFIX)] + SEGMENT_DATA_SUFFIX)
+        if data_path.is_file():
+            yield data_path, summary
+
+
+def segment_rows(summary):
+    """Per-root rows of a segment's columnar root table."""
+    columns = summary["roots"]
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+
+
+def iter_archived_root_summaries(trace):
+    for _, summary in iter_archive_segments(trace):
+        yield from segment_rows(summary)
+
+
+def read_archived_root(data_path, row):
+    """Events of one archived root; line numbers count from its first line in the segment."""
+    with data_path.open("rb") as handle:
+        handle.seek(row["offset"])
+        data = gzip.decompress(handle.read(row["length"]))
+    for line_no, raw in enumerate(data.splitlines(keepends=True), start=1):
+        event = parse_event(raw, line_no)
+        if event is not None:
+            yield event
+
+
+def archived_root_events(trace, root_id):
+    for data_path, summary in iter_archive_segments(trace):
+        root_ids = summary["roots"].get("rootId", [])
+        if root_id in root_ids:
+            yield from read_archived_root(data_path, segment_rows(summary)[root_ids.index(root_id)])
+            return
+
+
+def archived_hot_roots(args):
+    """Roots both archived and still in the hot trace (a compaction stopped before its rewrite)."""
+    archived_ids = {row["rootId"] for row in iter_archived_root_summaries(args.trace)}
+    if not archived_ids:
+        return set()
+    return {row["rootId"] for row in iter_hot_root_summaries(args) if row["rootId"] in archived_ids}
+
+
+def skip_archived(events, root_ids):
+    if not root_ids:
+        return events
+    return (event for event in events if (event.get("rootInvocationId") or event.get("invocationId")) not in root_ids)
+
+
+def in_window(timestamp, since, until):
+    return isinstance(timestamp, str) and (not since or timestamp >= since) and (not until or timestamp < until)
+
+
+def iter_archived_events(trace, since, until):
+    """Events of archived roots stamped within [since, until), one root at a time."""
+    for data_path, summary in iter_archive_segments(trace):
+        if (since and summary["lastTs"] < since) or (until and summary["firstTs"] >= until):
+            continue
+        for row in segment_rows(summary):
+            if (since and (row.get("lastTs") or "") < since) or (until and (row.get("firstTs") or "") >= until):
+                continue
+            for event in read_archived_root(data_path, row):
+                if in_window(event.get("timestamp"), since, until):
+                    yield event
+
+
+def add_archived_stats(stats, data_path, summary, since, until):
+    """Fold one segment into `stats`: whole days from the stored partials, edge days from the events."""
+    edge_days = set()
+    for day, partial in summary["days"].items():
+        start = f"{day}T00:00:00.000Z"
+        end = format_window_ts(dt.datetime.fromisoformat(day) + dt.timedelta(days=1))
+        if (since and end <= since) or (until and start >= until):
+            continue
+        if (not since or since <= start) and (not until or end <= until):
+            stats.merge_partial(day, partial)
+        else:
+            edge_days.add(day)
+    if not edge_days:
+        return
+    for row in segment_rows(summary):
+        for event in read_archived_root(data_path, row):
+            timestamp = event.get("timestamp")
+            if in_window(timestamp, since, until) and timestamp[:10] in edge_days:
+                stats.add(event)
+
+
+class ArchiveSegmentWriter:
+    """One new <day>-<n> segment: gzip members per root plus the summary table, published on close()."""
+
+    def __init__(self, directory, day):
+        taken = {path.name.split(".")[0] for path in directory.glob(f"{day}-*{SEGMENT_SUMMARY_SUFFIX}")}
+        number = 1
+        while f"{day}-{number:03d}" in taken:
+            number += 1
+        self.name = f"{day}-{number:03d}"
+        self.data_path = directory / f"{self.name}{SEGMENT_DATA_SUFFIX}"
+        self.summary_path = directory / f"{self.name}{SEGMENT_SUMMARY_SUFFIX}"
+        self.tmp_path = directory / f".{self.name}{SEGMENT_DATA_SUFFIX}.{os.getpid()}.tmp"
+        self.handle = self.tmp_path.open("wb")
+        self.rows = []
+        self.days = defaultdict(TraceStats)
+
+    def add(self, row, lines):
+        member = gzip.compress(b"".join(lines), mtime=0)
+        offset = self.handle.tell()
+        self.handle.write(member)
+        first_ts = last_ts = None
+        for raw in lines:
+            event = parse_event(raw, 0)
+            timestamp = event.get("timestamp") if event else None
+            if not isinstance(timestamp, str):
+                continue
+            first_ts = timestamp if first_ts is None else min(first_ts, timestamp)
+            last_ts = timestamp if last_ts is None else max(last_ts, timestamp)
+            self.days[timestamp[:10]].add(event)
+        # Hot line numbers mean nothing once the root leaves the hot trace.
+        row = {key: value for key, value in row.items() if key not in ("startLine", "endLine")}
+        self.rows.append(
+            dict(row, offset=offset, length=len(member), lines=len(lines), firstTs=first_ts, lastTs=last_ts)
+        )
+
+    def close(self):
+        self.handle.close()
+        names = list(dict.fromkeys(name for row in self.rows for name in row))
+        timestamps = [ts for row in self.rows for ts in (row["firstTs"], row["lastTs"]) if ts]
+        summary = {
+            "version": ARCHIVE_VERSION,
+            "firstTs": min(timestamps, default=""),
+            "lastTs": max(timestamps, default=""),
+            "roots": {name: [row.get(name) for row in self.rows] for name in names},
+            "days": {day: stats.to_partial() for day, stats in sorted(self.days.items())},
+        }
+        os.replace(self.tmp_path, self.data_path)
+        tmp_summary = self.summary_path.with_name(f".{self.summary_path.name}.{os.getpid()}.tmp")
+        tmp_summary.write_text(json.dumps(summary, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_summary, self.summary_path)
+
+    def discard(self):
+        self.handle.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def compaction_files(trace, owner):
+    """Side files of one compaction: the renamed hot trace, the lines it keeps, lines appended meanwhile."""
+    stem = f".{trace.name}.compact.{owner}"
+    return trace.with_name(stem), trace.with_name(f"{stem}.kept"), trace.with_name(f"{stem}.appended")
+
+
+def append_lines(path, out):
+    """Copy `path` onto `out`, ending a torn last line so that it cannot swallow the next one."""
+    last = b"\n"
+    with path.open("rb") as handle:
+        while chunk := handle.read(1 << 20):
+            out.write(chunk)
+            last = chunk[-1:]
+    if last != b"\n":
+        out.write(b"\n")
+
+
+def publish_hot(trace, base, spill):
+    """Make `base`, followed by whatever writers appended to `trace` meanwhile, the hot trace.
+
+    Writers append by path and create the trace when it is missing. Their
+    lines are renamed to `spill` and copied onto `base`, which is then linked
+    into place. link() fails rather than replace a trace that a writer created
+    in between, and the loop picks those lines up too.
+    """
+    with base.open("r+b") as out:
+        end = out.seek(0, os.SEEK_END)
+        if end:
+            out.seek(end - 1)
+            if out.read(1) != b"\n":
+                out.write(b"\n")
+        while True:
+            try:
+                os.rename(trace, spill)
+            except FileNotFoundError:
+                pass
+            else:
+                append_lines(spill, out)
+                spill.unlink()
+            out.flush()
+            try:
+                os.link(base, trace)
+                break
+            except FileExistsError:
+                continue
+    base.unlink()
+
+
+def recover_compaction(trace):
+    """Put back hot lines that a killed compaction left in its side files.
+
+    Runs under the compact lock, so whoever wrote them is gone.
+    """
+    prefix = f".{trace.name}.compact."
+    owners = {path.name[len(prefix):].split(".")[0] for path in trace.parent.iterdir() if path.name.startswith(prefix)}
+    for owner in sorted(owners):
+        aside, kept, spill = compaction_files(trace, owner)
+        if aside.exists():
+            # The kept lines were not published yet; the renamed trace still has them all.
+            kept.unlink(missing_ok=True)
+            base = aside
+        else:
+            base = kept
+        if spill.exists():
+            if base.exists():
+                with base.open("ab") as out:
+                    append_lines(spill, out)
+                spill.unlink()
+            else:
+                os.rename(spill, base)
+        if not base.exists():
+            continue
+        try:
+            published = os.stat(base).st_ino == os.stat(trace).st_ino
+        except FileNotFoundError:
+            published = False
+        if published:
+            base.unlink()  # killed after the link, before the cleanup
+            continue
+        print(f"restoring hot lines left by an interrupted compaction: {base}", file=sys.stderr)
+        publish_hot(trace, base, spill)
+
+
+def cmd_compact(args):
+    trace = args.trace
+    require_trace(trace)
+    cutoff = format_window_ts(dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=args.keep_days))
+    directory = archive_dir_for(trace)
+    directory.mkdir(exist_ok=True)
+
+    with (directory / ".lock").open("w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            print(f"another compact is running on {trace}", file=sys.stderr)
+            sys.exit(1)
+        recover_compaction(trace)
+
+        archived_ids = {row["rootId"] for row in iter_archived_root_summaries(trace)}
+        finished = {
+            row["rootId"]: row
+            for row in iter_hot_root_summaries(args)
+            if row.get("finished") and (row.get("endTs") or "") < cutoff
+        }
+        to_archive = [root_id for root_id in finished if root_id not in archived_ids]
+        if not finished:
+            print(f"nothing to compact: no root in {trace} finished before {cutoff}")
+            return
+        if args.dry_run:
+            print(f"would archive {len(to_archive)} roots finished before {cutoff}")
+            return
+
+        aside, kept, spill = compaction_files(trace, os.getpid())
+        writers = {}
+        buffers = {}
+        moved_lines = 0
+        # From here on writers recreate the trace and append there; publish_hot()
+        # puts the kept lines back in front of theirs.
+        os.rename(trace, aside)
+        hot_size = aside.stat().st_size
+        try:
+            with aside.open("rb") as handle, kept.open("wb") as out:
+                line_no = 0
+                for raw in handle:
+                    line_no += 1
+                    if not raw.endswith(b"\n"):
+                        out.write(raw + b"\n")  # torn by a writer that died mid-line
+                        continue
+                    event = parse_event(raw, line_no)
+                    root_id = event and (event.get("rootInvocationId") or event.get("invocationId"))
+                    row = finished.get(root_id)
+                    if row is None or line_no > row["endLine"]:
+                        out.write(raw)
+                        continue
+                    moved_lines += 1
+                    if root_id in archived_ids:
+                        continue  # already archived by a compaction that stopped before the rewrite
+                    buffers.setdefault(root_id, []).append(raw)
+                    if line_no == row["endLine"]:
+                        day = (row.get("startTs") or "unknown")[:10]
+                        if day not in writers:
+                            writers[day] = ArchiveSegmentWriter(directory, day)
+                        writers[day].add(row, buffers.pop(root_id))
+                for lines in buffers.values():
+                    out.writelines(lines)  # the root's end line was not where the index saw it; keep it hot
+            for writer in writers.values():
+                writer.close()
+        except BaseException:
+            for writer in writers.values():
+                if not writer.summary_path.exists():
+                    writer.discard()
+            kept.unlink(missing_ok=True)
+            publish_hot(trace, aside, spill)
+            raise
+        aside.unlink()
+        publish_hot(trace, kept, spill)
+
+    archived_roots = sum(len(writer.rows) for writer in writers.values())
+    print(
+        f"archived {archived_roots} roots into {len(writers)} segments under {directory}; "
+        f"moved {moved_lines} lines out of the hot trace ({hot_size} -> {trace.stat().st_size} bytes)"
+    )
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Subagent trace finder/debugger")
     parser.add_argument(
@@ -433,6 +2110,11 @@ def parse_args():
         default=DEFAULT_TRACE,
         help=f"path to trace JSONL (default: {DEFAULT_TRACE})",
     )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help=f"scan the whole trace instead of the incremental <trace>{INDEX_SUFFIX} sidecar index",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -451,6 +2133,68 @@ def parse_args():
     tree.add_argument("--runs", action="store_true", help="include subagent_run_end rows")
     tree.set_defaults(func=cmd_tree)
 
+    follow = subparsers.add_parser("follow", help="print a root's tree, then each change as it is traced")
+    follow.add_argument("root", nargs="?", help="rootInvocationId (default: latest root, see --agent)")
+    follow.add_argument("--agent", help="with no root: follow the latest root of this agent (substring)")
+    follow.add_argument("--runs", action="store_true", help="include subagent_run_end rows in the initial tree")
+    follow.add_argument("--interval", type=float, default=0.5, help="poll interval in seconds (default: 0.5)")
+    follow.add_argument(
+        "--heartbeat",
+        type=float,
+        default=10.0,
+        help="print running elapsed times after this many idle seconds; 0 disables (default: 10)",
+    )
+    follow.set_defaults(func=cmd_follow)
+
+    critical = subparsers.add_parser(
+        "critical-path", help="critical path, run slack, concurrency and fan-out serialization for one root"
+    )
+    critical.add_argument("root", help="rootInvocationId")
+    critical.add_argument("--limit", type=int, default=10, help="max rows per list (default: 10)")
+    critical.set_defaults(func=cmd_critical_path)
+
+    stats = subparsers.add_parser(
+        "stats", help="per-agent and per-tool latency percentiles, failure categories and week-over-week regressions"
+    )
+    stats.add_argument("--since", help="only events at or after this ISO date/datetime (UTC unless offset given)")
+    stats.add_argument("--until", help="only events before this ISO date/datetime")
+    stats.add_argument("--days", type=float, help="shorthand for --since <now minus this many days>")
+    stats.add_argument("--json", action="store_true", help="emit one JSON report (includes per-week series)")
+    stats.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="flag p50/p95 growth above this fraction week over week (default: 0.2)",
+    )
+    stats.add_argument(
+        "--min-count",
+        type=int,
+        default=20,
+        help="samples needed in both weeks to compare an agent or tool (default: 20)",
+    )
+    stats.set_defaults(func=cmd_stats)
+
+    export = subparsers.add_parser(
+        "export", help="Chrome Trace Event JSON (Perfetto, chrome://tracing) for a root or a time range"
+    )
+    export.add_argument("root", nargs="?", help="rootInvocationId (default: every root in the window)")
+    export.add_argument("--since", help="only events at or after this ISO date/datetime (UTC unless offset given)")
+    export.add_argument("--until", help="only events before this ISO date/datetime")
+    export.add_argument("--out", default="-", help="output file (default: stdout)")
+    export.set_defaults(func=cmd_export)
+
+    compact = subparsers.add_parser(
+        "compact", help=f"move finished roots into compressed day segments under <trace>{ARCHIVE_SUFFIX}/"
+    )
+    compact.add_argument(
+        "--keep-days",
+        type=float,
+        default=COMPACT_KEEP_DAYS,
+        help=f"keep roots that finished within this many days in the hot trace (default: {COMPACT_KEEP_DAYS})",
+    )
+    compact.add_argument("--dry-run", action="store_true", help="only report how many roots would be archived")
+    compact.set_defaults(func=cmd_compact)
+
     debug = subparsers.add_parser("debug", help="tree + failures + bottlenecks")
     debug.add_argument("root", help="rootInvocationId")
     debug.add_argument("--min-tool-ms", type=int, default=500, help="slow tool threshold (default: 500)")
@@ -0,0 +1,438 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+TRACE_SCRIPT="$SCRIPT_DIR/subagent-trace.py"
+
+tmp_root=$(mktemp -d)
+trap 'rm -rf "$tmp_root"' EXIT
+
+assert_contains() {
+  local needle=$1
+  local haystack=$2
+  if [[ "$haystack" != *"$needle"* ]]; then
+    echo "Expected output to contain: $needle" >&2
+    echo "Actual output:" >&2
+    echo "$haystack" >&2
+    exit 1
+  fi
+}
+
+assert_same() {
+  local label=$1
+  local expected=$2
+  local actual=$3
+  if ! diff -u "$expected" "$actual" >&2; then
+    echo "Expected $label output to match" >&2
+    exit 1
+  fi
+}
+
+trace_cmd() {
+  python3 "$TRACE_SCRIPT" "$@"
+}
+
+# One root, fixed timestamps: a planner run fans out to a reviewer and a scout
+# that share one slot, so every number below can be worked out by hand.
+write_fixture() {
+  python3 - "$1" <<'PY'
+import json
+import sys
+
+
+def event(ts, name, invocation_id, **fields):
+    return dict(
+        timestamp=f"2026-03-02T10:00:{ts}Z", pid=1, event=name, invocationId=invocation_id,
+        rootInvocationId="rootA", **fields,
+    )
+
+
+events = [
+    event("00.000", "subagent_invocation_start", "rootA", depth=0, mode="single", requestedAgents=["planner"]),
+    event("00.000", "subagent_run_start", "rootA", runId="runA", agent="planner", depth=0),
+    event("01.000", "subagent_invocation_start", "parA", parentInvocationId="rootA", parentRunId="runA", depth=1,
+          mode="parallel", requestedAgents=["reviewer", "scout"]),
+    event("01.000", "subagent_parallel_start", "parA", taskCount=2, maxConcurrency=1, depth=1),
+    event("01.000", "subagent_run_start", "parA", runId="run1", agent="reviewer", depth=1),
+    event("02.500", "subagent_tool_end", "parA", runId="run1", agent="reviewer", depth=1, toolName="read",
+          toolSummary="src/app.py", elapsedMs=1000),
+    event("04.000", "subagent_run_end", "parA", runId="run1", agent="reviewer", depth=1, status="success",
+          elapsedMs=3000),
+    event("04.000", "subagent_run_start", "parA", runId="run2", agent="scout", depth=1),
+    event("05.000", "subagent_tool_end", "parA", runId="run2", agent="scout", depth=1, toolName="bash",
+          toolSummary="make test", elapsedMs=500, isError=True),
+    event("06.000", "subagent_run_end", "parA", runId="run2", agent="scout", depth=1, status="error",
+          elapsedMs=2000, stderrTail="TypeError: fetch failed"),
+    event("06.000", "subagent_invocation_end", "parA", depth=1, status="error", elapsedMs=5000, taskCount=2,
+          successCount=1),
+    event("07.000", "subagent_run_end", "rootA", runId="runA", agent="planner", depth=0, status="success",
+          elapsedMs=7000),
+    event("07.000", "subagent_invocation_end", "rootA", depth=0, status="success", elapsedMs=7000),
+]
+with open(sys.argv[1], "w", encoding="utf-8") as handle:
+    for item in events:
+        handle.write(json.dumps(item, separators=(",", ":")) + "\n")
+PY
+}
+
+# ROOTS roots spread over the 50 days before now, each with a parallel fan-out
+# of 1-3 runs and a few tool calls. The newest root is still running.
+generate_trace() {
+  python3 - "$1" "$2" "$3" <<'PY'
+import datetime as dt
+import json
+import random
+import sys
+
+out, root_count, seed = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+rng = random.Random(seed)
+last = dt.datetime.now(dt.timezone.utc).replace(microsecond=0) - dt.timedelta(hours=1)
+first = last - dt.timedelta(days=50)
+agents = ("reviewer", "scout", "planner", "worker")
+tools = ("read", "bash", "edit", "grep")
+errors = ("fetch failed", "No API key found", "unexpected exit")
+events = []
+
+
+def emit(at, **fields):
+    stamp = at.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    events.append((at, len(events), dict(timestamp=stamp, pid=4242, **fields)))
+
+
+def ms(delta):
+    return int(delta.total_seconds() * 1000)
+
+
+for number in range(root_count):
+    root = f"root{number:03d}"
+    started = first + (last - first) * number / root_count + dt.timedelta(seconds=rng.randrange(3600))
+    agent = rng.choice(agents)
+    common = {"rootInvocationId": root}
+    emit(started, event="subagent_invocation_start", invocationId=root, depth=0, mode="single",
+         requestedAgents=[agent], **common)
+    root_run = f"{root}-run"
+    emit(started, event="subagent_run_start", invocationId=root, runId=root_run, agent=agent, depth=0, **common)
+
+    fan_out = f"{root}-par"
+    fan_out_at = started + dt.timedelta(milliseconds=rng.randrange(50, 500))
+    tasks = [rng.choice(agents) for _ in range(rng.randrange(1, 4))]
+    emit(fan_out_at, event="subagent_invocation_start", invocationId=fan_out, parentInvocationId=root,
+         parentRunId=root_run, depth=1, mode="parallel", requestedAgents=tasks, **common)
+    emit(fan_out_at, event="subagent_parallel_start", invocationId=fan_out, taskCount=len(tasks), maxConcurrency=2,
+         depth=1, **common)
+    ends = []
+    successes = 0
+    for task, task_agent in enumerate(tasks):
+        run_id = f"{fan_out}-{task}"
+        run_started = fan_out_at + dt.timedelta(milliseconds=rng.randrange(200))
+        emit(run_started, event="subagent_run_start", invocationId=fan_out, runId=run_id, agent=task_agent, depth=1,
+             **common)
+        at = run_started
+        for _ in range(rng.randrange(4)):
+            elapsed = rng.randrange(5, 3000)
+            at += dt.timedelta(milliseconds=elapsed + rng.randrange(300))
+            emit(at, event="subagent_tool_end", invocationId=fan_out, runId=run_id, agent=task_agent, depth=1,
+                 toolName=rng.choice(tools), toolSummary="...", elapsedMs=elapsed, isError=rng.random() < 0.1,
+                 **common)
+        at += dt.timedelta(milliseconds=rng.randrange(10, 2000))
+        ok = rng.random() > 0.2
+        successes += ok
+        emit(at, event="subagent_run_end", invocationId=fan_out, runId=run_id, agent=task_agent, depth=1,
+             status="success" if ok else "error", elapsedMs=ms(at - run_started),
+             stderrTail="" if ok else rng.choice(errors), **common)
+        ends.append(at)
+    at = max(ends) + dt.timedelta(milliseconds=5)
+    emit(at, event="subagent_invocation_end", invocationId=fan_out, depth=1,
+         status="success" if successes == len(tasks) else "error", elapsedMs=ms(at - fan_out_at),
+         taskCount=len(tasks), successCount=successes, **common)
+    if number == root_count - 1:
+        continue
+    at += dt.timedelta(milliseconds=rng.randrange(10, 900))
+    emit(at, event="subagent_run_end", invocationId=root, runId=root_run, agent=agent, depth=0, status="success",
+         elapsedMs=ms(at - started), **common)
+    emit(at, event="subagent_invocation_end", invocationId=root, depth=0, status="success",
+         elapsedMs=ms(at - started), **common)
+
+events.sort(key=lambda item: item[:2])
+with open(out, "w", encoding="utf-8") as handle:
+    for _, _, item in events:
+        handle.write(json.dumps(item, separators=(",", ":")) + "\n")
+PY
+}
+
+days_ago() {
+  python3 -c 'import datetime as dt, sys; print((dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=float(sys.argv[1]))).strftime("%Y-%m-%dT%H:%M:%SZ"))' "$1"
+}
+
+window_since=$(days_ago 40)
+window_until=$(days_ago 10)
+
+# Every read-only subcommand over a few roots of a generated trace. With
+# --lines, line-numbered output (debug) is included too.
+snapshot() {
+  local trace=$1
+  shift
+  local with_lines=0
+  if [[ "${1:-}" == "--lines" ]]; then
+    with_lines=1
+    shift
+  fi
+  trace_cmd --trace "$trace" "$@" roots --limit 100
+  trace_cmd --trace "$trace" "$@" latest
+  trace_cmd --trace "$trace" "$@" roots --agent scout --limit 100
+  for root in root000 root013 root030 root047 root059; do
+    trace_cmd --trace "$trace" "$@" tree "$root" --runs
+    trace_cmd --trace "$trace" "$@" critical-path "$root"
+    trace_cmd --trace "$trace" "$@" export "$root"
+    if [[ "$with_lines" == 1 ]]; then
+      trace_cmd --trace "$trace" "$@" debug "$root" --min-tool-ms 0
+    fi
+  done
+  trace_cmd --trace "$trace" "$@" stats
+  trace_cmd --trace "$trace" "$@" stats --json
+  trace_cmd --trace "$trace" "$@" stats --since "$window_since" --until "$window_until"
+  trace_cmd --trace "$trace" "$@" export
+  trace_cmd --trace "$trace" "$@" export --since "$window_since" --until "$window_until"
+}
+
+fixture="$tmp_root/fixture.jsonl"
+write_fixture "$fixture"
+
+echo "[1/7] roots, tree and debug should report the hand-computed numbers"
+out_roots=$(trace_cmd --trace "$fixture" roots)
+assert_contains "2026-03-02T10:00:00.000Z planner         success          7.0s     1/      2 rootA" "$out_roots"
+out_debug=$(trace_cmd --trace "$fixture" debug rootA)
+assert_contains "└─ parA parallel [parallel, error, 5.0s, success 1/2]" "$out_debug"
+assert_contains "   └─ run scout [error, 2.0s] (fetch failed)" "$out_debug"
+assert_contains "- 10: scout [error, 2.0s] (fetch failed)" "$out_debug"
+assert_contains "- reviewer: 3.0s (invocation parA)" "$out_debug"
+assert_contains $'- reviewer: 3.0s\n- scout: 2.0s' "$out_debug"
+assert_contains "- reviewer: non-tool 2.0s (elapsed 3.0s, tools 1.0s)" "$out_debug"
+assert_contains $'- 6: reviewer read [1.0s] src/app.py\n- 9: scout bash [500ms] make test' "$out_debug"
+if [[ ! -f "$fixture.index.sqlite" ]]; then
+  echo "Expected the sidecar index to be created: $fixture.index.sqlite" >&2
+  exit 1
+fi
+trace_cmd --trace "$fixture" --no-index debug rootA > "$tmp_root/debug-no-index.txt"
+assert_same "debug --no-index" "$tmp_root/debug-no-index.txt" <(printf '%s\n' "$out_debug")
+# Writers log independently, so a run's tool_end can land after its run_end.
+late_tool="$tmp_root/late-tool.jsonl"
+awk 'NR == 6 { held = $0; next } { print } NR == 7 { print held }' "$fixture" > "$late_tool"
+assert_contains "- reviewer: non-tool 2.0s (elapsed 3.0s, tools 1.0s)" "$(trace_cmd --trace "$late_tool" debug rootA)"
+
+echo "[2/7] critical-path, stats and export should report the hand-computed numbers"
+out_critical=$(trace_cmd --trace "$fixture" critical-path rootA)
+assert_contains "Critical path for rootA (wall 7.0s)" "$out_critical"
+assert_contains "+    0ms    7.0s    run planner [success, 7.0s]  own 2.0s" "$out_critical"
+assert_contains "+   4.0s    2.0s        run scout [error, 2.0s]" "$out_critical"
+assert_contains "- peak 2 runs at +1.0s, average 1.71 over 7.0s wall" "$out_critical"
+assert_contains "-*parA: 2 tasks, max 1 concurrent, makespan 5.0s, longest 3.0s, sum 5.0s, lost 2.0s" "$out_critical"
+# Two runs of a parallel root that end on the same millisecond.
+tied_ends="$tmp_root/tied-ends.jsonl"
+cat > "$tied_ends" <<'JSONL'
+{"timestamp":"2026-03-02T00:00:00.000Z","event":"subagent_invocation_start","invocationId":"rootT","rootInvocationId":"rootT","depth":0,"mode":"parallel","requestedAgents":["reviewer","scout"]}
+{"timestamp":"2026-03-02T00:00:01.000Z","event":"subagent_run_end","invocationId":"rootT","rootInvocationId":"rootT","runId":"slow","agent":"reviewer","depth":1,"status":"success","elapsedMs":1000}
+{"timestamp":"2026-03-02T00:00:01.000Z","event":"subagent_run_end","invocationId":"rootT","rootInvocationId":"rootT","runId":"quick","agent":"scout","depth":1,"status":"success","elapsedMs":30}
+{"timestamp":"2026-03-02T00:00:01.000Z","event":"subagent_invocation_end","invocationId":"rootT","rootInvocationId":"rootT","depth":0,"status":"success","elapsedMs":1000}
+JSONL
+out_tied=$(trace_cmd --trace "$tied_ends" critical-path rootT)
+assert_contains "-*run reviewer [success, 1.0s] in rootT: slack 0ms" "$out_tied"
+assert_contains "- run scout [success, 30ms] in rootT: slack 0ms" "$out_tied"
+out_stats=$(trace_cmd --trace "$fixture" stats)
+assert_contains "Window: start .. end  roots 1, runs 3" "$out_stats"
+assert_contains "scout                  1  100.0%     2.0s     2.0s     2.0s" "$out_stats"
+assert_contains "- fetch failed: 1 (33.3% of runs; scout 1)" "$out_stats"
+trace_cmd --trace "$fixture" export rootA --out "$tmp_root/rootA.trace.json" 2>/dev/null
+python3 - "$tmp_root/rootA.trace.json" <<'PY'
+import json
+import sys
+
+with open(sys.argv[1], encoding="utf-8") as handle:
+    events = json.load(handle)["traceEvents"]
+slices = [event for event in events if event["ph"] == "X"]
+origin = min(event["ts"] for event in slices)
+# (name, lane, start, duration) in microseconds from the root's start
+slices = sorted((event["name"], event["tid"], event["ts"] - origin, event["dur"]) for event in slices)
+expected = sorted([
+    ("single planner", 0, 0, 7000000),
+    ("run planner", 1, 0, 7000000),
+    ("parallel reviewer, scout", 1, 1000000, 5000000),
+    ("run reviewer", 2, 1000000, 3000000),
+    ("read", 2, 1500000, 1000000),
+    ("run scout", 3, 4000000, 2000000),
+    ("bash", 3, 4500000, 500000),
+])
+if slices != expected:
+    raise SystemExit(f"unexpected export slices:\n{slices}\nexpected:\n{expected}")
+PY
+
+echo "[3/7] index and --no-index should agree on every subcommand, also after appends"
+generated="$tmp_root/generated.jsonl"
+generate_trace "$generated" 60 11
+head -n 600 "$generated" > "$tmp_root/growing.jsonl"
+trace_cmd --trace "$tmp_root/growing.jsonl" roots >/dev/null
+tail -n +601 "$generated" >> "$tmp_root/growing.jsonl"
+snapshot "$tmp_root/growing.jsonl" --lines > "$tmp_root/index.txt"
+snapshot "$tmp_root/growing.jsonl" --lines --no-index > "$tmp_root/no-index.txt"
+assert_same "indexed" "$tmp_root/no-index.txt" "$tmp_root/index.txt"
+
+echo "[4/7] stats percentiles should stay within the sketch accuracy of the exact ones"
+trace_cmd --trace "$generated" stats --json > "$tmp_root/stats.json"
+python3 - "$generated" "$tmp_root/stats.json" <<'PY'
+import json
+import math
+import sys
+from collections import defaultdict
+
+samples = defaultdict(list)
+roots = 0
+with open(sys.argv[1], encoding="utf-8") as handle:
+    for line in handle:
+        event = json.loads(line)
+        if event["event"] == "subagent_run_end":
+            samples[event["agent"]].append(event["elapsedMs"])
+        elif event["event"] == "subagent_invocation_start" and event["invocationId"] == event["rootInvocationId"]:
+            roots += 1
+with open(sys.argv[2], encoding="utf-8") as handle:
+    report = json.load(handle)
+
+if report["roots"] != roots or report["runs"] != sum(map(len, samples.values())):
+    raise SystemExit(f"expected {roots} roots and {sum(map(len, samples.values()))} runs: {report['roots']}, {report['runs']}")
+for agent, values in samples.items():
+    values.sort()
+    latency = report["agents"][agent]["latencyMs"]
+    if latency["count"] != len(values):
+        raise SystemExit(f"{agent}: expected {len(values)} samples, got {latency['count']}")
+    for q in (0.5, 0.95, 0.99):
+        rank = q * (len(values) - 1)
+        # The sketch returns one of the samples at the rank, to within 1%.
+        low, high = values[math.floor(rank)], values[math.ceil(rank)]
+        got = latency[f"p{round(q * 100)}"]
+        if not low * 0.99 - 1 <= got <= high * 1.01 + 1:
+            raise SystemExit(f"{agent} p{round(q * 100)}: {got} not within 1% of [{low}, {high}]")
+PY
+
+echo "[5/7] follow should print appended runs and stop when the root finishes"
+follow_trace="$tmp_root/follow.jsonl"
+head -n 7 "$fixture" > "$follow_trace"
+follow_out="$tmp_root/follow.txt"
+trace_cmd --trace "$follow_trace" follow rootA --runs --interval 0.05 --heartbeat 0 > "$follow_out" &
+follow_pid=$!
+for _ in $(seq 100); do
+  [[ -s "$follow_out" ]] && break
+  sleep 0.05
+done
+tail -n +8 "$fixture" >> "$follow_trace"
+for _ in $(seq 100); do
+  kill -0 "$follow_pid" 2>/dev/null || break
+  sleep 0.05
+done
+if kill -0 "$follow_pid" 2>/dev/null; then
+  kill "$follow_pid"
+  echo "Expected follow to stop once the root finished" >&2
+  cat "$follow_out" >&2
+  exit 1
+fi
+wait "$follow_pid"
+follow_dump=$(cat "$follow_out")
+assert_contains "   └─ run reviewer [success, 3.0s]" "$follow_dump"
+assert_contains "10:00:06 FAIL     run scout [error, 2.0s] (fetch failed) in parA" "$follow_dump"
+assert_contains "--- root finished: rootA planner [single, success, 7.0s]" "$follow_dump"
+
+echo "[6/7] compact should archive old roots without changing any report"
+compact_trace="$tmp_root/compact.jsonl"
+cp "$generated" "$compact_trace"
+snapshot "$compact_trace" > "$tmp_root/before-compact.txt"
+out_compact=$(trace_cmd --trace "$compact_trace" compact --keep-days 25)
+assert_contains "archived " "$out_compact"
+if [[ "$(wc -l < "$compact_trace")" -ge "$(wc -l < "$generated")" ]]; then
+  echo "Expected compact to move lines out of the hot trace" >&2
+  exit 1
+fi
+snapshot "$compact_trace" > "$tmp_root/after-compact.txt"
+assert_same "compacted" "$tmp_root/before-compact.txt" "$tmp_root/after-compact.txt"
+snapshot "$compact_trace" --no-index > "$tmp_root/after-compact-no-index.txt"
+assert_same "compacted --no-index" "$tmp_root/before-compact.txt" "$tmp_root/after-compact-no-index.txt"
+
+echo "[7/7] compact should keep lines appended while it runs, or left behind by a killed run"
+racing_trace="$tmp_root/racing.jsonl"
+cp "$generated" "$racing_trace"
+python3 - "$TRACE_SCRIPT" "$racing_trace" <<'PY'
+import contextlib
+import gzip
+import importlib.util
+import io
+import json
+import sys
+from pathlib import Path
+
+script, trace = sys.argv[1], Path(sys.argv[2])
+spec = importlib.util.spec_from_file_location("subagent_trace", script)
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+spec.loader.exec_module(module)
+original = trace.read_bytes().splitlines(keepends=True)
+
+
+appended = []
+
+
+def append(root):
+    # What the extension does for every event: append one line by path.
+    appended.append(root)
+    with open(trace, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({
+            "timestamp": "2099-01-01T00:00:00.000Z", "event": "subagent_invocation_start", "invocationId": root,
+            "rootInvocationId": root, "depth": 0, "mode": "single", "requestedAgents": ["late"],
+        }) + "\n")
+
+
+# One line lands while the old trace is being archived, one while the kept lines are put back.
+close_segment, append_lines = module.ArchiveSegmentWriter.close, module.append_lines
+
+
+def close_segment_racing(self):
+    if not trace.exists() and "late1" not in appended:
+        append("late1")
+    close_segment(self)
+
+
+def append_lines_racing(path, out):
+    if not trace.exists() and "late2" not in appended:
+        append("late2")
+    append_lines(path, out)
+
+
+module.ArchiveSegmentWriter.close = close_segment_racing
+module.append_lines = append_lines_racing
+sys.argv = [script, "--trace", str(trace), "compact", "--keep-days", "25"]
+with contextlib.redirect_stdout(io.StringIO()):
+    module.main()
+
+hot = trace.read_bytes().splitlines(keepends=True)
+archived = []
+for data_path, summary in module.iter_archive_segments(trace):
+    archived.extend(gzip.decompress(data_path.read_bytes()).splitlines(keepends=True))
+late = [json.loads(line)["invocationId"] for line in hot if b'"late' in line]
+if late != ["late1", "late2"]:
+    raise SystemExit(f"expected both late roots at the end of the hot trace, in order: {late}")
+if sorted(hot[:-2] + archived) != sorted(original):
+    raise SystemExit("compact lost or duplicated trace lines")
+leftovers = [path.name for path in trace.parent.iterdir() if ".compact." in path.name]
+if leftovers:
+    raise SystemExit(f"compact left side files behind: {leftovers}")
+PY
+# A compaction killed after moving the hot trace aside: a new trace was started meanwhile.
+killed_trace="$tmp_root/killed.jsonl"
+cp "$fixture" "$tmp_root/.killed.jsonl.compact.99999"
+tail -n 1 "$fixture" > "$killed_trace"
+cat "$fixture" "$killed_trace" > "$tmp_root/killed-expected.jsonl"
+trace_cmd --trace "$killed_trace" compact --keep-days 25 --dry-run >/dev/null 2>&1
+assert_same "restored hot trace" "$tmp_root/killed-expected.jsonl" "$killed_trace"
+if [[ -e "$tmp_root/.killed.jsonl.compact.99999" ]]; then
+  echo "Expected compact to remove the side file it restored" >&2
+  exit 1
+fi
+
+echo "subagent-trace validation passed"
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Wait for changes under directory trees: inotify on Linux, stat polling elsewhere.
+
+Shared by ``graph-qa.sh --watch`` and ``scripts/sync-catalog-artifacts.py
+--watch``. Standard library only: inotify is called through ctypes. When it is
+missing, or the watch limit is reached, the watcher falls back to comparing
+file stats every ``interval`` seconds.
+
+``Watcher.wait()`` blocks until something changes. It keeps collecting events
+until none arrive for SETTLE_SECONDS, so an editor's write-temp-then-rename
+counts as one change. It returns ``{path: is_dir}``, with paths joined onto
+the root strings the watcher was given.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+SETTLE_SECONDS = 0.05
+POLL_INTERVAL = 0.5
+
+
+class _Inotify:
+    """Recursive inotify watches over directory trees."""
+
+    def __init__(self, roots, prune):
+        name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(name, use_errno=True) if name else None
+        if libc is None or not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._libc = libc
+        self.roots = roots
+        self.prune = prune
+        self.dirs = {}
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        try:
+            for root in roots:
+                self._add_tree(root)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_tree(self, root):
+        """Watch root and every directory below it; returns the files found."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in self.prune]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                # ENOSPC means fs.inotify.max_user_watches is exhausted.
+                raise OSError(err, os.strerror(err), dirpath)
+            self.dirs[wd] = dirpath
+            found.extend(os.path.join(dirpath, name) for name in filenames)
+        return found
+
+    def _read(self, changed):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+                self._event(wd, mask, os.fsdecode(raw_name.rstrip(b"\0")), changed)
+
+    def _event(self, wd, mask, name, changed):
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped: report every root so callers reload everything.
+            for root in self.roots:
+                changed[root] = True
+            return
+        directory = self.dirs.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self.dirs[wd]
+            return
+        if not name:
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # A moved tree is picked up again from its new parent's IN_MOVED_TO.
+                self._libc.inotify_rm_watch(self.fd, wd)
+                self.dirs.pop(wd, None)
+            changed[directory] = True
+            return
+        is_dir = bool(mask & IN_ISDIR)
+        if is_dir and name in self.prune:
+            return
+        path = os.path.join(directory, name)
+        if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+            for file in self._add_tree(path):
+                changed.setdefault(file, False)
+        changed[path] = changed.get(path, False) or is_dir
+
+    def wait(self):
+        changed = {}
+        while not changed:
+            select.select([self.fd], [], [])
+            while True:
+                self._read(changed)
+                ready, _, _ = select.select([self.fd], [], [], SETTLE_SECONDS)
+                if not ready:
+                    break
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watcher:
+    """Report what changed under ``roots``, skipping directories named in ``prune``."""
+
+    def __init__(self, roots, prune=(), interval=POLL_INTERVAL):
+        self.roots = [str(root) for root in roots if os.path.isdir(root)]
+        self.prune = set(prune)
+        self.interval = interval
+        self._inotify = None
+        self._snapshot = None
+        try:
+            self._inotify = _Inotify(self.roots, self.prune)
+        except OSError:
+            self._snapshot = self._scan()
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d not in self.prune]
+                snapshot[dirpath] = None
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (info.st_mtime_ns, info.st_size)
+        return snapshot
+
+    def wait(self):
+        """Block until something changes; returns ``{path: is_dir}``."""
+        if self._inotify is not None:
+            try:
+                return self._inotify.wait()
+            except OSError:
+                # Typically the watch limit, hit while following a new directory.
+                self._inotify.close()
+                self._inotify = None
+                self._snapshot = self._scan()
+                return {root: True for root in self.roots}
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {}
+            for path in snapshot.keys() | self._snapshot.keys():
+                before = self._snapshot.get(path, ())
+                after = snapshot.get(path, ())
+                if before != after:
+                    changed[path] = before is None or after is None
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+def describe_changes(changed, base=None, limit=3) -> str:
+    """One line naming the first few changed paths, relative to ``base``."""
+    paths = sorted(changed)
+    if base is not None:
+        paths = [os.path.relpath(path, base) for path in paths]
+    shown = ", ".join(paths[:limit])
+    more = f" (+{len(paths) - limit} more)" if len(paths) > limit else ""
+    return f"── {time.strftime('%H:%M:%S')} changed: {shown}{more}"
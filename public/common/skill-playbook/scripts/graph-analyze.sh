@@ -0,0 +1,16 @@
+#!/usr/bin/env bash
+# Report skill graph structure: hops from index, unreachable nodes, cycles, link hotspots.
+#
+# Usage:
+#   graph-analyze.sh                      # all skills with graph/
+#   graph-analyze.sh --skill superplan    # one skill graph
+#   graph-analyze.sh --top 5 --json       # machine-readable, 5 hotspots per list
+#
+# The analysis lives in graph_analyze.py next to this script.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SKILLS_ROOT="${SKILLS_ROOT:-$(cd "${SCRIPT_DIR}/../.." && pwd)}"
+
+exec python3 "${SCRIPT_DIR}/graph_analyze.py" "$SKILLS_ROOT" "$@"
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""Report the structure of skill graphs: reachability, cycles, hotspots and hop depth.
+
+Usage:
+  graph_analyze.py SKILLS_ROOT [--skill <name>]... [--top <n>] [--json]
+                               [--index-root <dir>]... [--jobs <n>] [--cache-file <path>] [--no-cache]
+
+graph-analyze.sh passes the skills root. Edges are the frontmatter links and
+body wikilinks that graph QA resolves (see graph_qa.py), so files, the node
+index and the result cache are shared with it. Broken links are left to graph
+QA. Per graph directory the report lists:
+
+- the hop distance of every node from ``graph/index.md`` (breadth-first, only
+  through nodes of the same graph) and one deepest chain. Each hop is one
+  more file the agent reads before it reaches the node;
+- nodes that cannot be reached from the index at all;
+- cycles, as strongly connected components (Tarjan), each with one example.
+
+Across all graphs it lists the nodes with the most incoming and outgoing
+links. Every step is linear in nodes plus links.
+"""
+
+import heapq
+import json
+import posixpath
+import sys
+from collections import deque
+
+import graph_qa
+
+USAGE = (
+    "Usage: graph-analyze.sh [--skill <name>]... [--top <n>] [--json] [--index-root <dir>]..."
+    " [--jobs <n>] [--cache-file <path>] [--no-cache]"
+)
+DEFAULT_TOP = 10
+INDEX_FILE = "index.md"
+
+
+def parse_args(argv):
+    top = DEFAULT_TOP
+    as_json = False
+    rest = []
+    args = argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in {"-h", "--help"}:
+            print(USAGE)
+            sys.exit(0)
+        if arg == "--json":
+            as_json = True
+            i += 1
+            continue
+        if arg == "--top":
+            if i + 1 >= len(args):
+                print("✗ --top requires a value", file=sys.stderr)
+                sys.exit(2)
+            value = args[i + 1]
+            if not value.isdigit() or int(value) < 1:
+                print(f"✗ --top requires a positive integer: {value}", file=sys.stderr)
+                sys.exit(2)
+            top = int(value)
+            i += 2
+            continue
+        rest.append(arg)
+        i += 1
+    skills_root, skill_filters, index_roots, jobs, cache_path, watch = graph_qa.parse_args([argv[0], *rest])
+    if watch:
+        print("✗ Unknown argument: --watch", file=sys.stderr)
+        sys.exit(2)
+    return (skills_root, skill_filters, index_roots, jobs, cache_path), top, as_json
+
+
+def label(node: str) -> str:
+    """``skill:nodes/name`` for graph nodes, the installed path otherwise."""
+    name = node[:-3] if node.endswith(".md") else node
+    skill, sep, rest = name.partition("/graph/")
+    return f"{skill}:{rest}" if sep else name
+
+
+def build_edges(files_by_dir, facts, index: graph_qa.NodeIndex):
+    """Return (graphs, edges).
+
+    ``graphs`` holds the prefix and installed node paths of each graph
+    directory. ``edges`` maps a node to the unique nodes or indexed files it
+    links to, in link order.
+    """
+    graphs = []
+    edges = {}
+    for graph_dir, markdown_files in files_by_dir:
+        prefix = graph_qa.installed_prefix(graph_dir)
+        nodes = [f"{prefix}/{md.relative_to(graph_dir).as_posix()}" for md in markdown_files]
+        graphs.append({"dir": graph_dir, "prefix": prefix, "nodes": nodes})
+
+        by_name = {}
+        for md, node in zip(markdown_files, nodes):
+            node_id = facts[str(md)]["id"]
+            if node_id is not None:
+                by_name.setdefault(node_id, node)
+        for md, node in zip(markdown_files, nodes):
+            by_name.setdefault(md.stem, node)
+
+        for md, node in zip(markdown_files, nodes):
+            targets = {}
+            for target in facts[str(md)]["targets"]:
+                base_target = graph_qa.split_anchor(target)
+                if graph_qa.is_markdown_path_target(base_target):
+                    key = index.lookup(posixpath.dirname(node), base_target)
+                else:
+                    key = by_name.get(base_target)
+                    if key is None and base_target in index.shared:
+                        key = index.installed[index.shared[base_target]]
+                if key is not None:
+                    targets[key] = None
+            edges[node] = list(targets)
+    return graphs, edges
+
+
+def hop_depths(root: str, members, edges):
+    """Breadth-first search from root inside one graph: node -> (hops, previous node)."""
+    seen = {root: (0, None)}
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        hops = seen[node][0] + 1
+        for target in edges[node]:
+            if target in members and target not in seen:
+                seen[target] = (hops, node)
+                queue.append(target)
+    return seen
+
+
+def strongly_connected(nodes, edges):
+    """Tarjan's algorithm with an explicit stack; returns the components that form cycles."""
+    order = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for start in nodes:
+        if start in order:
+            continue
+        order[start] = low[start] = len(order)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(edges[start]))]
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                if target not in edges:
+                    continue
+                if target not in order:
+                    order[target] = low[target] = len(order)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges[target])))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], order[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges[node]:
+                        components.append(sorted(component))
+    return components
+
+
+def example_cycle(component, edges):
+    """Shortest cycle through the component's first node, found breadth-first."""
+    members = set(component)
+    start = component[0]
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for target in edges[node]:
+            if target == start:
+                chain = [node]
+                while chain[-1] != start:
+                    chain.append(previous[chain[-1]])
+                return chain[::-1] + [start]
+            if target in members and target not in previous:
+                previous[target] = node
+                queue.append(target)
+    return [start]
+
+
+def analyze(files_by_dir, facts, index: graph_qa.NodeIndex, top: int):
+    graphs, edges = build_edges(files_by_dir, facts, index)
+    components = strongly_connected(list(edges), edges)
+    component_graph = {}
+    for component in components:
+        component_graph.setdefault(component[0].rsplit("/graph/", 1)[0], []).append(component)
+
+    fan_in = {}
+    for targets in edges.values():
+        for target in targets:
+            fan_in[target] = fan_in.get(target, 0) + 1
+
+    report = {"graphs": [], "fanIn": [], "fanOut": []}
+    for graph in graphs:
+        prefix = graph["prefix"]
+        members = set(graph["nodes"])
+        links = sum(len(edges[node]) for node in graph["nodes"])
+        outside = sum(1 for node in graph["nodes"] for target in edges[node] if target not in members)
+        entry = {
+            "skill": prefix.split("/", 1)[0],
+            "path": str(graph["dir"]),
+            "nodes": len(graph["nodes"]),
+            "links": links,
+            "outsideLinks": outside,
+            "index": None,
+            "maxHops": None,
+            "hops": {},
+            "deepest": [],
+            "unreachable": [],
+            "cycles": [],
+        }
+        root = f"{prefix}/{INDEX_FILE}"
+        if root in members:
+            entry["index"] = label(root)
+            seen = hop_depths(root, members, edges)
+            deepest = root
+            for node in graph["nodes"]:
+                if node not in seen:
+                    entry["unreachable"].append(label(node))
+                    continue
+                hops = seen[node][0]
+                entry["hops"][hops] = entry["hops"].get(hops, 0) + 1
+                if hops > seen[deepest][0]:
+                    deepest = node
+            entry["hops"] = {str(hops): entry["hops"][hops] for hops in sorted(entry["hops"])}
+            entry["maxHops"] = seen[deepest][0]
+            chain = [deepest]
+            while seen[chain[-1]][1] is not None:
+                chain.append(seen[chain[-1]][1])
+            entry["deepest"] = [label(node) for node in reversed(chain)]
+        for component in component_graph.get(prefix.rsplit("/", 1)[0], []):
+            entry["cycles"].append(
+                {"size": len(component), "example": [label(node) for node in example_cycle(component, edges)]}
+            )
+        report["graphs"].append(entry)
+
+    report["fanIn"] = hotspots(fan_in.items(), top)
+    report["fanOut"] = hotspots(((node, len(targets)) for node, targets in edges.items() if targets), top)
+    report["summary"] = {
+        "graphs": len(graphs),
+        "nodes": len(edges),
+        "links": sum(len(targets) for targets in edges.values()),
+    }
+    return report
+
+
+def hotspots(counts, top: int):
+    """The ``top`` nodes by link count, ties in node order."""
+    best = heapq.nsmallest(top, counts, key=lambda item: (-item[1], item[0]))
+    return [{"node": label(node), "links": count} for node, count in best]
+
+
+def short(node_label: str, skill: str) -> str:
+    prefix = f"{skill}:"
+    return node_label[len(prefix):] if node_label.startswith(prefix) else node_label
+
+
+def print_report(report):
+    summary = report["summary"]
+    print(f"Graph analysis: {summary['graphs']} graph directories, {summary['nodes']} nodes, {summary['links']} links")
+    for entry in report["graphs"]:
+        skill = entry["skill"]
+        print()
+        print(f"{skill} ({entry['path']})")
+        print(f"  {entry['nodes']} nodes, {entry['links']} links ({entry['outsideLinks']} leave the graph)")
+        if entry["index"] is None:
+            print(f"  no {INDEX_FILE}: hop distance and reachability skipped")
+        else:
+            hops = " ".join(f"{hops}:{count}" for hops, count in entry["hops"].items())
+            print(f"  max hops from index: {entry['maxHops']} (nodes per hop {hops})")
+            if entry["maxHops"]:
+                print(f"  deepest: {' → '.join(short(node, skill) for node in entry['deepest'])}")
+            if entry["unreachable"]:
+                print(f"  unreachable from index ({len(entry['unreachable'])}):")
+                for node in entry["unreachable"]:
+                    print(f"    {short(node, skill)}")
+            else:
+                print("  unreachable from index: none")
+        if entry["cycles"]:
+            print(f"  cycles ({len(entry['cycles'])}):")
+            for cycle in entry["cycles"]:
+                nodes = "node" if cycle["size"] == 1 else "nodes"
+                example = " → ".join(short(node, skill) for node in cycle["example"])
+                print(f"    {cycle['size']} {nodes}, e.g. {example}")
+        else:
+            print("  cycles: none")
+
+    for title, key in (("Fan-in hotspots", "fanIn"), ("Fan-out hotspots", "fanOut")):
+        print()
+        print(f"{title}:")
+        for item in report[key]:
+            print(f"  {item['links']:>4}  {item['node']}")
+
+
+def main(argv) -> int:
+    (skills_root, skill_filters, index_roots, jobs, cache_path), top, as_json = parse_args(argv)
+    graph_dirs = graph_qa.find_graph_dirs(skills_root, skill_filters)
+    if not graph_dirs:
+        print("No graph directories found.")
+        return 0
+
+    cache = graph_qa.ResultCache(cache_path)
+    index, files_by_dir, facts, _ = graph_qa.load_graphs(skills_root, graph_dirs, index_roots, cache, jobs)
+    cache.save()
+    report = analyze(files_by_dir, facts, index, top)
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(USAGE.replace("graph-analyze.sh", "graph_analyze.py SKILLS_ROOT"), file=sys.stderr)
+        sys.exit(2)
+    sys.exit(main(sys.argv[1:]))
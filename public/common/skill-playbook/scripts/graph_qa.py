@@ -0,0 +1,935 @@
+#!/usr/bin/env python3
+"""Validate skill graph metadata and wikilinks.
+
+Usage:
+  graph_qa.py SKILLS_ROOT [--skill <name>]... [--index-root <dir>]... [--jobs <n>]
+                          [--cache-file <path>] [--no-cache] [--watch]
+
+graph-qa.sh passes the skills root. Each markdown file is analyzed once into
+JSON facts: frontmatter errors, node id, metadata problems and link targets.
+Those facts only depend on the file content, so they are cached by its sha256
+and reused until the file changes. Cache misses are analyzed in a process pool.
+Frontmatter made of one-line keys, flow lists and block lists of wikilinks or
+paths is read without running the full YAML parser.
+
+Links resolve against one index of every markdown file in every skill the
+checked skills may depend on (graphs, tier graphs, references/, SKILL.md).
+Files are keyed by their installed path, ``<skill>/<path in skill>``, because
+installed skills sit side by side whatever lane they come from. When
+SKILLS_ROOT is a lane root of this repository (``public/common``,
+``private/pi``, ...) the other public lane roots join the index, and so do
+the private ones when SKILLS_ROOT is private itself. Public skills are
+installed without the private lane, so a link from a public graph into a
+private skill is reported as broken. ``--index-root`` adds more roots. Nodes
+whose id starts with ``shared-`` (the skill-commons contracts) can be
+wikilinked from any skill that can see them. The cache also
+keeps each graph directory's errors, so a graph whose files and index are
+unchanged is not validated again.
+
+``--watch`` keeps all of this in memory and waits for filesystem events (see
+fs_watch.py). An edited node is re-read on its own, and only the graphs whose
+fingerprint it changes are validated again. Files that are added, removed or
+moved rebuild the index. The report is printed again after every change.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fs_watch import Watcher, describe_changes
+
+try:
+    import yaml
+except Exception as exc:  # pragma: no cover
+    print("✗ graph-qa requires PyYAML (python module 'yaml').", file=sys.stderr)
+    print(f"  Import error: {exc}", file=sys.stderr)
+    sys.exit(2)
+
+USAGE = (
+    "Usage: graph-qa.sh [--skill <name>]... [--index-root <dir>]... [--jobs <n>]"
+    " [--cache-file <path>] [--no-cache] [--watch]"
+)
+
+REQUIRED_KEYS = {"id", "description", "status", "tags", "links"}
+ALLOWED_STATUS = {
+    "active",
+    "draft",
+    "proposed",
+    "piloting",
+    "adopted",
+    "rejected",
+    "deprecated",
+    "archived",
+}
+
+WIKILINK_PATTERN = re.compile(r"\[\[([^\]]+)\]\]")
+
+CACHE_VERSION = 2
+CACHE_MAX_ENTRIES = 50_000
+# A file stamped this close to the previous run may have changed again within
+# the same mtime tick, so its digest is recomputed.
+RACY_MTIME_NS = 2_000_000_000
+LANE_NAMES = ("public", "private")
+SHARED_PREFIX = "shared-"
+SKIP_DIRS = {"node_modules", ".git"}
+# Below this many cache misses, starting worker processes costs more than it saves.
+PARALLEL_MIN_FILES = 64
+
+SIMPLE_KEY_LINE = re.compile(r"([A-Za-z_][A-Za-z0-9_-]*):(?: +(.*))?$")
+SIMPLE_ITEM_LINE = re.compile(r"( *)- +(.*)$")
+SIMPLE_WIKILINK_VALUE = re.compile(r"\[\[([^\[\]{},]*)\]\]$")
+PLAIN_FIRST_CHAR = re.compile(r"[A-Za-z0-9_./~(]")
+FLOW_INDICATORS = set(",[]{}:?")
+STR_TAG = "tag:yaml.org,2002:str"
+SIMPLE_TAGS = {
+    tag: yaml.constructor.SafeConstructor.yaml_constructors[tag]
+    for tag in (
+        STR_TAG,
+        "tag:yaml.org,2002:null",
+        "tag:yaml.org,2002:bool",
+        "tag:yaml.org,2002:int",
+        "tag:yaml.org,2002:float",
+        "tag:yaml.org,2002:timestamp",
+    )
+}
+RESOLVER = yaml.resolver.Resolver()
+CONSTRUCTOR = yaml.constructor.SafeConstructor()
+
+
+def default_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "skills-for-ai" / "graph-qa.json"
+
+
+def parse_args(argv):
+    skills_root = Path(argv[0])
+    args = argv[1:]
+
+    skill_filters = []
+    index_roots = []
+    jobs = os.cpu_count() or 1
+    cache_path = default_cache_path()
+    watch = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in {"-h", "--help"}:
+            print(USAGE)
+            sys.exit(0)
+        if arg in {"--skill", "--index-root", "--jobs", "--cache-file"}:
+            if i + 1 >= len(args):
+                print(f"✗ {arg} requires a value", file=sys.stderr)
+                sys.exit(2)
+            value = args[i + 1]
+            if arg == "--skill":
+                skill_filters.append(value)
+            elif arg == "--index-root":
+                index_roots.append(Path(value))
+            elif arg == "--cache-file":
+                cache_path = Path(value)
+            elif value.isdigit() and int(value) > 0:
+                jobs = int(value)
+            else:
+                print(f"✗ --jobs requires a positive integer: {value}", file=sys.stderr)
+                sys.exit(2)
+            i += 2
+            continue
+        if arg == "--no-cache":
+            cache_path = None
+            i += 1
+            continue
+        if arg == "--watch":
+            watch = True
+            i += 1
+            continue
+        print(f"✗ Unknown argument: {arg}", file=sys.stderr)
+        sys.exit(2)
+
+    return skills_root, skill_filters, index_roots, jobs, cache_path, watch
+
+
+def find_graph_dirs(skills_root: Path, skill_filters):
+    if not skills_root.exists():
+        print(f"✗ Skills root not found: {skills_root}", file=sys.stderr)
+        sys.exit(2)
+
+    if skill_filters:
+        skill_dirs = [skills_root / name for name in skill_filters]
+    else:
+        skill_dirs = sorted([p for p in skills_root.iterdir() if p.is_dir() and not p.name.startswith('.')])
+
+    graph_dirs = []
+    for skill_dir in skill_dirs:
+        if not skill_dir.exists():
+            print(f"✗ Skill not found: {skill_dir}")
+            sys.exit(1)
+        graph_dir = skill_dir / "graph"
+        if graph_dir.exists() and graph_dir.is_dir():
+            graph_dirs.append(graph_dir)
+        elif skill_filters:
+            print(f"✗ No graph/ directory for skill: {skill_dir.name}")
+            sys.exit(1)
+    return graph_dirs
+
+
+class NotSimple(Exception):
+    """Frontmatter uses YAML beyond what parse_simple_frontmatter reads."""
+
+
+def simple_scalar(token: str, flow: bool):
+    """Load a one-line scalar exactly as PyYAML would, or raise NotSimple."""
+    if token[0] in "\"'":
+        quote = token[0]
+        inner = token[1:-1]
+        if len(token) < 2 or token[-1] != quote or quote in inner or "\\" in inner:
+            raise NotSimple
+        return inner
+    if not PLAIN_FIRST_CHAR.match(token) or ": " in token or " #" in token or token.endswith(":"):
+        raise NotSimple
+    if flow and not FLOW_INDICATORS.isdisjoint(token):
+        raise NotSimple
+    tag = RESOLVER.resolve(yaml.nodes.ScalarNode, token, (True, False))
+    construct = SIMPLE_TAGS.get(tag)
+    if construct is None:
+        raise NotSimple
+    try:
+        return construct(CONSTRUCTOR, yaml.nodes.ScalarNode(tag, token))
+    except Exception:
+        raise NotSimple from None
+
+
+def simple_value(token: str):
+    """Load a scalar, a flow list of scalars or a bare ``[[wikilink]]``."""
+    match = SIMPLE_WIKILINK_VALUE.match(token)
+    if match:
+        inner = match.group(1).strip(" ")
+        if not inner:
+            raise NotSimple
+        return [[simple_scalar(inner, flow=True)]]
+    if token.startswith("["):
+        if not token.endswith("]"):
+            raise NotSimple
+        inner = token[1:-1].strip(" ")
+        if not inner:
+            return []
+        items = [item.strip(" ") for item in inner.split(",")]
+        if not all(items):
+            raise NotSimple
+        return [simple_scalar(item, flow=True) for item in items]
+    return simple_scalar(token, flow=False)
+
+
+def parse_simple_frontmatter(raw: str):
+    """Read common frontmatter without PyYAML; None means fall back to yaml.safe_load.
+
+    Only top-level ``key: value`` lines and block lists under an empty key are
+    accepted. Scalars go through PyYAML's own resolver and constructors, so
+    anything accepted loads to the same dict yaml.safe_load would return.
+    """
+    if "\t" in raw or yaml.reader.Reader.NON_PRINTABLE.search(raw):
+        return None
+    data = {}
+    list_key = None
+    list_indent = None
+    try:
+        for line in raw.split("\n"):
+            line = line.rstrip(" ")
+            if not line:
+                continue
+            item = SIMPLE_ITEM_LINE.match(line)
+            if item:
+                indent = len(item.group(1))
+                if list_key is None or list_indent not in (None, indent):
+                    return None
+                if list_indent is None:
+                    data[list_key] = []
+                    list_indent = indent
+                data[list_key].append(simple_value(item.group(2)))
+                continue
+            entry = SIMPLE_KEY_LINE.match(line)
+            if not entry:
+                return None
+            key, token = entry.groups()
+            if RESOLVER.resolve(yaml.nodes.ScalarNode, key, (True, False)) != STR_TAG:
+                return None
+            if token is None:
+                data[key] = None
+                list_key = key
+            else:
+                data[key] = simple_value(token)
+                list_key = None
+            list_indent = None
+    except NotSimple:
+        return None
+    return data or None
+
+
+def load_frontmatter(raw: str):
+    data = parse_simple_frontmatter(raw)
+    if data is None:
+        data = yaml.safe_load(raw)
+    return data
+
+
+def normalize_target(raw: str) -> str:
+    target = raw.split("|", 1)[0].strip()
+    if target.startswith("[[") and target.endswith("]]" ):
+        target = target[2:-2].strip()
+    return target
+
+
+def split_anchor(target: str) -> str:
+    return target.split("#", 1)[0].strip()
+
+
+def is_http_target(target: str) -> bool:
+    return target.startswith("http://") or target.startswith("https://")
+
+
+def is_markdown_path_target(base_target: str) -> bool:
+    return "/" in base_target or base_target.endswith(".md")
+
+
+def analyze_text(text: str):
+    """Return the content-only facts graph QA needs about one markdown file.
+
+    ``error`` is set when the frontmatter is unusable; otherwise ``id`` is the
+    node id (None if missing or invalid), ``problems`` lists metadata errors,
+    and ``targets`` lists the link targets that still need resolving.
+    """
+    facts = {"error": None, "id": None, "problems": [], "targets": []}
+    if not text.startswith("---\n"):
+        facts["error"] = "missing YAML frontmatter"
+        return facts
+
+    end = text.find("\n---\n", 4)
+    if end == -1:
+        facts["error"] = "malformed YAML frontmatter delimiter"
+        return facts
+
+    raw = text[4:end]
+    body = text[end + 5 :]
+
+    try:
+        fm = load_frontmatter(raw)
+    except Exception as exc:
+        facts["error"] = f"invalid YAML frontmatter: {exc}"
+        return facts
+
+    if not isinstance(fm, dict):
+        facts["error"] = "frontmatter must be a YAML object"
+        return facts
+
+    node_id = fm.get("id")
+    if isinstance(node_id, str) and node_id.strip():
+        facts["id"] = node_id.strip()
+
+    problems = facts["problems"]
+    missing = sorted(REQUIRED_KEYS - set(fm.keys()))
+    if missing:
+        problems.append(f"missing required frontmatter keys: {', '.join(missing)}")
+
+    description = fm.get("description")
+    if not isinstance(description, str) or not description.strip():
+        problems.append("'description' must be a non-empty string")
+
+    status = fm.get("status")
+    if not isinstance(status, str) or status not in ALLOWED_STATUS:
+        problems.append(f"invalid 'status' ({status!r}); allowed: {', '.join(sorted(ALLOWED_STATUS))}")
+
+    tags = fm.get("tags")
+    if not isinstance(tags, list):
+        problems.append("'tags' must be a YAML list")
+
+    links = fm.get("links")
+    if not isinstance(links, list):
+        problems.append("'links' must be a YAML list")
+        links = []
+
+    fm_targets = []
+    for item in links:
+        # YAML parses unquoted wiki-links like [[node-id]] into nested single-item lists.
+        while isinstance(item, list) and len(item) == 1:
+            item = item[0]
+
+        if isinstance(item, str):
+            fm_targets.append(normalize_target(item))
+            continue
+
+        problems.append("frontmatter links entries must be strings or nested single-item wiki-link lists")
+
+    body_targets = [normalize_target(t) for t in WIKILINK_PATTERN.findall(body)]
+
+    for target in fm_targets + body_targets:
+        if target and not is_http_target(target) and split_anchor(target):
+            facts["targets"].append(target)
+    return facts
+
+
+def is_facts(value) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get("problems"), list)
+        and isinstance(value.get("targets"), list)
+        and "error" in value
+        and "id" in value
+    )
+
+
+class ResultCache:
+    """On-disk graph QA state, persisted as JSON.
+
+    ``files`` maps the sha256 of a file's bytes to its analyze_text facts,
+    ``stats`` maps a path to the ``[mtime_ns, size, sha256]`` it had on the
+    last run, and ``graphs`` maps a graph directory to the fingerprint and
+    errors of its last validation.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.stats = {}
+        self.graphs = {}
+        self.seen_stats = {}
+        self.previous_scan_ns = 0
+        self.scan_started_ns = time.time_ns()
+        self.dirty = False
+        if path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("version") != CACHE_VERSION or data.get("yaml") != yaml.__version__:
+            return
+        files = data.get("files")
+        if isinstance(files, dict):
+            self.entries = files
+        stats = data.get("stats")
+        if isinstance(stats, dict):
+            self.stats = stats
+        graphs = data.get("graphs")
+        if isinstance(graphs, dict):
+            self.graphs = graphs
+        scan_started_ns = data.get("scanStartedNs")
+        if isinstance(scan_started_ns, int):
+            self.previous_scan_ns = scan_started_ns
+
+    def digest(self, path: str):
+        """Return (sha256, text); text is None when the file's stat was trusted."""
+        st = os.stat(path)
+        cached = self.stats.get(path)
+        if (
+            isinstance(cached, list)
+            and len(cached) == 3
+            and cached[0] == st.st_mtime_ns
+            and cached[1] == st.st_size
+            and st.st_mtime_ns < self.previous_scan_ns - RACY_MTIME_NS
+        ):
+            self.seen_stats[path] = cached
+            return cached[2], None
+        digest, text = read_markdown(path)
+        self.seen_stats[path] = [st.st_mtime_ns, st.st_size, digest]
+        self.dirty = True
+        return digest, text
+
+    def get(self, digest: str):
+        facts = self.entries.pop(digest, None)
+        if not is_facts(facts):
+            return None
+        # Re-insert so the entries used most recently survive trimming.
+        self.entries[digest] = facts
+        return facts
+
+    def put(self, digest: str, facts):
+        self.entries[digest] = facts
+        self.dirty = True
+
+    def graph_errors(self, key: str, fingerprint: str):
+        entry = self.graphs.get(key)
+        if isinstance(entry, dict) and entry.get("fingerprint") == fingerprint and isinstance(entry.get("errors"), list):
+            return entry["errors"]
+        return None
+
+    def store_graph(self, key: str, fingerprint: str, errors):
+        self.graphs.pop(key, None)
+        self.graphs[key] = {"fingerprint": fingerprint, "errors": errors}
+        self.dirty = True
+
+    def forget(self, changed):
+        """Drop the stats of paths a watcher reported and trust every other stat.
+
+        Between --watch runs each change is reported, so the racy-mtime guard
+        is no longer needed for files that were not mentioned.
+        """
+        self.stats.update(self.seen_stats)
+        prefixes = tuple(path + os.sep for path, is_dir in changed.items() if is_dir)
+        for stats in (self.stats, self.seen_stats):
+            for path in changed:
+                stats.pop(path, None)
+            if prefixes:
+                for path in [path for path in stats if path.startswith(prefixes)]:
+                    del stats[path]
+        self.previous_scan_ns = sys.maxsize
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        entries = self.entries
+        if len(entries) > CACHE_MAX_ENTRIES:
+            entries = dict(list(entries.items())[-CACHE_MAX_ENTRIES:])
+        graphs = self.graphs
+        if len(graphs) > CACHE_MAX_ENTRIES:
+            graphs = dict(list(graphs.items())[-CACHE_MAX_ENTRIES:])
+        payload = {
+            "version": CACHE_VERSION,
+            "yaml": yaml.__version__,
+            "scanStartedNs": self.scan_started_ns,
+            "files": entries,
+            "stats": self.seen_stats,
+            "graphs": graphs,
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            # The cache only saves time; a read-only home must not fail QA.
+            tmp.unlink(missing_ok=True)
+
+
+def read_markdown(path: str):
+    """Return (sha256, text) with the newline handling of Path.read_text."""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return hashlib.sha256(data).hexdigest(), text
+
+
+def analyze_files(paths, cache: ResultCache, jobs: int, strict: bool = True):
+    """Return (facts, digests) keyed by path string.
+
+    Unreadable files raise when ``strict``; otherwise they are left out, which
+    is what files that are only indexed, not validated, need.
+    """
+    facts = {}
+    digests = {}
+    pending = []
+    for path in paths:
+        try:
+            digest, text = cache.digest(path)
+            cached = cache.get(digest)
+            if cached is None and text is None:
+                digest, text = read_markdown(path)
+        except (OSError, UnicodeDecodeError):
+            if strict:
+                raise
+            continue
+        digests[path] = digest
+        if cached is not None:
+            facts[path] = cached
+        else:
+            pending.append((path, digest, text))
+
+    texts = [text for _, _, text in pending]
+    results = None
+    if jobs > 1 and len(pending) >= PARALLEL_MIN_FILES:
+        chunksize = max(1, len(texts) // (jobs * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(analyze_text, texts, chunksize=chunksize))
+        except (OSError, NotImplementedError):
+            # Sandboxes without process support still get a serial run.
+            results = None
+    if results is None:
+        results = [analyze_text(text) for text in texts]
+
+    for (path, digest, _), result in zip(pending, results):
+        cache.put(digest, result)
+        facts[path] = result
+    return facts, digests
+
+
+def lane_roots(skills_root: Path):
+    """Other lane roots of this repository when skills_root is one (public/common, private/pi, ...).
+
+    A public root only sees public roots; a private root sees both lanes.
+    """
+    root = skills_root.resolve()
+    if root.parent.name not in LANE_NAMES:
+        return []
+    repo = root.parent.parent
+    lanes = ("public",) if root.parent.name == "public" else LANE_NAMES
+    roots = []
+    for lane in lanes:
+        lane_dir = repo / lane
+        if not lane_dir.is_dir():
+            continue
+        for target in sorted(lane_dir.iterdir()):
+            if target.is_dir() and not target.name.startswith(".") and target.resolve() != root:
+                roots.append(target)
+    return roots
+
+
+class NodeIndex:
+    """Every markdown file of every skill, keyed by its installed path.
+
+    ``files`` maps ``<skill>/<path in skill>`` to the file on disk, so a path
+    link resolves with one lookup even when the linked skill lives in another
+    lane. ``shared`` maps ``shared-*`` node ids and stems to their file.
+    """
+
+    def __init__(self):
+        self.skills = set()
+        self.files = {}
+        self.installed = {}
+        self.graph_files = []
+        self.shared = {}
+        self.shared_skill = {}
+        self.duplicates = {}
+        self.fallbacks = 0
+        self._signature = None
+
+    def add_root(self, root: Path):
+        if not root.is_dir():
+            return
+        for skill_dir in sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")):
+            skill = skill_dir.name
+            if skill in self.skills:
+                continue
+            self.skills.add(skill)
+            for dirpath, dirnames, filenames in os.walk(skill_dir):
+                dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+                rel_dir = Path(os.path.relpath(dirpath, skill_dir))
+                in_graph = "graph" in rel_dir.parts
+                for name in sorted(filenames):
+                    if not name.endswith(".md"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    key = posixpath.normpath(f"{skill}/{rel_dir.as_posix()}/{name}")
+                    self.files[key] = path
+                    self.installed[path] = key
+                    if in_graph:
+                        self.graph_files.append((path, skill))
+
+    def index_nodes(self, facts):
+        """(Re)build the shared-id map from the facts of every graph file."""
+        self.shared = {}
+        self.shared_skill = {}
+        self.duplicates = {}
+        self._signature = None
+        for path, skill in self.graph_files:
+            self.add_node(path, skill, facts.get(path))
+
+    def add_node(self, path: str, skill: str, facts):
+        names = {os.path.splitext(os.path.basename(path))[0]}
+        if facts is not None and facts["error"] is None and facts["id"] is not None:
+            names.add(facts["id"])
+        for name in sorted(names):
+            if not name.startswith(SHARED_PREFIX):
+                continue
+            first = self.shared.get(name)
+            if first is None:
+                self.shared[name] = path
+                self.shared_skill[name] = skill
+            elif first != path and self.shared_skill[name] != skill:
+                self.duplicates.setdefault(path, (name, first))
+
+    def signature(self) -> str:
+        if self._signature is None:
+            payload = [
+                sorted(self.files),
+                sorted(self.shared.items()),
+                sorted((path, name, first) for path, (name, first) in self.duplicates.items()),
+            ]
+            self._signature = hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+        return self._signature
+
+    def lookup(self, installed_dir: str, base_target: str):
+        """Return the installed path a relative path link points at, if it is indexed."""
+        if base_target.startswith("~") or Path(base_target).is_absolute():
+            return None
+        candidates = [base_target]
+        if Path(base_target).suffix == "":
+            candidates.append(base_target + ".md")
+        for candidate in candidates:
+            key = posixpath.normpath(posixpath.join(installed_dir, candidate))
+            if not key.startswith("../") and key in self.files:
+                return key
+        return None
+
+    def resolve_path(self, installed_dir: str, current_file: Path, base_target: str):
+        """Resolve a path link through the index, then through the filesystem."""
+        key = self.lookup(installed_dir, base_target)
+        if key is not None:
+            return self.files[key]
+        # Targets outside the index (home, absolute, non-markdown) are checked on disk.
+        self.fallbacks += 1
+        return resolve_markdown_path(current_file, base_target)
+
+
+def resolve_markdown_path(current_file: Path, base_target: str):
+    """Resolve path-like markdown target relative to current file."""
+    if not base_target:
+        return None
+
+    raw_path = Path(base_target)
+    candidates = []
+
+    if str(raw_path).startswith("~"):
+        expanded = Path(str(raw_path)).expanduser()
+        candidates.append(expanded)
+    elif raw_path.is_absolute():
+        candidates.append(raw_path)
+    else:
+        candidates.append((current_file.parent / raw_path))
+
+    # Also allow omitted .md extension for path-like links.
+    if raw_path.suffix == "":
+        if str(raw_path).startswith("~"):
+            candidates.append(Path(str(raw_path) + ".md").expanduser())
+        elif raw_path.is_absolute():
+            candidates.append(Path(str(raw_path) + ".md"))
+        else:
+            candidates.append(current_file.parent / (str(raw_path) + ".md"))
+
+    for candidate in candidates:
+        try:
+            resolved = candidate.resolve()
+        except Exception:
+            resolved = candidate
+        if resolved.exists() and resolved.is_file():
+            return resolved
+
+    return None
+
+
+def graph_fingerprint(graph_dir: Path, markdown_files, digests, index: NodeIndex) -> str:
+    payload = [str(graph_dir), [[str(md), digests[str(md)]] for md in markdown_files], index.signature()]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def validate_graph_dir(graph_dir: Path, markdown_files, facts, index: NodeIndex, errors):
+    if not markdown_files:
+        errors.append(f"{graph_dir}: graph directory has no markdown files")
+        return
+
+    known_targets = set()
+    id_to_path = {}
+
+    # First pass: gather ids and stems
+    for md in markdown_files:
+        file_facts = facts[str(md)]
+        if file_facts["error"] is not None:
+            errors.append(f"{md}: {file_facts['error']}")
+
+        known_targets.add(md.stem)
+
+        if file_facts["error"] is not None:
+            continue
+
+        node_id = file_facts["id"]
+        if node_id is not None:
+            known_targets.add(node_id)
+            if node_id in id_to_path:
+                errors.append(
+                    f"{md}: duplicate id '{node_id}' (already used by {id_to_path[node_id]})"
+                )
+            else:
+                id_to_path[node_id] = md
+        else:
+            errors.append(f"{md}: missing or invalid 'id'")
+
+        duplicate = index.duplicates.get(str(md))
+        if duplicate is not None:
+            errors.append(f"{md}: duplicate shared id '{duplicate[0]}' (already used by {duplicate[1]})")
+
+    # Second pass: metadata problems and links
+    installed_graph = installed_prefix(graph_dir)
+    for md in markdown_files:
+        file_facts = facts[str(md)]
+        if file_facts["error"] is not None:
+            continue
+
+        for problem in file_facts["problems"]:
+            errors.append(f"{md}: {problem}")
+
+        installed_dir = posixpath.dirname(f"{installed_graph}/{md.relative_to(graph_dir).as_posix()}")
+        for target in file_facts["targets"]:
+            base_target = split_anchor(target)
+
+            if is_markdown_path_target(base_target):
+                resolved = index.resolve_path(installed_dir, md, base_target)
+                if resolved is None:
+                    errors.append(f"{md}: broken markdown path link [[{target}]]")
+                continue
+
+            if base_target not in known_targets and base_target not in index.shared:
+                errors.append(f"{md}: broken wikilink target [[{target}]]")
+
+
+def installed_prefix(graph_dir: Path) -> str:
+    return f"{graph_dir.parent.name}/{graph_dir.name}"
+
+
+def index_root_list(skills_root: Path, index_roots):
+    return [skills_root, *lane_roots(skills_root), *index_roots]
+
+
+def load_graphs(skills_root: Path, graph_dirs, index_roots, cache: ResultCache, jobs: int):
+    """Index every skill and analyze the graph files; returns (index, files_by_dir, facts, digests)."""
+    index = NodeIndex()
+    for root in index_root_list(skills_root, index_roots):
+        index.add_root(root)
+
+    # Sorting by parts gives Path order without Path comparisons.
+    files_by_dir = [
+        (graph_dir, sorted(graph_dir.rglob("*.md"), key=lambda md: md.parts)) for graph_dir in graph_dirs
+    ]
+    facts, digests = analyze_files([str(md) for _, files in files_by_dir for md in files], cache, jobs)
+    indexed = [path for path, _ in index.graph_files if path not in facts]
+    indexed_facts, _ = analyze_files(indexed, cache, jobs, strict=False)
+    facts.update(indexed_facts)
+    index.index_nodes(facts)
+    return index, files_by_dir, facts, digests
+
+
+def update_graphs(loaded, changed, cache: ResultCache, jobs: int):
+    """Re-analyze the graph nodes a watcher saw edited.
+
+    Returns None when files were added, removed or moved, which needs a full
+    load_graphs.
+    """
+    index, files_by_dir, facts, digests = loaded
+    edited = []
+    for path, is_dir in changed.items():
+        if is_dir:
+            return None
+        if not path.endswith(".md"):
+            continue
+        if path not in index.installed or not os.path.isfile(path):
+            return None
+        if path in facts:
+            edited.append(path)
+    validated = [path for path in edited if path in digests]
+    validated_facts, validated_digests = analyze_files(validated, cache, jobs)
+    indexed = [path for path in edited if path not in digests]
+    indexed_facts, _ = analyze_files(indexed, cache, jobs, strict=False)
+    # Stems do not change on edit, so only a shared-* id can change the shared map.
+    shared_ids = False
+    for path in edited:
+        for file_facts in (facts.pop(path, None), validated_facts.get(path), indexed_facts.get(path)):
+            if file_facts is not None and str(file_facts["id"]).startswith(SHARED_PREFIX):
+                shared_ids = True
+    facts.update(validated_facts)
+    facts.update(indexed_facts)
+    digests.update(validated_digests)
+    if shared_ids:
+        index.index_nodes(facts)
+    return loaded
+
+
+def check_graphs(files_by_dir, facts, digests, index: NodeIndex, cache: ResultCache):
+    """Validate each graph directory, reusing cached errors; returns (errors, checked_files)."""
+    errors = []
+    checked_files = 0
+    for graph_dir, markdown_files in files_by_dir:
+        checked_files += len(markdown_files)
+        fingerprint = graph_fingerprint(graph_dir, markdown_files, digests, index)
+        cached_errors = cache.graph_errors(str(graph_dir), fingerprint)
+        if cached_errors is not None:
+            errors.extend(cached_errors)
+            continue
+        graph_errors = []
+        fallbacks = index.fallbacks
+        validate_graph_dir(graph_dir, markdown_files, facts, index, graph_errors)
+        errors.extend(graph_errors)
+        # Links checked on disk can change without any indexed file changing.
+        if index.fallbacks == fallbacks:
+            cache.store_graph(str(graph_dir), fingerprint, graph_errors)
+    return errors, checked_files
+
+
+def print_result(errors, graph_dirs, checked_files) -> int:
+    if errors:
+        print("\n✗ Graph QA failed")
+        print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        for err in errors:
+            print(f"- {err}")
+        print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        print(f"Errors: {len(errors)}")
+        return 1
+
+    print("✓ Graph QA passed")
+    print(f"Checked graph directories: {len(graph_dirs)}")
+    print(f"Checked markdown files: {checked_files}")
+    return 0
+
+
+def watch(skills_root: Path, skill_filters, graph_dirs, index_roots, cache: ResultCache, jobs: int) -> int:
+    """Print the QA result, then again after every change under the indexed roots."""
+    watcher = Watcher(index_root_list(skills_root, index_roots), prune=SKIP_DIRS)
+    print(f"Watching {len(watcher.roots)} skill roots ({watcher.backend}); Ctrl-C to stop.")
+    loaded = None
+    try:
+        while True:
+            try:
+                if loaded is None:
+                    loaded = load_graphs(skills_root, graph_dirs, index_roots, cache, jobs)
+                index, files_by_dir, facts, digests = loaded
+                errors, checked_files = check_graphs(files_by_dir, facts, digests, index, cache)
+                print_result(errors, graph_dirs, checked_files)
+            except (OSError, UnicodeDecodeError) as exc:
+                print(f"✗ {exc}")
+                loaded = None
+            sys.stdout.flush()
+            changed = watcher.wait()
+            cache.forget(changed)
+            print()
+            print(describe_changes(changed))
+            if loaded is not None:
+                loaded = update_graphs(loaded, changed, cache, jobs)
+            if loaded is None and not skill_filters:
+                # Pick up graph directories added or removed while watching.
+                graph_dirs = find_graph_dirs(skills_root, skill_filters)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+        cache.save()
+
+
+def main(argv) -> int:
+    skills_root, skill_filters, index_roots, jobs, cache_path, watch_mode = parse_args(argv)
+    graph_dirs = find_graph_dirs(skills_root, skill_filters)
+    if not graph_dirs and not watch_mode:
+        print("No graph directories found.")
+        return 0
+
+    cache = ResultCache(cache_path)
+    if watch_mode:
+        return watch(skills_root, skill_filters, graph_dirs, index_roots, cache, jobs)
+    index, files_by_dir, facts, digests = load_graphs(skills_root, graph_dirs, index_roots, cache, jobs)
+    errors, checked_files = check_graphs(files_by_dir, facts, digests, index, cache)
+    cache.save()
+    return print_result(errors, graph_dirs, checked_files)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(USAGE.replace("graph-qa.sh", "graph_qa.py SKILLS_ROOT"), file=sys.stderr)
+        sys.exit(2)
+    sys.exit(main(sys.argv[1:]))
@@ -5,6 +5,20 @@ Managed artifacts:
 - package.json (pi.skills, pi.extensions)
 - .claude-plugin/marketplace.json (plugins list)
 
+Discovery facts (directory listings, extension entrypoint checks, plugin
+metadata) are cached in .cache/sync-catalog-artifacts.json. A directory
+listing is reused while the directory's mtime is unchanged. File facts are
+reused while the file's stat is unchanged, or its content hash still matches.
+Validation runs on the cached facts, so errors are reported exactly as
+without the cache (--no-cache).
+
+--watch runs once, then again whenever a lane, plugin or managed artifact
+changes. Filesystem events come from the graph QA watcher
+(public/common/skill-playbook/scripts/fs_watch.py): inotify, or stat polling
+where inotify is unavailable. The discovery cache stays in memory between
+runs. Only the listings and file facts of changed paths are read again, so
+drift (or the sync result) is re-printed right after a save.
+
 Exit codes:
 - 2: lane-mismatch
 - 3: missing-generated-file
@@ -16,9 +30,13 @@ Exit codes:
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import re
+import stat
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -30,9 +48,18 @@ PRIVATE_LEAK_IN_PUBLIC = 5
 INVALID_CONTRACT_INPUT = 6
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT_STR = str(REPO_ROOT)
 PACKAGE_FILE = REPO_ROOT / "package.json"
 MARKETPLACE_FILE = REPO_ROOT / ".claude-plugin" / "marketplace.json"
 PLUGINS_DIR = REPO_ROOT / "plugins"
+DISCOVERY_CACHE_FILE = REPO_ROOT / ".cache" / "sync-catalog-artifacts.json"
+DISCOVERY_CACHE_VERSION = 1
+FS_WATCH_DIR = REPO_ROOT / "public" / "common" / "skill-playbook" / "scripts"
+WATCH_SOURCES = {"public", "private", "plugins", "package.json", ".claude-plugin"}
+WATCH_PRUNE = {".git", ".cache", "node_modules", "__pycache__"}
+# Entries whose mtime is this close to the previous scan are re-read: on
+# coarse-timestamp filesystems a later edit in the same tick keeps the mtime.
+RACY_MTIME_NS = 2_000_000_000
 
 VALID_LANES = ("public", "private")
 VALID_TARGETS = ("common", "claude", "pi")
@@ -76,7 +103,136 @@ def load_json(path: Path) -> Any:
 
 
 def save_json(path: Path, payload: Any) -> None:
-    path.write_text(f"{json.dumps(payload, indent=2, ensure_ascii=False)}\n", encoding="utf-8")
+    text = f"{json.dumps(payload, indent=2, ensure_ascii=False)}\n"
+    # Rewriting identical content would wake --watch again for nothing.
+    if path.is_file() and path.read_text(encoding="utf-8") == text:
+        return
+    path.write_text(text, encoding="utf-8")
+
+
+class DiscoveryCache:
+    """Stat-keyed directory listings and file facts, persisted between runs.
+
+    With ``path=None`` nothing is loaded or saved, so every fact is read fresh.
+    """
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.scan_started_ns = time.time_ns()
+        self.previous_scan_ns = 0
+        self.dirs: dict[str, dict[str, Any]] = {}
+        self.files: dict[str, dict[str, Any]] = {}
+        self.used_dirs: dict[str, dict[str, Any]] = {}
+        self.used_files: dict[str, dict[str, Any]] = {}
+        self.dirty = False
+        if path is not None:
+            self._load(path)
+
+    def _load(self, path: Path) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") != DISCOVERY_CACHE_VERSION or data.get("root") != str(REPO_ROOT):
+                return
+            self.previous_scan_ns = int(data["scanStartedNs"])
+            self.dirs = dict(data["dirs"])
+            self.files = dict(data["files"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self.dirs, self.files = {}, {}
+
+    def _trusted(self, cached: dict[str, Any] | None, mtime_ns: int) -> bool:
+        if cached is None or cached["mtimeNs"] != mtime_ns:
+            return False
+        return mtime_ns < self.previous_scan_ns - RACY_MTIME_NS
+
+    def list_dir(self, key: str) -> list[list[str]] | None:
+        """Sorted [name, kind] children of repo-relative directory ``key``, or None if it is not a directory.
+
+        kind is "dir", "file" or "other", following symlinks like Path.is_dir()/is_file().
+        Keys are plain strings: with thousands of capabilities, pathlib overhead
+        would dominate a run that is otherwise all cache hits.
+        """
+        directory = os.path.join(REPO_ROOT_STR, key)
+        try:
+            info = os.stat(directory)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(info.st_mode):
+            return None
+        cached = self.dirs.get(key)
+        if self._trusted(cached, info.st_mtime_ns):
+            self.used_dirs[key] = cached
+            return cached["children"]
+        children = sorted(
+            [child.name, "dir" if child.is_dir() else "file" if child.is_file() else "other"]
+            for child in os.scandir(directory)
+        )
+        self.used_dirs[key] = {"mtimeNs": info.st_mtime_ns, "children": children}
+        self.dirty = True
+        return children
+
+    def file_facts(self, key: str, compute: Any) -> dict[str, Any]:
+        """``compute(raw bytes)`` for repo-relative file ``key``, reused while its stat or content hash is unchanged.
+
+        Raises OSError when the file cannot be read.
+        """
+        file = os.path.join(REPO_ROOT_STR, key)
+        info = os.stat(file)
+        cached = self.files.get(key)
+        if self._trusted(cached, info.st_mtime_ns) and cached["size"] == info.st_size:
+            self.used_files[key] = cached
+            return cached["facts"]
+        with open(file, "rb") as handle:
+            raw = handle.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        facts = cached["facts"] if cached is not None and cached["sha256"] == digest else compute(raw)
+        self.used_files[key] = {"mtimeNs": info.st_mtime_ns, "size": info.st_size, "sha256": digest, "facts": facts}
+        self.dirty = True
+        return facts
+
+    def refresh(self, changed: dict[str, bool]) -> None:
+        """Start another --watch run from this one, forgetting the paths in ``changed``.
+
+        ``changed`` maps absolute paths to whether they are directories. The
+        watcher reports every change, so an entry it did not mention is trusted
+        even inside the racy-mtime window.
+        """
+        self.dirs.update(self.used_dirs)
+        self.files.update(self.used_files)
+        self.used_dirs, self.used_files = {}, {}
+        for path, is_dir in changed.items():
+            key = os.path.relpath(path, REPO_ROOT_STR)
+            self.files.pop(key, None)
+            self.dirs.pop(key, None)
+            self.dirs.pop(os.path.dirname(key), None)
+            if is_dir:
+                prefix = f"{key}/"
+                for entries in (self.dirs, self.files):
+                    for stale in [name for name in entries if name.startswith(prefix)]:
+                        del entries[stale]
+        self.previous_scan_ns = sys.maxsize
+
+    def save(self) -> None:
+        """Persist what this run used; entries for removed paths drop out."""
+        if self.path is None:
+            return
+        unchanged = self.used_dirs.keys() == self.dirs.keys() and self.used_files.keys() == self.files.keys()
+        if not self.dirty and unchanged:
+            return
+        payload = {
+            "version": DISCOVERY_CACHE_VERSION,
+            "root": str(REPO_ROOT),
+            "scanStartedNs": self.scan_started_ns,
+            "dirs": self.used_dirs,
+            "files": self.used_files,
+        }
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The cache only saves time; a read-only checkout still gets correct results.
+            tmp_path.unlink(missing_ok=True)
 
 
 def validate_entry_id(entry_id: str, path: str) -> None:
@@ -86,25 +242,30 @@ def validate_entry_id(entry_id: str, path: str) -> None:
         )
 
 
-def discover_skill_entries() -> list[CatalogEntry]:
+def has_file(listing: list[list[str]] | None, name: str) -> bool:
+    return listing is not None and [name, "file"] in listing
+
+
+def discover_skill_entries(cache: DiscoveryCache) -> list[CatalogEntry]:
     entries: list[CatalogEntry] = []
 
     for lane in VALID_LANES:
         for target in VALID_TARGETS:
-            root = REPO_ROOT / lane / target
-            if not root.is_dir():
+            root = f"{lane}/{target}"
+            children = cache.list_dir(root)
+            if children is None:
                 continue
 
-            for child in sorted(root.iterdir(), key=lambda item: item.name):
-                if not child.is_dir():
+            for name, kind in children:
+                if kind != "dir":
                     continue
 
-                skill_file = child / "SKILL.md"
-                if not skill_file.is_file():
+                child = f"{root}/{name}"
+                if not has_file(cache.list_dir(child), "SKILL.md"):
                     continue
 
-                path = rel(skill_file)
-                entry_id = child.name
+                path = f"{child}/SKILL.md"
+                entry_id = name
                 validate_entry_id(entry_id, path)
 
                 entries.append(
@@ -120,53 +281,61 @@ def discover_skill_entries() -> list[CatalogEntry]:
     return entries
 
 
-def discover_extension_entries() -> list[CatalogEntry]:
+def extension_source_facts(raw: bytes) -> dict[str, Any]:
+    try:
+        source = raw.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        return {"utf8Error": str(exc), "exportDefault": False}
+    return {"utf8Error": None, "exportDefault": bool(EXTENSION_ENTRYPOINT_PATTERN.search(source))}
+
+
+def discover_extension_entries(cache: DiscoveryCache) -> list[CatalogEntry]:
     entries: list[CatalogEntry] = []
 
     for lane in VALID_LANES:
-        pi_root = REPO_ROOT / lane / "pi"
-        if not pi_root.is_dir():
+        pi_root = f"{lane}/pi"
+        children = cache.list_dir(pi_root)
+        if children is None:
             continue
 
-        for capability_dir in sorted(pi_root.iterdir(), key=lambda item: item.name):
-            if not capability_dir.is_dir():
+        for name, kind in children:
+            if kind != "dir":
                 continue
 
-            entry_id = capability_dir.name
-            validate_entry_id(entry_id, rel(capability_dir))
+            capability_dir = f"{pi_root}/{name}"
+            entry_id = name
+            validate_entry_id(entry_id, capability_dir)
 
+            listing = cache.list_dir(capability_dir)
             extension_candidates = [
-                capability_dir / f"extension{suffix}"
+                f"{capability_dir}/extension{suffix}"
                 for suffix in sorted(VALID_EXTENSION_SUFFIXES)
-                if (capability_dir / f"extension{suffix}").is_file()
+                if has_file(listing, f"extension{suffix}")
             ]
 
             if not extension_candidates:
                 continue
 
             if len(extension_candidates) > 1:
-                preview = ", ".join(rel(path) for path in extension_candidates)
+                preview = ", ".join(extension_candidates)
                 raise ContractError(
-                    f"invalid-contract-input: multiple extension entrypoints in {rel(capability_dir)}: {preview}"
+                    f"invalid-contract-input: multiple extension entrypoints in {capability_dir}: {preview}"
                 )
 
-            skill_file = capability_dir / "SKILL.md"
-            if lane == "public" and not skill_file.is_file():
+            if lane == "public" and not has_file(listing, "SKILL.md"):
                 raise ContractError(
-                    f"invalid-contract-input: pi extension entrypoint requires colocated SKILL.md ({rel(capability_dir)})"
+                    f"invalid-contract-input: pi extension entrypoint requires colocated SKILL.md ({capability_dir})"
                 )
 
-            file = extension_candidates[0]
-            path = rel(file)
+            path = extension_candidates[0]
 
-            try:
-                source = file.read_text(encoding="utf-8")
-            except UnicodeDecodeError as exc:
+            facts = cache.file_facts(path, extension_source_facts)
+            if facts["utf8Error"] is not None:
                 raise ContractError(
-                    f"invalid-contract-input: extension source must be UTF-8 text ({path}: {exc})"
-                ) from exc
+                    f"invalid-contract-input: extension source must be UTF-8 text ({path}: {facts['utf8Error']})"
+                )
 
-            if not EXTENSION_ENTRYPOINT_PATTERN.search(source):
+            if not facts["exportDefault"]:
                 raise ContractError(
                     f"invalid-contract-input: extension entrypoint must export default ({path})"
                 )
@@ -184,8 +353,8 @@ def discover_extension_entries() -> list[CatalogEntry]:
     return entries
 
 
-def load_catalog_entries() -> list[CatalogEntry]:
-    entries = discover_skill_entries() + discover_extension_entries()
+def load_catalog_entries(cache: DiscoveryCache) -> list[CatalogEntry]:
+    entries = discover_skill_entries(cache) + discover_extension_entries(cache)
 
     if not entries:
         raise ContractError(
@@ -225,11 +394,28 @@ def expected_pi_lists(entries: list[CatalogEntry]) -> tuple[list[str], list[str]
     return skill_paths, extension_paths
 
 
-def load_plugin_metadata_index() -> dict[str, dict[str, str]]:
+def plugin_metadata_facts(raw: bytes) -> dict[str, Any]:
+    data = json.loads(raw.decode("utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("plugin.json root is not an object")
+    return {"name": data.get("name"), "description": data.get("description")}
+
+
+def load_plugin_metadata_index(cache: DiscoveryCache) -> dict[str, dict[str, str]]:
     mapping: dict[str, dict[str, str]] = {}
 
-    for plugin_json in sorted(PLUGINS_DIR.glob("*/.claude-plugin/plugin.json")):
-        data = load_json(plugin_json)
+    plugin_files = []
+    for name, kind in cache.list_dir(rel(PLUGINS_DIR)) or []:
+        plugin_json = PLUGINS_DIR / name / ".claude-plugin" / "plugin.json"
+        if kind == "dir" and not name.startswith(".") and plugin_json.is_file():
+            plugin_files.append(plugin_json)
+
+    for plugin_json in plugin_files:
+        try:
+            data = cache.file_facts(rel(plugin_json), plugin_metadata_facts)
+        except ValueError:
+            # Unparseable metadata is never cached; the uncached read reports it as before.
+            data = load_json(plugin_json)
 
         name = data.get("name")
         description = data.get("description")
@@ -250,8 +436,8 @@ def load_plugin_metadata_index() -> dict[str, dict[str, str]]:
     return mapping
 
 
-def expected_marketplace_plugins(entries: list[CatalogEntry]) -> list[dict[str, str]]:
-    plugin_meta_index = load_plugin_metadata_index()
+def expected_marketplace_plugins(entries: list[CatalogEntry], cache: DiscoveryCache) -> list[dict[str, str]]:
+    plugin_meta_index = load_plugin_metadata_index(cache)
     plugin_records: dict[str, dict[str, str]] = {}
 
     for entry in entries:
@@ -305,14 +491,16 @@ def compare_list(current: list[Any], expected: list[Any], artifact: str, field:
     return lines
 
 
-def run(args: argparse.Namespace) -> int:
+def run(args: argparse.Namespace, cache: DiscoveryCache | None = None) -> int:
     if args.lane != "public":
         raise ContractError(
             "lane-mismatch: this repository manages public distribution artifacts only",
             LANE_MISMATCH,
         )
 
-    entries = load_catalog_entries()
+    if cache is None:
+        cache = DiscoveryCache(None if args.no_cache else args.cache_file)
+    entries = load_catalog_entries(cache)
 
     enabled = set(args.only.split(",")) if args.only else {"pi", "marketplace"}
     valid_enabled = {"pi", "marketplace"}
@@ -344,7 +532,8 @@ def run(args: argparse.Namespace) -> int:
     if not isinstance(marketplace, dict):
         raise ContractError("invalid-contract-input: marketplace.json root must be an object")
 
-    expected_plugins = expected_marketplace_plugins(entries)
+    expected_plugins = expected_marketplace_plugins(entries, cache)
+    cache.save()
 
     if "marketplace" in enabled:
         current_plugins = marketplace.get("plugins")
@@ -377,6 +566,42 @@ def run(args: argparse.Namespace) -> int:
     return 0
 
 
+def is_watched(path: str) -> bool:
+    key = os.path.relpath(path, REPO_ROOT_STR)
+    return key == "." or key.split(os.sep, 1)[0] in WATCH_SOURCES
+
+
+def watch(args: argparse.Namespace) -> int:
+    """Run, then run again after every change to a catalog source or managed artifact."""
+    # The watcher ships with graph QA, which has the same need.
+    sys.path.insert(0, str(FS_WATCH_DIR))
+    from fs_watch import Watcher, describe_changes
+
+    cache = DiscoveryCache(None if args.no_cache else args.cache_file)
+    watcher = Watcher([REPO_ROOT], prune=WATCH_PRUNE)
+    print(f"watching {REPO_ROOT} ({watcher.backend}); Ctrl-C to stop")
+    try:
+        while True:
+            try:
+                run(args, cache)
+            except ContractError as exc:
+                print(f"ERROR: {exc}", file=sys.stderr)
+            except (OSError, UnicodeDecodeError) as exc:
+                # Usually a file removed or half-written mid-run; the next change reruns.
+                print(f"ERROR: {exc}", file=sys.stderr)
+            sys.stdout.flush()
+            changed: dict[str, bool] = {}
+            while not changed:
+                changed = {path: is_dir for path, is_dir in watcher.wait().items() if is_watched(path)}
+            cache.refresh(changed)
+            print()
+            print(describe_changes(changed, REPO_ROOT_STR))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Sync/check managed artifacts")
     parser.add_argument("--check", action="store_true", help="Do not modify files; fail on drift")
@@ -390,6 +615,22 @@ def build_parser() -> argparse.ArgumentParser:
         "--only",
         help="Comma-separated subset: pi,marketplace",
     )
+    parser.add_argument(
+        "--cache-file",
+        type=Path,
+        default=DISCOVERY_CACHE_FILE,
+        help=f"Discovery cache path (default: {rel(DISCOVERY_CACHE_FILE)})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Read every source fresh; do not use or update the cache",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running; check or sync again whenever a source or artifact changes",
+    )
     return parser
 
 
@@ -397,6 +638,8 @@ def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
 
+    if args.watch:
+        return watch(args)
     try:
         return run(args)
     except ContractError as exc:
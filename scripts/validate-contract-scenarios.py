@@ -49,13 +49,30 @@ def mutate_private_leak_package(repo: Path) -> None:
     path.write_text(f"{json.dumps(data, indent=2, ensure_ascii=False)}\n", encoding="utf-8")
 
 
+def mutate_public_graph_private_links(repo: Path) -> None:
+    shared = repo / "private/common/work-ticket/graph/nodes/shared-private-only.md"
+    shared.write_text(
+        "---\n"
+        "id: shared-private-only\n"
+        "description: Private-only shared node\n"
+        "status: active\n"
+        "tags: []\n"
+        "links: []\n"
+        "---\n",
+        encoding="utf-8",
+    )
+    index = repo / "public/common/call-ai/graph/index.md"
+    with index.open("a", encoding="utf-8") as handle:
+        handle.write("\n[[../../work-ticket/graph/index.md]] [[shared-private-only]]\n")
+
+
 def main() -> int:
-    print("[1/3] Baseline public contract check")
+    print("[1/4] Baseline public contract check")
     baseline = run_capture([sys.executable, "scripts/check-public-output-drift.py"], REPO_ROOT)
     if baseline.returncode != 0:
         return fail("baseline public contract check failed", baseline.stdout + baseline.stderr)
 
-    print("[2/3] Drift scenario (expected failure with exit code 4)")
+    print("[2/4] Drift scenario (expected failure with exit code 4)")
     with tempfile.TemporaryDirectory() as tmp:
         drift_repo = Path(tmp) / "drift"
         shutil.copytree(REPO_ROOT, drift_repo, symlinks=True)
@@ -78,7 +95,7 @@ def main() -> int:
         if "DRIFT " not in drift_output:
             return fail("expected DRIFT output in drift scenario", drift_output)
 
-    print("[3/3] Private leak scenario (expected failure)")
+    print("[3/4] Private leak scenario (expected failure)")
     with tempfile.TemporaryDirectory() as tmp:
         leak_repo = Path(tmp) / "leak"
         shutil.copytree(REPO_ROOT, leak_repo, symlinks=True)
@@ -96,6 +113,28 @@ def main() -> int:
         if not re.search(r"non-public path leaked|non-public source leaked", leak_output):
             return fail("expected private-leak failure output", leak_output)
 
+    print("[4/4] Public graph linking into a private skill (expected failure)")
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_repo = Path(tmp) / "graph"
+        shutil.copytree(REPO_ROOT, graph_repo, symlinks=True)
+        mutate_public_graph_private_links(graph_repo)
+
+        graph_qa = [sys.executable, "public/common/skill-playbook/scripts/graph_qa.py"]
+        public = run_capture([*graph_qa, "public/common", "--no-cache"], graph_repo)
+        public_output = public.stdout + public.stderr
+        if public.returncode == 0:
+            return fail("public graph linking into private unexpectedly passed", public_output)
+        for expected in (
+            "broken markdown path link [[../../work-ticket/graph/index.md]]",
+            "broken wikilink target [[shared-private-only]]",
+        ):
+            if expected not in public_output:
+                return fail(f"expected graph QA to report: {expected}", public_output)
+
+        private = run_capture([*graph_qa, "private/common", "--no-cache"], graph_repo)
+        if private.returncode != 0:
+            return fail("private graphs should still resolve public skills", private.stdout + private.stderr)
+
     print("contract scenario validation passed")
     return 0
 